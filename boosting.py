@@ -0,0 +1,267 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+import numpy as np
+
+import training
+from criteria import Variance
+from forest import PREDICT_BATCH
+from tree import Tree, TreeModel
+from tree_arrays import TreeArrays
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def sigmoid(F:np.ndarray) -> np.ndarray:
+    """
+    logistic function, from the log-odds to the probabilities
+
+    Parameters
+    ----------
+    F : np.ndarray
+        log-odds
+
+    Returns
+    -------
+    np.ndarray
+        the probabilities
+    """
+    # clipped so that exp() cannot overflow, the result being 0 or 1 anyway
+    return 1/(1 + np.exp(-np.clip(F, -500, 500)))
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class GradientBoosting:
+    """
+    gradient boosted trees : every round fits a shallow regression tree to the negative gradient
+    of the loss (the residuals), and adds it to the model, multiplied by the learning rate.
+    the features are binned once and every tree is grown by the histogram splitter on the same bins,
+    and the predictions on the training data are updated with the last tree only,
+    so that every round costs the same whatever the number of trees already trained
+
+    with loss="squared", the trees predict the residuals y - F.
+    with loss="logistic" (two classes), F are log-odds and the value of every leaf is the Newton step
+    sum(y - p)/sum(p(1 - p)) of its samples
+
+    Attributes
+    ----------
+    loss : str
+        "squared" for the regression, "logistic" for a binary classification
+    n_rounds : int
+        number of trees
+    learning_rate : float
+        multiplier of the predictions of every tree
+    params : dict
+        parameters of training.fit() given to every tree
+    n_jobs : int
+        number of processes searching the splits of every tree, see training.fit()
+    init : float
+        prediction of the model before the first tree (mean, or log-odds of the positive class)
+    nodes : TreeArrays
+        the nodes of all the trees, None before fit()
+    roots : np.ndarray[int]
+        index of the root of each tree in nodes
+    classes : np.ndarray
+        the two classes of a logistic model, None for the squared loss
+    train_loss : list[float]
+        the loss on the training data after every round
+    """
+
+    def __init__(self, loss:str="squared", n_rounds:int=100, learning_rate:float=0.1, max_depth:int=3,
+                 min_samples_leaf:int=1, max_bins:int=256, n_jobs:int=1):
+        if loss not in ("squared", "logistic"):
+            raise ValueError(f'unknown loss "{loss}" : can be only "squared" or "logistic"')
+        if n_rounds < 1:
+            raise ValueError(f"at least one round is needed, not {n_rounds}")
+        self.loss = loss
+        self.n_rounds = n_rounds
+        self.learning_rate = learning_rate
+        self.params = {"max_depth": max_depth, "min_samples_leaf": min_samples_leaf,
+                       "max_bins": max_bins}
+        self.n_jobs = n_jobs
+        self.init = 0.
+        self.nodes = None
+        self.roots = None
+        self.classes = None
+        self.train_loss = []
+
+    def __len__(self):
+        return 0 if self.roots is None else len(self.roots)
+
+    def _loss(self, target:np.ndarray, F:np.ndarray) -> float:
+        """
+        mean loss of the predictions F
+        """
+        if self.loss == "squared":
+            return float(np.mean((target - F)**2))
+        # log(1 + exp(F)) - y F, computed without overflow
+        return float(np.mean(np.logaddexp(0, F) - target*F))
+
+    def fit(self, X, y) -> "GradientBoosting":
+        """
+        trains the trees, one round after the other
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) training data
+        y : np.ndarray
+            (n_samples,) numerical targets, or the two classes of the samples for the logistic loss
+
+        Returns
+        -------
+        GradientBoosting
+            the model itself
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        if X.ndim != 2 or len(X) != len(y):
+            raise ValueError("X must be a (n_samples, n_features) array and y a (n_samples,) array")
+        if len(X) == 0:
+            raise ValueError("cannot train a model without samples")
+        if self.loss == "logistic":
+            self.classes, target = np.unique(y, return_inverse=True)
+            if len(self.classes) != 2:
+                raise ValueError("the logistic loss needs exactly two classes")
+            target = target.astype(np.float64)
+            p = np.clip(target.mean(), 1e-12, 1 - 1e-12)
+            self.init = float(np.log(p/(1 - p)))
+        else:
+            self.classes = None
+            target = y.astype(np.float64)
+            self.init = float(target.mean())
+
+        # the bins are the same for all the trees
+        bins = training.bin_features(X, self.params["max_bins"])
+        # and so are the processes : the binned features are shared once, only the statistics of the residuals
+        # being written again every round, see training.WorkerPool
+        pool = None
+        n_jobs = min(training.n_workers(self.n_jobs), X.shape[1])
+        if n_jobs > 1:
+            pool = training.WorkerPool({"codes": bins[0], "stats": Variance.sample_stats(target)}, n_jobs)
+        F = np.full(len(X), self.init)
+        parts = []
+        self.train_loss = []
+        try:
+            for _ in range(self.n_rounds):
+                p = sigmoid(F) if self.loss == "logistic" else F
+                residuals = target - p
+                # only the arrays are kept : the nodes are not added to the registry of the caller
+                with TreeModel():
+                    T = training.fit(X, residuals, criterion="variance", splitter="hist", bins=bins,
+                                     pool=pool, **self.params)
+                A = TreeArrays.from_tree(T, positions=False)
+                leaf = A.apply(X)
+                if self.loss == "logistic":
+                    # Newton step in every leaf, from the sums of the gradients and of the hessians
+                    gradient = np.bincount(leaf, residuals, minlength=len(A))
+                    hessian = np.bincount(leaf, p*(1 - p), minlength=len(A))
+                    leaves = np.unique(leaf)
+                    A.value[leaves] = gradient[leaves]/np.maximum(hessian[leaves], 1e-12)
+                # only the new tree is evaluated on the training data
+                F += self.learning_rate*A.value[leaf]
+                parts.append(A)
+                self.train_loss.append(self._loss(target, F))
+        finally:
+            if pool is not None:
+                pool.close()
+        self.nodes, self.roots = TreeArrays.concatenate(parts)
+        # positions of the nodes, for the views of tree()
+        self.nodes.update_params()
+        return self
+
+    def tree(self, i:int) -> Tree:
+        """
+        view of the root of the tree of a round, usable like the Tree objects of the scenes
+
+        Parameters
+        ----------
+        i : int
+            index of the round
+
+        Returns
+        -------
+        Tree
+            the root of the tree
+        """
+        return self.nodes.node(int(self.roots[i]))
+
+    def decision_function(self, X) -> np.ndarray:
+        """
+        raw prediction of the model : the prediction before the first tree plus the scaled
+        predictions of all the trees, log-odds for the logistic loss
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        np.ndarray
+            (n_samples,) the raw predictions
+        """
+        if self.nodes is None:
+            raise ValueError("the model is not trained, call fit() first")
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        F = np.full(len(X), self.init)
+        batch = max(1, PREDICT_BATCH // len(self.roots))
+        for start in range(0, len(X), batch):
+            values = self.nodes.predict(X[start:start + batch], self.roots)
+            F[start:start + batch] += self.learning_rate*values.sum(axis=0)
+        return F
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        probabilities of the two classes, for the logistic loss
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        np.ndarray
+            (n_samples, 2) the probabilities, in the order of classes
+        """
+        if self.classes is None:
+            raise ValueError("a model with the squared loss has no class probabilities")
+        p = sigmoid(self.decision_function(X))
+        return np.stack([1 - p, p], axis=1)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        predicted target, or most probable class for the logistic loss
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        np.ndarray
+            (n_samples,) the value predicted for every row
+        """
+        F = self.decision_function(X)
+        if self.classes is None:
+            return F
+        return self.classes[(F > 0).astype(np.intp)]
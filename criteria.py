@@ -0,0 +1,220 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class Criterion(ABC):
+    """
+    abstract impurity criterion. A criterion works on the sums of the statistics of the samples
+    of a node (the class counts for the classification), given as arrays of any shape
+    (..., n_stats) : the cumulative sums over the sorted samples of a feature give the left child
+    of every threshold at once, and the whole feature is scored in one call of split_score().
+    a criterion is plugged in the trainer with fit(..., criterion=...), by name or as an instance
+
+    Attributes
+    ----------
+    regression : bool
+        whether the criterion is for a numerical target, with the statistics of Variance.sample_stats(),
+        or for classes, with their one-hot encoding
+    """
+    regression = False
+
+    @abstractmethod
+    def impurity(self, stats:np.ndarray) -> np.ndarray:
+        """
+        impurity of nodes from the sums of their statistics
+
+        Parameters
+        ----------
+        stats : np.ndarray
+            (..., n_stats) sums of the statistics of the samples of each node
+
+        Returns
+        -------
+        np.ndarray
+            (...) the impurity of each node, 0 for the empty nodes
+        """
+        ...
+
+    def n_samples(self, stats:np.ndarray) -> np.ndarray:
+        """
+        number of samples of nodes from the sums of their statistics, the sum of the class counts
+
+        Parameters
+        ----------
+        stats : np.ndarray
+            (..., n_stats) sums of the statistics of the samples of each node
+
+        Returns
+        -------
+        np.ndarray
+            (...) the number of samples of each node
+        """
+        return stats.sum(axis=-1)
+
+    def split_score(self, left:np.ndarray, right:np.ndarray) -> np.ndarray:
+        """
+        impurity of the children of candidate splits, weighted by their number of samples
+
+        Parameters
+        ----------
+        left : np.ndarray
+            (..., n_stats) sums of the statistics of the left child of each split
+        right : np.ndarray
+            (..., n_stats) sums of the statistics of the right child of each split
+
+        Returns
+        -------
+        np.ndarray
+            (...) the weighted impurity of each split, the lower the better
+        """
+        n_left = self.n_samples(left)
+        n_right = self.n_samples(right)
+        n = n_left + n_right
+        weighted = n_left*self.impurity(left) + n_right*self.impurity(right)
+        return np.divide(weighted, n, out=np.zeros(weighted.shape), where=n > 0)
+
+
+class Gini(Criterion):
+    """
+    Gini index 1 - sum(p_i²) of the class proportions, as in scene16 and compound.py
+    """
+
+    def impurity(self, stats:np.ndarray) -> np.ndarray:
+        p = proportions(stats)
+        # the proportions of an empty node are all 0, its impurity too
+        return np.where(p.any(axis=-1), 1 - (p**2).sum(axis=-1), 0.)
+
+
+class Entropy(Criterion):
+    """
+    statistical entropy - sum(p_i log2(p_i)) of the class proportions, as in compound.py
+    """
+
+    def impurity(self, stats:np.ndarray) -> np.ndarray:
+        p = proportions(stats)
+        logp = np.log2(p, out=np.zeros(p.shape), where=p > 0)
+        return -(p*logp).sum(axis=-1)
+
+
+class Misclassification(Criterion):
+    """
+    misclassification rate 1 - max(p_i) : the part of the samples that the majority class of the node gets wrong
+    """
+
+    def impurity(self, stats:np.ndarray) -> np.ndarray:
+        p = proportions(stats)
+        return np.where(p.any(axis=-1), 1 - p.max(axis=-1, initial=0), 0.)
+
+
+class Variance(Criterion):
+    """
+    variance of a numerical target, for the regression. The statistics of a sample are
+    (1, y, y²), see sample_stats(), so that the sums of a node are (n, sum(y), sum(y²))
+    and its variance is sum(y²)/n - (sum(y)/n)²
+    """
+    regression = True
+
+    @staticmethod
+    def sample_stats(y:np.ndarray) -> np.ndarray:
+        """
+        statistics (1, y, y²) of each sample
+
+        Parameters
+        ----------
+        y : np.ndarray
+            (n_samples,) target of each sample
+
+        Returns
+        -------
+        np.ndarray
+            (n_samples, 3) statistics of each sample
+        """
+        y = np.asarray(y, dtype=np.float64)
+        return np.stack([np.ones_like(y), y, y**2], axis=-1)
+
+    def n_samples(self, stats:np.ndarray) -> np.ndarray:
+        return stats[..., 0]
+
+    def impurity(self, stats:np.ndarray) -> np.ndarray:
+        n = stats[..., 0]
+        mean = np.divide(stats[..., 1], n, out=np.zeros(n.shape), where=n > 0)
+        mean_sq = np.divide(stats[..., 2], n, out=np.zeros(n.shape), where=n > 0)
+        var = mean_sq - mean**2
+        # the rounding errors of the sums give tiny (even negative) variances to the constant nodes
+        return np.where(var > 1e-12*mean_sq, var, 0.)
+
+#   _____                _              _
+#  / ____|              | |            | |
+# | |     ___  _ __  ___| |_ __ _ _ __ | |_ ___
+# | |    / _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | |___| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \_____\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+
+# the criteria that can be given by name to the trainer
+CRITERIA = {
+    "gini": Gini(),
+    "entropy": Entropy(),
+    "misclassification": Misclassification(),
+    "variance": Variance(),
+}
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def proportions(counts:np.ndarray) -> np.ndarray:
+    """
+    proportion of each class in nodes, 0 in the empty nodes
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        (..., n_classes) number of samples of each class in each node
+
+    Returns
+    -------
+    np.ndarray
+        (..., n_classes) the class proportions
+    """
+    n = counts.sum(axis=-1, keepdims=True)
+    return np.divide(counts, n, out=np.zeros(counts.shape), where=n > 0)
+
+def get_criterion(criterion) -> Criterion:
+    """
+    the criterion of the given name, or the criterion itself
+
+    Parameters
+    ----------
+    criterion : str | Criterion
+        a name of CRITERIA or a Criterion instance
+
+    Returns
+    -------
+    Criterion
+        the criterion
+    """
+    if isinstance(criterion, Criterion):
+        return criterion
+    if criterion in CRITERIA:
+        return CRITERIA[criterion]
+    names = ", ".join(f'"{name}"' for name in CRITERIA)
+    raise ValueError(f'unknown criterion "{criterion}" : can be only {names} or a Criterion')
@@ -0,0 +1,151 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+import numpy as np
+
+from tree import Tree
+from tree_arrays import TREE_LEAF, route
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class DecisionDAG:
+    """
+    decision diagram equivalent to a tree : the identical subtrees are stored once, and the splits whose two
+    children are identical are removed, every data reaching them getting the same prediction anyway.
+    in the tree of the intro, whose leaves all predict None, every split is redundant and the whole tree
+    becomes a single leaf. Once its leaves have values, its two Tree_filled(Tree_empty(), Tree_empty(), 0, "x")
+    T0 and T1 share a single node when their leaves predict the same.
+    two subtrees are identical when they route the data the same way to the same values : the labels,
+    positions and training statistics are not kept.
+
+    the reduction is made bottom-up in one pass, each node being looked up by its feature, threshold and
+    (already reduced) children in a table of the nodes met so far. The children of a node are always
+    stored before it, and the data is routed by the same function as in TreeArrays.apply(), one level at a time
+
+    Attributes
+    ----------
+    left : np.ndarray[int]
+        left child of each node (x[feature] < threshold), TREE_LEAF for the leaves
+    right : np.ndarray[int]
+        right child of each node, TREE_LEAF for the leaves
+    feature : np.ndarray[int]
+        feature used by each node, TREE_LEAF for the leaves
+    threshold : np.ndarray[float64]
+        threshold of each node
+    value : np.ndarray
+        value predicted by each leaf
+    root : int
+        index of the root, the last node
+    index : np.ndarray[int]
+        node of the diagram of every node of the arrays of the tree
+    n_tree_nodes : int
+        number of nodes of the tree
+    """
+
+    def __init__(self, T):
+        """
+        Parameters
+        ----------
+        T : Tree | TreeArrays
+            the tree to reduce
+        """
+        A = T.compile() if isinstance(T, Tree) else T
+        root = A.root.id
+        order = []
+        stack = [root]
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            if A.left[i] != TREE_LEAF:
+                stack.append(int(A.left[i]))
+                stack.append(int(A.right[i]))
+        self.n_tree_nodes = len(order)
+
+        table = {} # node of the diagram of each (feature, threshold, left, right) or leaf value
+        nodes = [] # (feature, threshold, left, right, node of the tree) of each node of the diagram
+        self.index = np.full(len(A), TREE_LEAF, dtype=np.intp)
+        # the reversed (node, right, left) preorder visits the children first
+        for i in reversed(order):
+            if A.left[i] == TREE_LEAF:
+                value = A.value[i]
+                value = value.item() if hasattr(value, "item") else value
+                # every unknown value (None or NaN) is the same
+                key = ("leaf", None if value is None or value != value else value)
+                node = (TREE_LEAF, 0., TREE_LEAF, TREE_LEAF, i)
+            else:
+                l, r = self.index[A.left[i]], self.index[A.right[i]]
+                if l == r:
+                    # redundant split : both sides give the same predictions
+                    self.index[i] = l
+                    continue
+                key = (int(A.feature[i]), float(A.threshold[i]), int(l), int(r))
+                node = (*key, i)
+            if key not in table:
+                table[key] = len(nodes)
+                nodes.append(node)
+            self.index[i] = table[key]
+
+        feature, threshold, left, right, source = zip(*nodes)
+        self.feature = np.array(feature, dtype=np.int64)
+        self.threshold = np.array(threshold, dtype=np.float64)
+        self.left = np.array(left, dtype=np.intp)
+        self.right = np.array(right, dtype=np.intp)
+        self.value = A.value[list(source)].copy()
+        self.root = int(self.index[root])
+
+    def __len__(self):
+        return len(self.left)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        memory used by the arrays needed to route the data
+        """
+        return sum(a.nbytes for a in (self.left, self.right, self.feature, self.threshold, self.value))
+
+    def apply(self, X) -> np.ndarray:
+        """
+        finds the leaf of the diagram reached by every row of X, the rows going left when X[:, feature] < threshold
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        np.ndarray[int]
+            (n_samples,) index of the leaf reached by every row
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        node = np.full(len(X), self.root, dtype=np.intp)
+        return route(X, self.left, self.right, self.feature, self.threshold, node)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        value of the leaf reached by every row of X, the same as the one of the tree
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        np.ndarray
+            (n_samples,) the predicted values
+        """
+        return self.value[self.apply(X)]
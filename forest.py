@@ -0,0 +1,281 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import training
+from criteria import get_criterion
+from tree import Tree, TreeModel
+from tree_arrays import TreeArrays
+from tree_shap import shap_values
+
+#   _____                _              _
+#  / ____|              | |            | |
+# | |     ___  _ __  ___| |_ __ _ _ __ | |_ ___
+# | |    / _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | |___| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \_____\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+
+# number of (tree, row) pairs routed at once by predict() : small batches stay in the CPU caches
+PREDICT_BATCH = 1 << 16
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def fit_tree(X:np.ndarray, y:np.ndarray, seed:int, bootstrap:bool, params:dict) -> TreeArrays:
+    """
+    trains one tree of a forest on a bootstrap sample of the data
+
+    Parameters
+    ----------
+    X : np.ndarray
+        (n_samples, n_features) training data
+    y : np.ndarray
+        (n_samples,) targets
+    seed : int
+        seed of the bootstrap sample and of the features drawn by the nodes
+    bootstrap : bool
+        whether or not to draw the samples with replacement, all the samples being used otherwise
+    params : dict
+        the other parameters of training.fit()
+
+    Returns
+    -------
+    TreeArrays
+        the arrays of the tree, without positions
+    """
+    rng = np.random.default_rng(seed)
+    if bootstrap:
+        sample = rng.integers(0, len(X), len(X))
+        X, y = X[sample], y[sample]
+    # only the arrays are kept : the nodes are not added to the registry of the caller
+    with TreeModel():
+        T = training.fit(X, y, random_state=rng, **params)
+    return TreeArrays.from_tree(T, positions=False)
+
+def _fit_tree_task(seed:int, bootstrap:bool, params:dict) -> TreeArrays:
+    """
+    fit_tree() in a worker, on the data shared by Forest.fit(), see training.share()
+    """
+    return fit_tree(training._shared["X"], training._shared["y"], seed, bootstrap, params)
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class Forest:
+    """
+    random forest : trees trained on bootstrap samples of the data, every node trying a random
+    subset of the features. The trees are trained in a pool of processes, the data being put
+    in shared memory once, and are then stored one after the other in the same TreeArrays
+    (see TreeArrays.concatenate()), so that predict() routes all the (tree, row) pairs at once.
+    The classification forests vote, the regression forests average their trees
+
+    Attributes
+    ----------
+    n_trees : int
+        number of trees
+    params : dict
+        parameters of training.fit() given to every tree
+    bootstrap : bool
+        whether or not every tree is trained on a bootstrap sample
+    n_jobs : int
+        number of processes training the trees, -1 for one per CPU
+    random_state : int
+        seed of the forest
+    nodes : TreeArrays
+        the nodes of all the trees, None before fit()
+    roots : np.ndarray[int]
+        index of the root of each tree in nodes
+    classes : np.ndarray
+        the classes of a classification forest, None for a regression forest
+    """
+
+    def __init__(self, n_trees:int=100, max_depth:int=None, min_samples_leaf:int=1, criterion="gini",
+                 max_features="sqrt", splitter:str="best", max_bins:int=256, bootstrap:bool=True,
+                 n_jobs:int=1, random_state:int=None):
+        self.n_trees = n_trees
+        self.params = {"max_depth": max_depth, "min_samples_leaf": min_samples_leaf,
+                       "criterion": criterion, "max_features": max_features,
+                       "splitter": splitter, "max_bins": max_bins}
+        self.bootstrap = bootstrap
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.nodes = None
+        self.roots = None
+        self.classes = None
+        # class index of every node of a classification forest, for the votes
+        self._node_class = None
+
+    def __len__(self):
+        return self.n_trees
+
+    def fit(self, X, y) -> "Forest":
+        """
+        trains the trees of the forest
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) training data
+        y : np.ndarray
+            (n_samples,) classes of the samples, or numerical targets for the regression
+
+        Returns
+        -------
+        Forest
+            the forest itself
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        if X.ndim != 2 or len(X) != len(y):
+            raise ValueError("X must be a (n_samples, n_features) array and y a (n_samples,) array")
+        if get_criterion(self.params["criterion"]).regression:
+            self.classes = None
+            targets = y.astype(np.float64)
+        else:
+            # the trees are trained on the class indices, the same for all the trees
+            self.classes, targets = np.unique(y, return_inverse=True)
+        seeds = np.random.default_rng(self.random_state).integers(2**63, size=self.n_trees)
+
+        n_jobs = min(training.n_workers(self.n_jobs), self.n_trees)
+        if n_jobs > 1:
+            blocks, spec = training.share({"X": X, "y": targets})
+            try:
+                with ProcessPoolExecutor(n_jobs, initializer=training._attach, initargs=(spec,)) as pool:
+                    parts = list(pool.map(_fit_tree_task, seeds, [self.bootstrap]*self.n_trees,
+                                          [self.params]*self.n_trees))
+            finally:
+                training.release(blocks)
+        else:
+            parts = [fit_tree(X, targets, seed, self.bootstrap, self.params) for seed in seeds]
+
+        self.nodes, self.roots = TreeArrays.concatenate(parts)
+        # positions of the nodes, for the views of tree()
+        self.nodes.update_params()
+        if self.classes is not None:
+            n = len(self.nodes)
+            self._node_class = self.nodes.value[:n].astype(np.intp)
+            self.nodes.value = self.classes[self._node_class]
+        return self
+
+    def tree(self, i:int) -> Tree:
+        """
+        view of the root of a tree of the forest, usable like the Tree objects of the scenes
+
+        Parameters
+        ----------
+        i : int
+            index of the tree
+
+        Returns
+        -------
+        Tree
+            the root of the tree
+        """
+        return self.nodes.node(int(self.roots[i]))
+
+    def apply(self, X) -> np.ndarray:
+        """
+        leaf reached by every row in every tree
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        np.ndarray[int]
+            (n_trees, n_samples) index in nodes of the leaves reached
+        """
+        if self.nodes is None:
+            raise ValueError("the forest is not trained, call fit() first")
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        batch = max(1, PREDICT_BATCH // len(self.roots))
+        leaves = np.empty((len(self.roots), len(X)), dtype=np.intp)
+        for start in range(0, len(X), batch):
+            leaves[:, start:start + batch] = self.nodes.apply(X[start:start + batch], self.roots)
+        return leaves
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        proportion of the trees voting for each class, for a classification forest
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        np.ndarray
+            (n_samples, n_classes) the votes, in the order of classes
+        """
+        if self.classes is None:
+            raise ValueError("a regression forest has no class probabilities")
+        votes = self._node_class[self.apply(X)]
+        n_samples, n_classes = votes.shape[1], len(self.classes)
+        # one bincount for all the rows, the key of a vote being row*n_classes + class
+        keys = (votes + np.arange(n_samples)*n_classes).ravel()
+        counts = np.bincount(keys, minlength=n_samples*n_classes)
+        return counts.reshape(n_samples, n_classes)/len(self.roots)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        majority vote of the trees, or mean of their predictions for a regression forest
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        np.ndarray
+            (n_samples,) the value predicted for every row
+        """
+        if self.classes is None:
+            return self.nodes.value[self.apply(X)].mean(axis=0)
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def shap_values(self, X) -> tuple[np.ndarray, np.ndarray]:
+        """
+        exact SHAP values of the predictions of the forest, the trees being explained in parallel,
+        see tree_shap.shap_values()
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) the rows to explain
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            the (n_samples, n_features) SHAP values of the regression, or (n_samples, n_features, n_classes)
+            for the votes of each class (see predict_proba()), and the expected value(s)
+        """
+        if self.nodes is None:
+            raise ValueError("the forest is not trained, call fit() first")
+        values = None
+        if self.classes is not None:
+            # the vote of a leaf for each class
+            values = np.eye(len(self.classes))[self._node_class]
+        return shap_values(self.nodes, X, values, self.roots, self.n_jobs)
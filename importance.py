@@ -0,0 +1,168 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import training
+from tree import Tree
+from tree_arrays import TREE_LEAF, is_regression
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def impurity_importances(T, n_features:int=None, root=None) -> np.ndarray:
+    """
+    impurity-based importance of every feature : the decrease of the impurity weighted by the samples
+    (n*impurity of a node minus the same for its two children) summed over the nodes splitting on it,
+    and normalized to sum to 1. The trees trained by training.fit() already have them in the
+    feature_importances of their root, this function is for the other trees and the forests
+
+    Parameters
+    ----------
+    T : Tree | TreeArrays
+        the tree(s), their nodes having their n_samples and impurity (see training.fit())
+    n_features : int
+        (default None, optional) number of features, the n_features of the arrays when None (see training.fit())
+    root : int | np.ndarray[int]
+        (default None, optional) index of the root of the tree, or of the roots of the trees whose
+        importances are averaged (see Forest.roots)
+
+    Returns
+    -------
+    np.ndarray[float64]
+        (n_features,) the importances
+    """
+    A = T.compile() if isinstance(T, Tree) else T
+    n = len(A)
+    roots = np.atleast_1d(np.asarray(A.root.id if root is None else root, dtype=np.intp))
+    inner = np.flatnonzero(A.left[:n] != TREE_LEAF)
+    if np.any(np.isnan(A.impurity[inner])):
+        raise ValueError("the nodes need their n_samples and impurity to compute the importances")
+    if n_features is None:
+        n_features = A.n_features
+    if n_features is None:
+        # the features never used by the trees would be missing
+        raise ValueError("the number of features of the trees is unknown, give it in n_features")
+    weighted = A.n_samples[:n]*A.impurity[:n]
+    decrease = weighted[inner] - weighted[A.left[inner]] - weighted[A.right[inner]]
+    # tree of every node : the roots are visited top-down, the children taking the tree of their parent
+    tree = np.full(n, -1, dtype=np.intp)
+    tree[roots] = np.arange(len(roots))
+    level = roots
+    while len(level):
+        level = level[A.left[level] != TREE_LEAF]
+        children = np.concatenate([A.left[level], A.right[level]])
+        tree[children] = np.concatenate([tree[level], tree[level]])
+        level = children
+    reached = tree[inner] >= 0
+    keys = tree[inner][reached]*n_features + A.feature[inner][reached]
+    per_tree = np.bincount(keys, weights=decrease[reached], minlength=len(roots)*n_features)
+    per_tree = per_tree.reshape(len(roots), n_features)
+    totals = per_tree.sum(axis=1, keepdims=True)
+    per_tree = np.divide(per_tree, totals, out=np.zeros_like(per_tree), where=totals > 0)
+    return per_tree.mean(axis=0)
+
+def _loss(predicted:np.ndarray, y:np.ndarray, regression:bool) -> float:
+    """
+    error of predictions : the mean squared error of a regression, the error rate of classes
+    """
+    if regression:
+        return float(np.mean((predicted - y)**2))
+    return float(np.mean(predicted != y))
+
+def _attach_model(spec:dict, model, y:np.ndarray, regression:bool):
+    """
+    initializer of the workers of permutation_importance() : the shared data, the model and the targets
+    (sent once per worker, the classes may be objects that shared memory cannot hold)
+    """
+    training._attach(spec)
+    training._shared["model"] = model
+    training._shared["y"] = y
+    training._shared["regression"] = regression
+
+def _permutation_task(feature:int, seeds:np.ndarray) -> np.ndarray:
+    """
+    losses of the model for some shuffles of one column, in a worker
+    """
+    s = training._shared
+    return _permuted_losses(s["model"], s["X"], s["y"], s["regression"], feature, seeds)
+
+def _permuted_losses(model, X:np.ndarray, y:np.ndarray, regression:bool, feature:int,
+                     seeds:np.ndarray) -> np.ndarray:
+    """
+    losses of the model when the column of the feature is shuffled, once per seed,
+    every shuffle being predicted in one batch
+    """
+    X = X.copy()
+    losses = []
+    for seed in seeds:
+        X[:, feature] = np.random.default_rng(seed).permutation(X[:, feature])
+        losses.append(_loss(np.asarray(model.predict(X)), y, regression))
+    return np.array(losses)
+
+def permutation_importance(model, X, y, n_repeats:int=5, n_jobs:int=1,
+                           random_state=None, regression:bool=None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    permutation importance of every feature : how much the error of the model grows when the values
+    of the feature are shuffled between the rows, cutting its link with the targets.
+    the error is the mean squared error of a regression, the error rate of classes (see tree_arrays.is_regression()).
+    the features are shuffled and predicted in a pool of processes, the data being put in shared memory once
+
+    Parameters
+    ----------
+    model : Tree | TreeArrays | Forest | GradientBoosting
+        anything with a predict(X) method, a Tree being compiled first
+    X : np.ndarray
+        (n_samples, n_features) data, held out from the training preferably
+    y : np.ndarray
+        (n_samples,) expected values
+    n_repeats : int
+        (default 5, optional) number of shuffles of every feature
+    n_jobs : int
+        (default 1, optional) number of processes, -1 for one per CPU
+    random_state : int
+        (default None, optional) seed of the shuffles
+    regression : bool
+        (default None, optional) whether the model is a regression, taken from its training when None
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        the (n_features,) mean and standard deviation over the shuffles of the growth of the error
+    """
+    if isinstance(model, Tree):
+        # the arrays can be sent to the workers, unlike the nodes and their registry
+        model = model.compile()
+    regression = is_regression(model, regression)
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    if X.ndim != 2 or len(X) != len(y):
+        raise ValueError("X must be a (n_samples, n_features) array and y a (n_samples,) array")
+    baseline = _loss(np.asarray(model.predict(X)), y, regression)
+    n_features = X.shape[1]
+    seeds = np.random.default_rng(random_state).integers(2**63, size=(n_features, n_repeats))
+
+    n_jobs = min(training.n_workers(n_jobs), n_features)
+    if n_jobs > 1:
+        blocks, spec = training.share({"X": X})
+        try:
+            with ProcessPoolExecutor(n_jobs, initializer=_attach_model, initargs=(spec, model, y, regression)) as pool:
+                losses = list(pool.map(_permutation_task, range(n_features), seeds))
+        finally:
+            training.release(blocks)
+    else:
+        losses = [_permuted_losses(model, X, y, regression, f, seeds[f]) for f in range(n_features)]
+    growth = np.array(losses) - baseline
+    return growth.mean(axis=1), growth.std(axis=1)
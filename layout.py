@@ -0,0 +1,220 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+from abc import ABC, abstractmethod
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class Layout(ABC):
+    """
+    abstract layout engine, computing the positions of the nodes of a tree.
+    a layout is plugged in a tree with Tree_filled(..., layout=...) or TreeArrays.layout,
+    the trees without layout keep the classic incremental update_params
+
+    Attributes
+    ----------
+    level_height : float
+        vertical distance between two levels of the tree
+    """
+    level_height = 0.5
+
+    @abstractmethod
+    def positions(self, left:list, right:list, root:int, xy_ratio:float) -> tuple[list, list]:
+        """
+        computes the horizontal positions and the depths of the nodes
+
+        Parameters
+        ----------
+        left : list[int]
+            index of the left child of each node, negative for the leaves
+        right : list[int]
+            index of the right child of each node, negative for the leaves
+        root : int
+            index of the root
+        xy_ratio : float
+            ratio that will widen the distance between two children of the same node if bigger
+
+        Returns
+        -------
+        tuple[list[float], list[int]]
+            the x position of every node relatively to the root, and the depth of every node
+        """
+        ...
+
+    def apply(self, T, depth:int=0, root=None):
+        """
+        lays out a tree made of Tree_filled and Tree_empty nodes.
+        used by Tree_filled.update_params when the tree has a layout
+
+        Parameters
+        ----------
+        T : Tree
+            the node at the top of the part of the tree to lay out, it keeps its position
+        depth : int
+            (default 0, optional) depth of T
+        root : Tree
+            (default None, optional) root of the tree, T itself when None
+        """
+        if root is None:
+            root = T
+        if depth == 0:
+            T.model.ROOT = T
+        # indexing the nodes in preorder
+        nodes, left, right = [], [], []
+        stack = [(T, -1, 0)]
+        while stack:
+            node, parent, side = stack.pop()
+            i = len(nodes)
+            nodes.append(node)
+            left.append(-1)
+            right.append(-1)
+            if parent >= 0:
+                (left if side < 0 else right)[parent] = i
+            if not node.isempty():
+                stack.append((node.r, i, 1))
+                stack.append((node.l, i, -1))
+
+        x, depths = self.positions(left, right, 0, T.xy_ratio)
+        x0, y0 = T._pos
+        for node, dx, d in zip(nodes, x, depths):
+            # written in the __dict__ like update_params does, the dirty flags being cleared here
+            state = node.__dict__
+            state["_pos"] = (x0 + dx, y0 - self.level_height*d)
+            state["_depth"] = depth + d
+            state["_root"] = root
+            state["_dirty"] = False
+            # transitive relation of the scaling factors
+            state["xy_ratio"] = T.xy_ratio
+            state["scale"] = T.scale
+            state["layout"] = self
+
+
+class ClassicLayout(Layout):
+    """
+    the historical layout of update_params : the children of a node at depth d are
+    xy_ratio/(1+d) away from it. Compact, but subtrees overlap on deep trees
+    """
+
+    def positions(self, left:list, right:list, root:int, xy_ratio:float) -> tuple[list, list]:
+        n = len(left)
+        x = [0.0]*n
+        depths = [0]*n
+        stack = [root]
+        while stack:
+            v = stack.pop()
+            if left[v] < 0:
+                continue
+            d = depths[v]
+            for child, side in ((left[v], -1), (right[v], 1)):
+                x[child] = x[v] + side*xy_ratio/(1 + d)
+                depths[child] = d + 1
+                stack.append(child)
+        return x, depths
+
+
+class TidyLayout(Layout):
+    """
+    tidy layout of Reingold and Tilford, in the linear time version of Walker's algorithm
+    given by Buchheim, Jünger and Leipert. Every node is centered above its two children,
+    the subtrees never overlap and are pushed as close to each other as they can be.
+    as every parent node has exactly two children, the shifts of Walker's algorithm
+    only ever move the right child, and the "ancestor"/"change" bookkeeping disappears.
+
+    Attributes
+    ----------
+    sibling_distance : float
+        minimal horizontal distance between two nodes of the same level, multiplied by the tree's xy_ratio
+    level_height : float
+        vertical distance between two levels of the tree
+    """
+
+    def __init__(self, sibling_distance:float=1., level_height:float=0.5):
+        self.sibling_distance = sibling_distance
+        self.level_height = level_height
+
+    def positions(self, left:list, right:list, root:int, xy_ratio:float) -> tuple[list, list]:
+        n = len(left)
+        distance = self.sibling_distance * xy_ratio
+        prelim = [0.0]*n
+        mod = [0.0]*n
+        thread = [-1]*n
+        depths = [0]*n
+
+        # contour followers : the thread if there is one, else the outer child
+        def next_left(v):
+            return thread[v] if thread[v] >= 0 else left[v]
+
+        def next_right(v):
+            return thread[v] if thread[v] >= 0 else right[v]
+
+        # preorder with the depths and the left siblings of the right children,
+        # reversed it gives every node after its children and after its left sibling
+        sibling = [-1]*n
+        order = []
+        stack = [root]
+        while stack:
+            v = stack.pop()
+            order.append(v)
+            if left[v] >= 0:
+                depths[left[v]] = depths[right[v]] = depths[v] + 1
+                sibling[right[v]] = left[v]
+                stack.append(left[v])
+                stack.append(right[v])
+
+        # first walk, bottom-up : preliminary positions relatively to the parent
+        for v in reversed(order):
+            midpoint = 0.
+            if left[v] >= 0:
+                l, r = left[v], right[v]
+                # apportion : following the facing contours of the two subtrees to push the right one away
+                vil, vir, vol, vor = l, r, l, r
+                sil, sir, sol, sor = mod[l], mod[r], mod[l], mod[r]
+                while next_right(vil) >= 0 and next_left(vir) >= 0:
+                    vil, vir = next_right(vil), next_left(vir)
+                    vol, vor = next_left(vol), next_right(vor)
+                    shift = (prelim[vil] + sil) - (prelim[vir] + sir) + distance
+                    if shift > 0:
+                        prelim[r] += shift
+                        mod[r] += shift
+                        sir += shift
+                        sor += shift
+                    sil += mod[vil]
+                    sir += mod[vir]
+                    sol += mod[vol]
+                    sor += mod[vor]
+                # threading the shorter subtree's contour to the deeper one
+                if next_right(vil) >= 0 and next_right(vor) < 0:
+                    thread[vor] = next_right(vil)
+                    mod[vor] += sil - sor
+                elif next_left(vir) >= 0 and next_left(vol) < 0:
+                    thread[vol] = next_left(vir)
+                    mod[vol] += sir - sol
+                midpoint = (prelim[l] + prelim[r])/2
+
+            if sibling[v] >= 0:
+                # a right child starts next to its sibling, its subtree being moved by mod
+                prelim[v] = prelim[sibling[v]] + distance
+                mod[v] = prelim[v] - midpoint
+            else:
+                prelim[v] = midpoint
+
+        # second walk, top-down : accumulating the modifiers of the ancestors
+        x = [0.0]*n
+        acc = [0.0]*n
+        for v in order:
+            x[v] = prelim[v] + acc[v]
+            if left[v] >= 0:
+                acc[left[v]] = acc[right[v]] = acc[v] + mod[v]
+        x0 = x[root]
+        return [xi - x0 for xi in x], depths
@@ -0,0 +1,263 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+from tree import Tree, Tree_filled, Tree_empty, default_label
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def freeze(T:Tree) -> "FrozenTree":
+    """
+    immutable version of a tree made of Tree_filled and Tree_empty objects
+
+    Parameters
+    ----------
+    T : Tree
+        root of the tree (or subtree) to freeze
+
+    Returns
+    -------
+    FrozenTree
+        the root of the frozen tree
+    """
+    # (node, right, left) preorder, reversed : every node is frozen after its children
+    order = []
+    stack = [T]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if not node.isempty():
+            stack.append(node.l)
+            stack.append(node.r)
+    frozen = {}
+    for node in reversed(order):
+        if node.isempty():
+            f = FrozenTree(label=node.label or None, value=node.value,
+                           n_samples=node.n_samples, impurity=node.impurity)
+        else:
+            # only the custom labels are kept, the default one following the changes of s and div
+            label = node.label if node.label != default_label(node.div, node.s) else None
+            f = FrozenTree(frozen[id(node.l)], frozen[id(node.r)], node.s, node.div, label=label,
+                           value=node.value, n_samples=node.n_samples, impurity=node.impurity)
+        frozen[id(node)] = f
+    return frozen[id(T)]
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class FrozenTree:
+    """
+    persistent (immutable) tree node. A modified version of a tree is a new root : only the nodes
+    on the path from the root to the modified node are copied, all the other subtrees being shared
+    between the versions, so that a variant costs O(depth) in time and memory instead of the
+    O(n) of Tdeepcopy. The frozen trees are not drawn : thaw() gives the Tree_filled/Tree_empty
+    version of the one to display
+
+    the paths to the nodes are strings of "l" and "r" read from the root, "" being the root itself
+
+    Attributes
+    ----------
+    l : FrozenTree
+        left child, None for a leaf
+    r : FrozenTree
+        right child, None for a leaf
+    s : float
+        node's value for the bifurcation rule
+    div : str | int
+        ("x" or "y") axis where the division occurs, or index of the feature
+    label : str
+        label of the node, the default "div<sep" label when None
+    value : object
+        value predicted by the node
+    n_samples : int
+        number of training samples of the node
+    impurity : float
+        impurity of the training samples of the node
+    """
+    __slots__ = ("l", "r", "s", "div", "label", "value", "n_samples", "impurity", "_size")
+
+    def __init__(self, l:"FrozenTree"=None, r:"FrozenTree"=None, s:float=None, div="", label:str=None,
+                 value=None, n_samples:int=0, impurity:float=None):
+        if (l is None) != (r is None):
+            raise ValueError("a node has either two children or none")
+        for name, attribute in (("l", l), ("r", r), ("s", s), ("div", div), ("label", label),
+                                ("value", value), ("n_samples", n_samples), ("impurity", impurity)):
+            object.__setattr__(self, name, attribute)
+        # the size of the children is known : they cannot change anymore
+        object.__setattr__(self, "_size", 1 if l is None else 1 + l._size + r._size)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("a FrozenTree cannot be modified, use set() to make a new version")
+
+    def __len__(self):
+        return self._size
+
+    def __str__(self):
+        if self.isempty():
+            return f"FrozenLeaf : value={self.value}"
+        return f"FrozenNode : div={self.div}, s={self.s}, size={self._size}"
+
+    def isempty(self) -> bool:
+        return self.l is None
+
+    def _fields(self) -> dict:
+        return {name: getattr(self, name) for name in FrozenTree.__slots__[:-1]}
+
+    def get(self, path:str) -> "FrozenTree":
+        """
+        node at the end of a path
+
+        Parameters
+        ----------
+        path : str
+            "l" and "r" moves from this node
+
+        Returns
+        -------
+        FrozenTree
+            the node
+        """
+        node = self
+        for side in path:
+            if side not in "lr":
+                raise ValueError(f'a path is made of "l" and "r", not "{side}"')
+            if node.isempty():
+                raise ValueError(f'the path "{path}" goes below a leaf')
+            node = node.l if side == "l" else node.r
+        return node
+
+    def set(self, path:str="", **changes) -> "FrozenTree":
+        """
+        new version of the tree where the node at the end of path has some attributes changed.
+        the nodes of the path are copied, everything else is shared with this version
+
+        Parameters
+        ----------
+        path : str
+            (default "", optional) "l" and "r" moves from this node to the node to change
+        **changes
+            the new attributes of the node (l, r, s, div, label, value, n_samples, impurity)
+
+        Returns
+        -------
+        FrozenTree
+            the root of the new version
+        """
+        unknown = set(changes) - set(FrozenTree.__slots__[:-1])
+        if unknown:
+            raise ValueError(f"unknown attributes {sorted(unknown)}")
+        # the nodes of the path, from this node down
+        nodes = [self]
+        for side in path:
+            if nodes[-1].isempty():
+                raise ValueError(f'the path "{path}" goes below a leaf')
+            nodes.append(nodes[-1].get(side))
+        fields = nodes[-1]._fields()
+        fields.update(changes)
+        new = FrozenTree(**fields)
+        # copying the path bottom-up, each copy pointing to the new child
+        for node, side in zip(reversed(nodes[:-1]), reversed(path)):
+            fields = node._fields()
+            fields[side] = new
+            new = FrozenTree(**fields)
+        return new
+
+    def replace(self, path:str, subtree:"FrozenTree") -> "FrozenTree":
+        """
+        new version of the tree where the subtree at the end of path is replaced
+
+        Parameters
+        ----------
+        path : str
+            "l" and "r" moves from this node to the subtree, not empty
+        subtree : FrozenTree
+            the new subtree, shared and not copied
+
+        Returns
+        -------
+        FrozenTree
+            the root of the new version
+        """
+        if not path:
+            return subtree
+        return self.set(path[:-1], **{path[-1]: subtree})
+
+    def prune(self, path:str, **leaf) -> "FrozenTree":
+        """
+        new version of the tree where the node at the end of path is a leaf
+
+        Parameters
+        ----------
+        path : str
+            "l" and "r" moves from this node
+        **leaf
+            attributes of the leaf (value, label, n_samples, impurity), the ones of the node by default
+
+        Returns
+        -------
+        FrozenTree
+            the root of the new version
+        """
+        node = self.get(path)
+        fields = {"value": node.value, "n_samples": node.n_samples, "impurity": node.impurity}
+        fields.update(leaf)
+        return self.replace(path, FrozenTree(**fields))
+
+    def thaw(self, scale=(1,1), xy_ratio:float=1, layout=None) -> Tree:
+        """
+        Tree_filled/Tree_empty version of the tree, to display it. The nodes are registered
+        in the current TreeModel and their layout is computed lazily as usual
+
+        Parameters
+        ----------
+        scale : (float,float)
+            (default (1,1), optional) (scale_x, scale_y) multiplicative ratio to adjust the position of the nodes
+        xy_ratio : float
+            (default 1, optional) ratio that will widen the distance between two children of the same node if bigger
+        layout : Layout
+            (default None, optional) layout engine of the tree, see layout.py
+
+        Returns
+        -------
+        Tree
+            the root of the new tree
+        """
+        order = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            if not node.isempty():
+                stack.append(node.l)
+                stack.append(node.r)
+        # reversed, the (node, right, left) preorder is a postorder : the copies of the two children
+        # are on top of the stack when their parent is built, even for a subtree shared twice
+        built = []
+        for node in reversed(order):
+            if node.isempty():
+                T = Tree_empty()
+            else:
+                r = built.pop()
+                l = built.pop()
+                T = Tree_filled(l, r, node.s, node.div, scale=scale, xy_ratio=xy_ratio, layout=layout)
+            if node.label is not None:
+                T.label = node.label
+            T.value = node.value
+            T.n_samples = node.n_samples
+            T.impurity = node.impurity
+            built.append(T)
+        return built[0]
@@ -0,0 +1,240 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+import heapq
+
+import numpy as np
+
+from tree import Tree
+from tree_arrays import TreeArrays, TREE_LEAF, is_regression
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def prune(T:Tree, alpha:float) -> Tree:
+    """
+    cost-complexity pruning of a tree for one alpha, see PruningPath
+
+    Parameters
+    ----------
+    T : Tree
+        the tree to prune, its nodes having their n_samples and impurity (see training.fit())
+    alpha : float
+        the complexity parameter, the cost of one leaf
+
+    Returns
+    -------
+    Tree
+        the root of the pruned tree
+    """
+    return PruningPath(T).prune(alpha)
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class PruningPath:
+    """
+    the whole sequence of the cost-complexity (weakest link) pruning of a tree.
+    the cost of a subtree is the impurity of its leaves, weighted by their part of the training samples,
+    plus alpha per leaf : as alpha grows, the parent node t with the smallest
+    g(t) = (R(t) - R(leaves of t))/(number of leaves of t - 1) is pruned first.
+
+    the path is computed in one pass from the n_samples and impurity stored in the nodes by the trainer,
+    without training again : the first g of every node is computed bottom-up, the pruned nodes are taken
+    from a heap, and pruning a node only updates its ancestors.
+    every node keeps the alpha from which it becomes a leaf, so that the tree of any alpha is read
+    from the arrays instead of being stored
+
+    Attributes
+    ----------
+    arrays : TreeArrays
+        the nodes of the unpruned tree
+    node_alpha : np.ndarray[float64]
+        alpha from which each node is a leaf, inf for the nodes never pruned by themselves
+        (the leaves, and the nodes pruned with one of their ancestors)
+    alphas : np.ndarray[float64]
+        the increasing alphas at which the pruned tree changes, starting with 0
+    impurities : np.ndarray[float64]
+        the weighted impurity of the leaves of the pruned tree of each alpha
+    n_leaves : np.ndarray[int]
+        the number of leaves of the pruned tree of each alpha
+    """
+
+    def __init__(self, T):
+        """
+        Parameters
+        ----------
+        T : Tree | TreeArrays
+            the tree to prune, its nodes having their n_samples and impurity (see training.fit())
+        """
+        A = T.compile() if isinstance(T, Tree) else T
+        root = A.root.id
+        n = len(A)
+        if np.any(np.isnan(A.impurity[:n])) or A.n_samples[root] <= 0:
+            raise ValueError("the nodes need their n_samples and impurity to be pruned")
+        self.arrays = A
+        left, right, parent = A.left[:n], A.right[:n], A.parent[:n]
+
+        # risk of each node if it was a leaf
+        risk = A.impurity[:n]*A.n_samples[:n]/A.n_samples[root]
+        # risk and number of leaves of the current subtree of each node, bottom-up
+        order = []
+        stack = [root]
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            if left[i] != TREE_LEAF:
+                stack.append(int(left[i]))
+                stack.append(int(right[i]))
+        subtree_risk = risk.copy()
+        leaves = np.ones(n, dtype=np.int64)
+        for i in reversed(order):
+            if left[i] != TREE_LEAF:
+                subtree_risk[i] = subtree_risk[left[i]] + subtree_risk[right[i]]
+                leaves[i] = leaves[left[i]] + leaves[right[i]]
+
+        def weakness(i):
+            return (risk[i] - subtree_risk[i])/(leaves[i] - 1)
+
+        g = np.full(n, np.inf)
+        heap = []
+        for i in order:
+            if left[i] != TREE_LEAF:
+                g[i] = weakness(i)
+                heap.append((g[i], i))
+        heapq.heapify(heap)
+
+        self.node_alpha = np.full(n, np.inf)
+        pruned = np.zeros(n, dtype=bool)
+        alpha = 0.
+        alphas, impurities, n_leaves = [0.], [subtree_risk[root]], [int(leaves[root])]
+        while heap:
+            g_i, i = heapq.heappop(heap)
+            if pruned[i] or g_i != g[i]:
+                continue # already pruned, or a value of g outdated by the pruning of a descendant
+            ancestors = []
+            a = parent[i]
+            while a != TREE_LEAF and not pruned[a]:
+                ancestors.append(a)
+                a = parent[a]
+            if a != TREE_LEAF:
+                continue # inside a subtree already pruned
+            # the alphas never decrease, even when the rounding errors give a smaller g
+            alpha = max(alpha, g_i)
+            self.node_alpha[i] = alpha
+            pruned[i] = True
+            gained_risk = risk[i] - subtree_risk[i]
+            lost_leaves = leaves[i] - 1
+            subtree_risk[i], leaves[i] = risk[i], 1
+            for a in ancestors:
+                subtree_risk[a] += gained_risk
+                leaves[a] -= lost_leaves
+                g[a] = weakness(a)
+                heapq.heappush(heap, (g[a], a))
+            # the nodes pruned at the same alpha give a single step of the path,
+            # the splits that gain nothing (g = 0) being already pruned in the tree of alpha 0
+            if alpha == alphas[-1]:
+                impurities[-1], n_leaves[-1] = subtree_risk[root], int(leaves[root])
+            else:
+                alphas.append(alpha)
+                impurities.append(subtree_risk[root])
+                n_leaves.append(int(leaves[root]))
+        self.alphas = np.array(alphas)
+        self.impurities = np.array(impurities)
+        self.n_leaves = np.array(n_leaves)
+
+    def __len__(self):
+        return len(self.alphas)
+
+    def at(self, alpha:float) -> TreeArrays:
+        """
+        the pruned tree of an alpha, as arrays
+
+        Parameters
+        ----------
+        alpha : float
+            the complexity parameter, the cost of one leaf
+
+        Returns
+        -------
+        TreeArrays
+            a copy of the arrays where the pruned nodes are leaves, their descendants being unreachable
+        """
+        A = self.arrays
+        n = len(A)
+        P = TreeArrays(n, scale=A.scale, xy_ratio=A.xy_ratio)
+        P.layout = A.layout
+        P.named_axes = A.named_axes
+        P.n_features = A.n_features
+        P.regression = A.regression
+        P.n_nodes = n
+        for name in ("left", "right", "parent", "depth", "feature", "threshold",
+                     "n_samples", "impurity", "x", "y"):
+            getattr(P, name)[:] = getattr(A, name)[:n]
+        P.value = A.value[:n].copy()
+        P.labels = dict(A.labels)
+        P.node_lines = dict(A.node_lines)
+        cut = self.node_alpha <= alpha
+        P.left[cut] = TREE_LEAF
+        P.right[cut] = TREE_LEAF
+        P.feature[cut] = TREE_LEAF
+        return P
+
+    def prune(self, alpha:float) -> Tree:
+        """
+        the pruned tree of an alpha, as Tree_filled and Tree_empty objects
+
+        Parameters
+        ----------
+        alpha : float
+            the complexity parameter, the cost of one leaf
+
+        Returns
+        -------
+        Tree
+            the root of the pruned tree, registered in the current TreeModel
+        """
+        return self.at(alpha).to_tree(self.arrays.root.id)
+
+    def scores(self, X, y, regression:bool=None) -> np.ndarray:
+        """
+        accuracy (or mean squared error for a regression tree) of the pruned tree of every alpha of the path,
+        for complexity/accuracy curves like in scene4bis
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+        y : np.ndarray
+            (n_samples,) expected values
+        regression : bool
+            (default None, optional) whether the tree is a regression tree, taken from its training when None
+            (see tree_arrays.is_regression()) : a tree of the classes 0. and 1. predicts floats too
+
+        Returns
+        -------
+        np.ndarray
+            the score of every alpha of alphas
+        """
+        y = np.asarray(y)
+        numerical = is_regression(self.arrays, regression)
+        root = self.arrays.root.id
+        scores = []
+        for alpha in self.alphas:
+            predicted = self.at(alpha).predict(X, root)
+            scores.append(np.mean((predicted - y)**2) if numerical else np.mean(predicted == y))
+        return np.array(scores)
@@ -0,0 +1,169 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+import numpy as np
+
+from tree import Tree
+from tree_arrays import TREE_LEAF
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class LeafRegions:
+    """
+    index of the regions of the leaves of a tree, the partition of the space drawn in scene8bis.
+    the regions are the hyper-rectangles of TreeArrays.bounds(), and the tree being itself
+    a k-d partition of the space, the leaf containing a point is found by routing it (TreeArrays.apply()),
+    all the points at once. The statistics of the regions (number of points, of each class,
+    percentage of the predicted class as in "FAIL (74%)") come from one bincount
+
+    Attributes
+    ----------
+    arrays : TreeArrays
+        the nodes of the tree
+    root : int
+        index of the root in arrays
+    leaves : np.ndarray[int]
+        index in arrays of every leaf, from left to right
+    ids : np.ndarray[int]
+        id of the Tree node of every leaf
+    lower : np.ndarray[float64]
+        (n_leaves, n_features) lower corner of the region of every leaf
+    upper : np.ndarray[float64]
+        (n_leaves, n_features) upper corner of the region of every leaf
+    values : np.ndarray
+        value predicted by every leaf
+    """
+
+    def __init__(self, T, lower=None, upper=None):
+        """
+        Parameters
+        ----------
+        T : Tree | TreeArrays
+            the tree
+        lower : np.ndarray
+            (default None, optional) (n_features,) lower corner of the whole region, -inf when None
+        upper : np.ndarray
+            (default None, optional) (n_features,) upper corner of the whole region, +inf when None
+        """
+        A = T.compile() if isinstance(T, Tree) else T
+        self.arrays = A
+        self.root = root = A.root.id
+        lo, hi = A.bounds(lower, upper, root)
+        # leaves from left to right, with an explicit stack
+        leaves = []
+        stack = [root]
+        while stack:
+            i = stack.pop()
+            if A.left[i] == TREE_LEAF:
+                leaves.append(i)
+            else:
+                stack.append(int(A.right[i]))
+                stack.append(int(A.left[i]))
+        self.leaves = np.array(leaves, dtype=np.intp)
+        self.ids = A.node_ids[self.leaves]
+        self.lower = lo[self.leaves]
+        self.upper = hi[self.leaves]
+        self.values = A.value[self.leaves]
+        # position of every leaf in self.leaves, by node index
+        self._position = np.full(len(A), -1, dtype=np.intp)
+        self._position[self.leaves] = np.arange(len(self.leaves))
+
+    def __len__(self):
+        return len(self.leaves)
+
+    @property
+    def centers(self) -> np.ndarray:
+        """
+        (n_leaves, n_features) center of the region of every leaf, to place the shapes of the regions
+        """
+        return (self.lower + self.upper)/2
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """
+        (n_leaves, n_features) width of the region of every leaf along every axis
+        """
+        return self.upper - self.lower
+
+    def lookup(self, X) -> np.ndarray:
+        """
+        region containing every point
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) points
+
+        Returns
+        -------
+        np.ndarray[int]
+            (n_samples,) position in leaves of the region of every point
+        """
+        return self._position[self.arrays.apply(X, self.root)]
+
+    def counts(self, X, y=None, classes=None) -> np.ndarray:
+        """
+        number of points in every region, or of points of every class
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) points
+        y : np.ndarray
+            (default None, optional) (n_samples,) classes of the points
+        classes : np.ndarray
+            (default None, optional) the classes to count, in the order of the columns, the ones of y when None
+
+        Returns
+        -------
+        np.ndarray[int]
+            (n_leaves,) number of points in every region,
+            or (n_leaves, n_classes) number of points of every class when y is given
+        """
+        region = self.lookup(X)
+        if y is None:
+            return np.bincount(region, minlength=len(self))
+        y = np.asarray(y)
+        classes = np.unique(y) if classes is None else np.asarray(classes)
+        # column of every point, the classes being looked up in sorted order whatever their own order
+        order = np.argsort(classes, kind="stable")
+        position = np.searchsorted(classes[order], y)
+        label = order[np.minimum(position, len(classes) - 1)] if len(classes) else position
+        if len(y) and (len(classes) == 0 or np.any(classes[label] != y)):
+            raise ValueError(f"some points are of none of the classes {classes.tolist()}")
+        keys = region*len(classes) + label
+        return np.bincount(keys, minlength=len(self)*len(classes)).reshape(len(self), len(classes))
+
+    def percentages(self, X, y) -> np.ndarray:
+        """
+        percentage of the points of every region that are of the class predicted by its leaf,
+        like the "FAIL (74%)" of scene8bis
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) points
+        y : np.ndarray
+            (n_samples,) classes of the points
+
+        Returns
+        -------
+        np.ndarray[float64]
+            (n_leaves,) the percentages, NaN for the regions without points
+        """
+        region = self.lookup(X)
+        right = np.asarray(y) == self.values[region]
+        total = np.bincount(region, minlength=len(self))
+        correct = np.bincount(region, weights=right, minlength=len(self))
+        return 100*np.divide(correct, total, out=np.full(len(self), np.nan), where=total > 0)
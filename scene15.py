@@ -41,7 +41,7 @@ def elements_in_order(T: Tree, label_leaves: bool = False) -> Group:
     G = tuple()
 
     # sorting the nodes TL-BR
-    Nodes = sorted(T.all_nodes, key=lambda t: (t.depth, t.get_pos()[0]))
+    Nodes = sorted(T.nodes(), key=lambda t: (t.depth, t.get_pos()[0]))
     k = 1
 
     for n in Nodes :
@@ -63,7 +63,7 @@ def elements_in_order(T:Tree)->tuple :
     L = tuple() #separation lines
 
     #sorting the nodes TL-BR
-    Nodes = sorted(T.all_nodes, key = lambda t:(t.depth, t.get_pos()[0]))
+    Nodes = sorted(T.nodes(), key = lambda t:(t.depth, t.get_pos()[0]))
     k = 1
     G = tuple()
 
@@ -0,0 +1,297 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+import numpy as np
+
+from criteria import Entropy, get_criterion
+from training import apply_bins, bin_features
+from tree import Tree
+from tree_arrays import TreeArrays, TREE_LEAF
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def hoeffding_bound(value_range:float, delta:float, n:np.ndarray) -> np.ndarray:
+    """
+    Hoeffding bound : with probability 1 - delta, the mean of n observations of a variable
+    of range value_range is within this distance of its true mean
+
+    Parameters
+    ----------
+    value_range : float
+        range of the observed variable
+    delta : float
+        allowed probability of error
+    n : np.ndarray
+        numbers of observations
+
+    Returns
+    -------
+    np.ndarray
+        the bound for each number of observations
+    """
+    return np.sqrt(value_range**2*np.log(1/delta)/(2*n))
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class HoeffdingTree:
+    """
+    incremental decision tree (VFDT) for data arriving continuously : every leaf keeps the class counts
+    of its samples per feature bin, and is split as soon as the Hoeffding bound guarantees that its best
+    feature is better than the second best one, the samples themselves being never stored.
+    the bins are given to the constructor, or computed once on the first warmup samples (see
+    training.bin_features()), the tree starting to learn when they are known, so that every leaf
+    uses the same constant memory of n_features*max_bins*n_classes counts.
+    the mini-batches are routed, counted and evaluated with a few vectorized operations
+
+    Attributes
+    ----------
+    classes : np.ndarray
+        the classes, from the first mini-batch when not given
+    criterion : Criterion
+        impurity criterion for the classes
+    delta : float
+        allowed probability of choosing a wrong split
+    tie_threshold : float
+        the leaf is split when the bound goes below it, even if the two best features stay too close
+    grace_period : int
+        number of samples a leaf receives between two evaluations of its splits
+    max_depth : int
+        maximal depth of the tree, no limit when None
+    max_bins : int
+        number of bins per feature, at most 256
+    warmup : int
+        number of samples kept to compute the bins before learning, when the bins are not given
+    edges : list[np.ndarray]
+        the edges of the bins of each feature, the possible thresholds
+    arrays : TreeArrays
+        the nodes of the tree, the value of a node being its majority class
+    n_seen : int
+        number of samples received, the ones waiting for the end of the warmup included
+    """
+
+    def __init__(self, classes=None, criterion="gini", delta:float=1e-7, tie_threshold:float=0.05,
+                 grace_period:int=200, max_depth:int=None, max_bins:int=32, edges:list=None,
+                 warmup:int=1000):
+        self.classes = None if classes is None else np.unique(classes)
+        self.criterion = get_criterion(criterion)
+        if self.criterion.regression:
+            raise ValueError("the Hoeffding tree is for the classification, the criterion cannot be a regression one")
+        self.delta = delta
+        self.tie_threshold = tie_threshold
+        self.grace_period = grace_period
+        self.max_depth = max_depth
+        self.max_bins = max_bins
+        self.warmup = warmup
+        self.edges = None if edges is None else [np.sort(np.asarray(e, dtype=np.float64)) for e in edges]
+        if self.edges is not None and max((len(e) for e in self.edges), default=0) >= 256:
+            raise ValueError("at most 255 edges per feature, the bins being stored in uint8")
+        self.arrays = None
+        self.n_seen = 0
+        # counts of the leaves, (n_slots, n_features, n_bins, n_classes), a slot per leaf
+        self._counts = None
+        self._slot = None # slot of each node, TREE_LEAF for the parent nodes
+        self._free = [] # slots freed by the splits
+        self._waiting = None # samples received by each slot since its last evaluation
+        self._buffer = [] # mini-batches received during the warmup
+
+    def _start(self, X:np.ndarray, y:np.ndarray):
+        """
+        bins (when not given) and classes from the first samples, and the tree made of one leaf
+        """
+        if self.classes is None:
+            self.classes = np.unique(y)
+        if self.edges is None:
+            _, self.edges = bin_features(X, self.max_bins)
+        elif len(self.edges) != X.shape[1]:
+            raise ValueError(f"{len(self.edges)} features in the edges, {X.shape[1]} in the data")
+        self.arrays = TreeArrays()
+        self.arrays.n_features = X.shape[1]
+        self.arrays.regression = False
+        self.arrays.value = np.zeros(len(self.arrays.left), dtype=self.classes.dtype)
+        self.arrays.add_leaf(self.classes[0])
+        self.arrays.impurity[0] = 0
+        n_bins = max(len(e) for e in self.edges) + 1
+        self._counts = np.zeros((1, X.shape[1], n_bins, len(self.classes)))
+        self._slot = np.zeros(1, dtype=np.intp)
+        self._waiting = np.zeros(1, dtype=np.int64)
+
+    def _new_slot(self) -> int:
+        """
+        empty counts for a new leaf, reusing the slot of a split leaf when there is one
+        """
+        if self._free:
+            s = self._free.pop()
+            self._counts[s] = 0
+            self._waiting[s] = 0
+            return s
+        s = len(self._counts)
+        # capacity doubled : the allocations stay amortized
+        self._counts = np.concatenate([self._counts, np.zeros_like(self._counts)])
+        self._waiting = np.concatenate([self._waiting, np.zeros_like(self._waiting)])
+        self._free.extend(range(len(self._counts) - 1, s, -1))
+        return s
+
+    def partial_fit(self, X, y) -> "HoeffdingTree":
+        """
+        learns from a mini-batch of samples
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+        y : np.ndarray
+            (n_samples,) classes of the samples
+
+        Returns
+        -------
+        HoeffdingTree
+            the tree itself
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        if X.ndim != 2 or len(X) != len(y):
+            raise ValueError("X must be a (n_samples, n_features) array and y a (n_samples,) array")
+        if len(X) == 0:
+            return self
+        self.n_seen += len(X)
+        if self.arrays is None:
+            if self.edges is None:
+                # the bins of a small first mini-batch would stay coarse for good : the samples are
+                # kept until there are enough of them
+                self._buffer.append((X, y))
+                if sum(len(b) for b, _ in self._buffer) < self.warmup:
+                    return self
+                X = np.concatenate([b for b, _ in self._buffer])
+                y = np.concatenate([c for _, c in self._buffer])
+                self._buffer = []
+            self._start(X, y)
+        labels = np.minimum(np.searchsorted(self.classes, y), len(self.classes) - 1)
+        if np.any(self.classes[labels] != y):
+            raise ValueError("unknown classes in the mini-batch, give all the classes to the constructor")
+        A = self.arrays
+        n_features = X.shape[1]
+        _, _, n_bins, n_classes = self._counts.shape
+
+        # counting the mini-batch in the leaves it reaches, with one bincount for all of them
+        slots, slot_of_row = np.unique(self._slot[A.apply(X, 0)], return_inverse=True)
+        codes = apply_bins(X, self.edges).astype(np.intp)
+        keys = ((slot_of_row[:, None]*n_features + np.arange(n_features))*n_bins + codes)*n_classes + labels[:, None]
+        counts = np.bincount(keys.ravel(), minlength=len(slots)*n_features*n_bins*n_classes)
+        self._counts[slots] += counts.reshape(len(slots), n_features, n_bins, n_classes)
+        self._waiting[slots] += np.bincount(slot_of_row, minlength=len(slots))
+
+        # the leaves reached get their new majority class and statistics
+        leaves = np.flatnonzero(np.isin(self._slot[:len(A)], slots) & (A.left[:len(A)] == TREE_LEAF))
+        class_counts = self._counts[self._slot[leaves], 0].sum(axis=1)
+        A.value[leaves] = self.classes[np.argmax(class_counts, axis=1)]
+        A.n_samples[leaves] = class_counts.sum(axis=1)
+        A.impurity[leaves] = self.criterion.impurity(class_counts)
+
+        ready = leaves[self._waiting[self._slot[leaves]] >= self.grace_period]
+        if self.max_depth is not None:
+            ready = ready[A.depth[ready] < self.max_depth]
+        if len(ready):
+            self._try_splits(ready)
+        return self
+
+    def _try_splits(self, leaves:np.ndarray):
+        """
+        evaluates the splits of some leaves, all at once, and splits the ones passing the Hoeffding test
+        """
+        A = self.arrays
+        slots = self._slot[leaves]
+        self._waiting[slots] = 0
+        counts = self._counts[slots] # (n_leaves, n_features, n_bins, n_classes)
+        total = counts[:, 0].sum(axis=1) # (n_leaves, n_classes)
+        left = np.cumsum(counts, axis=2)[:, :, :-1]
+        if left.shape[2] == 0:
+            return # no feature has any edge : nothing can be split
+        right = total[:, None, None, :] - left
+        n_left = left.sum(axis=-1)
+        n = total.sum(axis=-1)
+        n_edges = np.array([len(e) for e in self.edges])
+        valid = ((n_left > 0) & (n_left < n[:, None, None])
+                 & (np.arange(left.shape[2]) < n_edges[:, None]))
+        score = np.where(valid, self.criterion.split_score(left, right), np.inf)
+
+        # best threshold of every feature, then the two best features
+        best_bin = np.argmin(score, axis=2)
+        feature_score = np.take_along_axis(score, best_bin[..., None], axis=2)[..., 0]
+        order = np.argsort(feature_score, axis=1)
+        best_feature = order[:, 0]
+        rows = np.arange(len(leaves))
+        best = feature_score[rows, best_feature]
+        second = feature_score[rows, order[:, 1]] if feature_score.shape[1] > 1 else np.full(len(leaves), np.inf)
+        gain = self.criterion.impurity(total) - best
+        # the impurity of n_classes classes is at most log2(n_classes) for the entropy, 1 for the others
+        value_range = np.log2(max(len(self.classes), 2)) if isinstance(self.criterion, Entropy) else 1.
+        bound = hoeffding_bound(value_range, self.delta, n)
+        second = np.minimum(second, self.criterion.impurity(total)) # not splitting is also a choice
+        split = np.isfinite(best) & (gain > 0) & ((second - best > bound) | (bound < self.tie_threshold))
+
+        for k in np.flatnonzero(split):
+            i, f, b = int(leaves[k]), int(best_feature[k]), int(best_bin[k, best_feature[k]])
+            l, r = A.split_leaf(i, float(self.edges[f][b]), f)
+            self._slot = np.concatenate([self._slot, np.full(len(A) - len(self._slot), TREE_LEAF)])
+            self._free.append(int(self._slot[i]))
+            self._slot[i] = TREE_LEAF
+            # the counts of the children start empty (_new_slot()), their class and impurity
+            # being the ones of the counts of their side of the chosen threshold
+            for child, child_counts in ((l, left[k, f, b]), (r, right[k, f, b])):
+                self._slot[child] = self._new_slot()
+                A.value[child] = self.classes[int(np.argmax(child_counts))]
+                A.n_samples[child] = 0
+                A.impurity[child] = self.criterion.impurity(child_counts)
+
+    @property
+    def n_leaves(self) -> int:
+        return 0 if self.arrays is None else int(np.sum(self.arrays.left[:len(self.arrays)] == TREE_LEAF))
+
+    def predict(self, X) -> np.ndarray:
+        """
+        majority class of the leaf reached by every row
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        np.ndarray
+            (n_samples,) the predicted classes
+        """
+        if self.arrays is None:
+            raise ValueError("the tree has not started learning, call partial_fit() with at least warmup samples")
+        return self.arrays.predict(X, 0)
+
+    def tree(self) -> Tree:
+        """
+        view of the root of the tree, usable like the Tree objects of the scenes
+
+        Returns
+        -------
+        Tree
+            the root of the tree
+        """
+        if self.arrays is None:
+            raise ValueError("the tree has not started learning, call partial_fit() with at least warmup samples")
+        # the tree grows with every mini-batch : the positions are computed when it is asked for
+        self.arrays.update_params(0)
+        return self.arrays.node(0)
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# the modules of the repository are flat, at its root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree import Tree_empty, Tree_filled
+
+
+@pytest.fixture
+def scene_tree():
+    """
+    a tree built by hand like in the scenes : x<0.3 at the root, y<0.5 on its left, the leaves predicting 0, 1, 2
+    """
+    T = Tree_filled(Tree_filled(Tree_empty(), Tree_empty(), 0.5, "y"), Tree_empty(), 0.3, "x")
+    for i, leaf in enumerate((T.l.l, T.l.r, T.r)):
+        leaf.value = i
+    return T
+
+
+@pytest.fixture
+def points():
+    """
+    (200, 2) points of the unit square, the plane of the scene trees
+    """
+    return np.random.default_rng(0).random((200, 2))
+
+
+@pytest.fixture
+def classification():
+    """
+    (300, 4) data whose classes depend on the first two features only, 10% of them flipped
+    """
+    rng = np.random.default_rng(0)
+    X = rng.random((300, 4))
+    y = (X[:, 0] + 0.5*X[:, 1] > 0.8).astype(int) ^ (rng.random(len(X)) < 0.1)
+    return X, y
+
+
+@pytest.fixture
+def regression():
+    """
+    (300, 3) data with numerical targets depending on the first two features
+    """
+    rng = np.random.default_rng(1)
+    X = rng.random((300, 3))
+    return X, 3*X[:, 0] + np.sin(6*X[:, 1]) + rng.normal(0, 0.1, len(X))
+
+
+@pytest.fixture
+def big_classification():
+    """
+    (40000, 8) data : big enough for the first nodes to be searched by a pool, see training.PARALLEL_MIN_WORK
+    """
+    rng = np.random.default_rng(0)
+    X = rng.random((40000, 8))
+    y = (X[:, 0] + X[:, 1] > 1).astype(int) ^ (rng.random(len(X)) < 0.1)
+    return X, y
+
+
+@pytest.fixture
+def stream():
+    """
+    (20000, 3) data arriving in mini-batches, the class being given by the first feature
+    """
+    X = np.random.default_rng(0).random((20000, 3))
+    return X, (X[:, 0] > 0.5).astype(int)
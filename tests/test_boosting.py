@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import training
+from boosting import GradientBoosting
+
+
+def test_squared_loss(regression):
+    X, y = regression
+    G = GradientBoosting(n_rounds=30, max_depth=3).fit(X, y)
+    assert len(G) == 30 and G.init == pytest.approx(y.mean())
+    # every tree fits the residuals : the training loss never grows
+    assert np.all(np.diff(G.train_loss) <= 1e-12)
+    assert G.train_loss[-1] == pytest.approx(np.mean((G.predict(X) - y)**2))
+    assert G.train_loss[-1] < 0.2*np.var(y)
+
+
+def test_one_round_is_one_tree(regression):
+    X, y = regression
+    G = GradientBoosting(n_rounds=1, learning_rate=1., max_depth=2).fit(X, y)
+    T = training.fit(X, y - y.mean(), max_depth=2, criterion="variance", splitter="hist")
+    assert np.allclose(G.predict(X), y.mean() + T.predict(X))
+
+
+def test_logistic_loss(classification):
+    X, y = classification
+    labels = np.array(["no", "yes"])[y]
+    G = GradientBoosting(loss="logistic", n_rounds=30, max_depth=2).fit(X, labels)
+    assert G.classes.tolist() == ["no", "yes"]
+    assert G.train_loss[-1] < G.train_loss[0]
+    proba = G.predict_proba(X)
+    assert np.allclose(proba.sum(axis=1), 1)
+    predicted = G.predict(X)
+    assert np.array_equal(predicted, G.classes[np.argmax(proba, axis=1)])
+    assert np.mean(predicted == labels) > 0.85
+
+
+def test_errors(classification):
+    X, y = classification
+    with pytest.raises(ValueError):
+        GradientBoosting(loss="absolute")
+    with pytest.raises(ValueError):
+        GradientBoosting(n_rounds=0)
+    with pytest.raises(ValueError):
+        GradientBoosting().predict(X)
+    with pytest.raises(ValueError):
+        GradientBoosting(loss="logistic").fit(X, y + (X[:, 2] > 0.5))
+    with pytest.raises(ValueError):
+        GradientBoosting(n_rounds=1).fit(X, y).predict_proba(X)
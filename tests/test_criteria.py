@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import training
+from criteria import Criterion, Entropy, Gini, Misclassification, Variance, get_criterion, proportions
+
+
+def test_impurities_of_class_counts():
+    counts = np.array([[5., 5.], [10., 0.], [0., 0.], [2., 6.]])
+    assert np.allclose(Gini().impurity(counts), [0.5, 0., 0., 0.375])
+    assert np.allclose(Entropy().impurity(counts), [1., 0., 0., -(0.25*np.log2(0.25) + 0.75*np.log2(0.75))])
+    assert np.allclose(Misclassification().impurity(counts), [0.5, 0., 0., 0.25])
+    assert np.allclose(proportions(counts)[2], 0)
+
+
+def test_variance_of_the_sums():
+    y = np.random.default_rng(0).normal(3, 2, 50)
+    stats = Variance.sample_stats(y).sum(axis=0)
+    assert Variance().n_samples(stats) == 50
+    assert Variance().impurity(stats) == pytest.approx(np.var(y))
+    assert Variance().impurity(Variance.sample_stats(np.full(4, 1e6)).sum(axis=0)) == 0.
+
+
+def test_split_scores_of_every_threshold():
+    # the cumulative sums of the sorted samples give the left child of every threshold at once
+    y = np.array([0, 0, 1, 0, 1, 1])
+    stats = np.eye(2)[y]
+    left = np.cumsum(stats, axis=0)[:-1]
+    right = stats.sum(axis=0) - left
+    scores = Gini().split_score(left, right)
+    for k in range(1, len(y)):
+        expected = (k*Gini().impurity(stats[:k].sum(axis=0))
+                    + (len(y) - k)*Gini().impurity(stats[k:].sum(axis=0)))/len(y)
+        assert scores[k - 1] == pytest.approx(expected)
+
+
+def test_criteria_plugged_in_the_trainer(classification):
+    class Squared(Criterion):
+        """sum of the squared proportions, a Gini index in disguise"""
+        def impurity(self, stats):
+            return 1 - (proportions(stats)**2).sum(axis=-1)
+
+    X, y = classification
+    gini = training.fit(X, y, max_depth=3, criterion="gini")
+    custom = training.fit(X, y, max_depth=3, criterion=Squared())
+    assert custom.merkle_hash() == gini.merkle_hash()
+    for name in ("entropy", "misclassification"):
+        T = training.fit(X, y, max_depth=3, criterion=name)
+        assert np.mean(T.predict(X) == y) > 0.8
+    assert get_criterion("gini") is get_criterion(get_criterion("gini"))
+    with pytest.raises(ValueError):
+        get_criterion("mse")
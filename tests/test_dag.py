@@ -0,0 +1,52 @@
+import numpy as np
+
+import training
+from dag import DecisionDAG
+from tree import Tree_empty, Tree_filled
+
+
+def intro_tree():
+    """
+    the tree of intro.treeA(), with its subtrees T0 and T1
+    """
+    T0 = Tree_filled(Tree_empty(), Tree_empty(), 0, "x")
+    T1 = Tree_filled(Tree_empty(), Tree_empty(), 0, "x")
+    T2 = Tree_filled(T0, Tree_empty(), 0, "x")
+    T3 = Tree_filled(T1, Tree_empty(), 0, "x")
+    T4 = Tree_filled(Tree_empty(), Tree_empty(), 0, "x")
+    T5 = Tree_filled(T2, Tree_empty(), 0, "x")
+    T6 = Tree_filled(T3, T4, 0, "x")
+    return Tree_filled(T5, T6, 0, "x"), T0, T1
+
+
+def test_intro_tree_without_values_is_one_leaf():
+    T, _, _ = intro_tree()
+    D = DecisionDAG(T)
+    assert D.n_tree_nodes == 17
+    assert len(D) == 1
+    assert D.root == 0
+
+
+def test_identical_subtrees_are_stored_once():
+    T, T0, T1 = intro_tree()
+    for i, leaf in enumerate(n for n in T.nodes() if n.isempty()):
+        leaf.value = i
+    T0.l.value, T0.r.value = T1.l.value, T1.r.value = 10, 11
+    A = T.compile()
+    D = DecisionDAG(A)
+    index = dict(zip(A.node_ids.tolist(), D.index.tolist()))
+    assert index[T0.id] == index[T1.id]
+    # the two leaves and the split of T1 are the ones of T0
+    assert len(D) == 17 - 3
+    X = np.array([[-1.], [0.], [1.]])
+    assert D.predict(X).tolist() == T.predict(X).tolist()
+
+
+def test_predictions_of_a_trained_tree(classification):
+    X, y = classification
+    T = training.fit(X, y, max_depth=6)
+    D = DecisionDAG(T)
+    assert len(D) <= D.n_tree_nodes
+    assert np.array_equal(D.predict(X), T.predict(X))
+    # the depth 6 leaves of the same class make redundant splits
+    assert len(D) < D.n_tree_nodes
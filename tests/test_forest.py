@@ -0,0 +1,67 @@
+import numpy as np
+
+import training
+from boosting import GradientBoosting
+from forest import Forest
+
+
+def _positions(T):
+    return np.array([node.get_pos() for node in T.nodes()])
+
+
+def test_forest_tree_positions(classification):
+    X, y = classification
+    F = Forest(n_trees=3, max_depth=3, random_state=0).fit(X, y)
+    for i in range(3):
+        xy = _positions(F.tree(i))
+        assert len(xy) > 1
+        assert np.any(xy != 0)
+        # the nodes of a tree do not sit on top of each other
+        assert len(np.unique(xy, axis=0)) == len(xy)
+
+
+def test_boosting_tree_positions(regression):
+    X, y = regression
+    G = GradientBoosting(n_rounds=2, max_depth=2).fit(X, y)
+    xy = _positions(G.tree(1))
+    assert np.any(xy != 0)
+    assert len(np.unique(xy, axis=0)) == len(xy)
+
+
+def test_boosting_reuses_its_pool(monkeypatch, big_classification):
+    X, _ = big_classification
+    y = 3*X[:, 0] + np.sin(6*X[:, 1])
+    pools = []
+    executor = training.ProcessPoolExecutor
+    monkeypatch.setattr(training, "ProcessPoolExecutor", lambda *a, **k: pools.append(1) or executor(*a, **k))
+    parallel = GradientBoosting(n_rounds=3, max_depth=3, n_jobs=2).fit(X, y)
+    assert len(pools) == 1
+    sequential = GradientBoosting(n_rounds=3, max_depth=3).fit(X, y)
+    assert parallel.train_loss == sequential.train_loss
+
+
+def test_forest_trained_in_parallel(classification):
+    X, y = classification
+    labels = np.array(["no", "yes"])[y]
+    sequential = Forest(n_trees=6, max_depth=4, random_state=0).fit(X, labels)
+    parallel = Forest(n_trees=6, max_depth=4, random_state=0, n_jobs=2).fit(X, labels)
+    n = len(sequential.nodes)
+    assert len(parallel.nodes) == n and np.array_equal(parallel.roots, sequential.roots)
+    assert np.array_equal(parallel.nodes.threshold[:n], sequential.nodes.threshold[:n])
+    proba = parallel.predict_proba(X)
+    assert np.allclose(proba.sum(axis=1), 1) and np.allclose(proba, sequential.predict_proba(X))
+    assert np.array_equal(parallel.predict(X), parallel.classes[np.argmax(proba, axis=1)])
+    assert np.mean(parallel.predict(X) == labels) > 0.8
+
+
+def test_forest_votes_and_means(classification, regression):
+    X, y = classification
+    # without bootstrap nor drawn features, every tree is the tree of training.fit()
+    F = Forest(n_trees=3, max_depth=3, max_features=None, bootstrap=False).fit(X, y)
+    T = training.fit(X, y, max_depth=3)
+    for i in range(3):
+        assert F.nodes.predict(X, F.roots[i]).tolist() == T.predict(X).tolist()
+    assert np.array_equal(F.predict(X), T.predict(X))
+    X, y = regression
+    F = Forest(n_trees=4, max_depth=3, criterion="variance", random_state=0).fit(X, y)
+    assert np.allclose(F.predict(X), F.nodes.predict(X, F.roots).mean(axis=0))
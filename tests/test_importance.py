@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import training
+from forest import Forest
+from importance import impurity_importances, permutation_importance
+from tree import Tree_empty, Tree_filled
+
+
+def test_impurity_importances_of_unused_features(classification):
+    X, y = classification
+    T = training.fit(X, y, max_depth=3)
+    importances = impurity_importances(T)
+    assert importances.shape == (4,)
+    assert np.allclose(importances, T.feature_importances)
+    F = Forest(n_trees=3, max_depth=1, max_features=None, random_state=0).fit(X, X[:, 0] > 0.5)
+    assert impurity_importances(F.nodes, root=F.roots).tolist() == [1., 0., 0., 0.]
+
+
+def test_impurity_importances_need_n_features():
+    T = Tree_filled(Tree_empty(), Tree_empty(), 0.5, "x")
+    T.n_samples, T.l.n_samples, T.r.n_samples = 4, 2, 2
+    T.impurity, T.l.impurity, T.r.impurity = 0.5, 0., 0.
+    with pytest.raises(ValueError):
+        impurity_importances(T)
+    assert impurity_importances(T, n_features=2).tolist() == [1., 0.]
+
+
+def test_permutation_importance_of_float_classes(classification, scene_tree, points):
+    X, _ = classification
+    y = np.digitize(X[:, 0], [0.33, 0.66])
+    as_ints = permutation_importance(training.fit(X, y, max_depth=3), X, y, random_state=0)
+    # the classes 0., 1. and 2. are classes too : their error rate, not their squared error
+    y = y.astype(np.float64)
+    as_floats = permutation_importance(training.fit(X, y, max_depth=3), X, y, random_state=0)
+    assert np.allclose(as_ints, as_floats)
+    assert as_floats[0].max() <= 1.
+    with pytest.raises(ValueError):
+        permutation_importance(scene_tree, points, scene_tree.predict(points))
+    mean, _ = permutation_importance(scene_tree, points, scene_tree.predict(points), regression=False)
+    assert mean[0] > 0 and mean[1] > 0
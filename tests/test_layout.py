@@ -0,0 +1,81 @@
+import numpy as np
+
+from layout import ClassicLayout, TidyLayout
+from tree import Tree_empty, Tree_filled
+
+
+def random_shape(rng, n_parents):
+    """
+    (left, right) children of a random binary tree with n_parents parent nodes, in preorder, the root being 0
+    """
+    left, right = [], []
+
+    def grow(n):
+        i = len(left)
+        left.append(-1)
+        right.append(-1)
+        if n > 0:
+            k = int(rng.integers(n))
+            left[i] = grow(k)
+            right[i] = grow(n - 1 - k)
+        return i
+
+    grow(n_parents)
+    return left, right
+
+
+def inorder(left, right, root=0):
+    """
+    rank of every node from left to right
+    """
+    rank, stack, v = [0]*len(left), [], root
+    k = 0
+    while stack or v >= 0:
+        while v >= 0:
+            stack.append(v)
+            v = left[v]
+        v = stack.pop()
+        rank[v], k = k, k + 1
+        v = right[v]
+    return rank
+
+
+def test_tidy_layout_never_overlaps():
+    rng = np.random.default_rng(0)
+    layout = TidyLayout(sibling_distance=1.)
+    for n_parents in list(range(8)) + [50]*20 + [500]:
+        left, right = random_shape(rng, n_parents)
+        x, depths = layout.positions(left, right, 0, xy_ratio=2.)
+        x = np.array(x)
+        assert x[0] == 0.
+        for v in range(len(left)):
+            if left[v] >= 0:
+                # every parent centered above its two children, one level below it
+                assert np.isclose(x[v], (x[left[v]] + x[right[v]])/2)
+                assert depths[left[v]] == depths[right[v]] == depths[v] + 1
+        # on every level, the nodes keep their order, at least sibling_distance*xy_ratio apart
+        rank = np.array(inorder(left, right))
+        depths = np.array(depths)
+        for d in np.unique(depths):
+            level = np.flatnonzero(depths == d)
+            level = level[np.argsort(rank[level])]
+            assert np.all(np.diff(x[level]) >= 2. - 1e-9)
+
+
+def test_tidy_layout_of_a_tree():
+    T = Tree_filled(Tree_filled(Tree_empty(), Tree_empty(), 0.5, "y"), Tree_empty(), 0.3, "x",
+                    layout=TidyLayout(level_height=0.5))
+    x0, y0 = T.pos
+    assert T.l.pos == (x0 - 0.5, y0 - 0.5) and T.r.pos == (x0 + 0.5, y0 - 0.5)
+    assert T.l.l.pos == (x0 - 1, y0 - 1) and T.l.r.pos == (x0, y0 - 1)
+    assert T.l.l.depth == 2
+    # a new subtree is laid out again
+    T.r = Tree_filled(Tree_empty(), Tree_empty(), 0.5, "y")
+    T.r.define_parent(T)
+    assert T.r.l.pos[0] - T.l.r.pos[0] >= 1
+
+
+def test_classic_layout():
+    left, right = [1, 3, -1, -1, -1], [2, 4, -1, -1, -1]
+    x, depths = ClassicLayout().positions(left, right, 0, xy_ratio=1.)
+    assert x == [0., -1., 1., -1.5, -0.5] and depths == [0, 1, 1, 2, 2]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import training
+from persistent import FrozenTree, freeze
+
+
+def test_freeze_and_thaw(classification):
+    X, y = classification
+    T = training.fit(X, y, max_depth=4)
+    F = freeze(T)
+    assert len(F) == len(T.nodes())
+    thawed = F.thaw()
+    assert thawed.merkle_hash() == T.merkle_hash()
+    assert np.array_equal(thawed.predict(X), T.predict(X))
+
+
+def test_versions_share_the_nodes_out_of_the_path(scene_tree, points):
+    F = freeze(scene_tree)
+    G = F.set("l", s=0.7)
+    assert G.get("l").s == 0.7 and F.get("l").s == 0.5
+    # only the root and its left child are copied
+    assert G is not F and G.get("l") is not F.get("l")
+    assert G.r is F.r and G.get("ll") is F.get("ll") and G.get("lr") is F.get("lr")
+    assert np.array_equal(F.thaw().predict(points), scene_tree.predict(points))
+    moved = (points[:, 0] < 0.3) & (points[:, 1] >= 0.5) & (points[:, 1] < 0.7)
+    assert np.array_equal(G.thaw().predict(points) != scene_tree.predict(points), moved)
+
+
+def test_prune_and_replace(scene_tree):
+    F = freeze(scene_tree)
+    P = F.prune("l", value=5)
+    assert len(P) == 3 and P.get("l").value == 5 and len(F) == 5
+    # the same subtree twice, thawed into two distinct subtrees
+    D = F.replace("r", F.l)
+    assert D.l is D.r
+    T = D.thaw()
+    assert T.l is not T.r and len(T.nodes()) == 7
+
+
+def test_frozen_trees_are_immutable(scene_tree):
+    F = freeze(scene_tree)
+    with pytest.raises(AttributeError):
+        F.s = 0.
+    with pytest.raises(ValueError):
+        F.get("rl")
+    with pytest.raises(ValueError):
+        F.set("", color="red")
+    with pytest.raises(ValueError):
+        FrozenTree(l=F.l)
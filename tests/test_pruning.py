@@ -0,0 +1,42 @@
+import numpy as np
+
+import training
+from pruning import PruningPath
+
+
+def test_zero_gain_split_is_pruned_at_alpha_zero():
+    # XOR : the first split alone does not lower the impurity
+    X = np.array([[0., 0.], [0., 1.], [1., 0.], [1., 1.]]).repeat(5, axis=0)
+    y = (X[:, 0] != X[:, 1]).astype(int)
+    path = PruningPath(training.fit(X, y, max_depth=1))
+    assert path.alphas.tolist() == [0.]
+    assert path.n_leaves.tolist() == [1]
+    assert len(path.at(0).root.nodes()) == 1
+
+
+def test_scores_of_float_classes(classification):
+    X, y = classification
+    as_ints = PruningPath(training.fit(X, y)).scores(X, y)
+    # the classes 0. and 1. are classes too : their accuracy, not their squared error
+    y = y.astype(np.float64)
+    as_floats = PruningPath(training.fit(X, y)).scores(X, y)
+    assert np.allclose(as_ints, as_floats)
+    assert as_floats[0] == 1.
+
+
+def test_path_is_monotonic(classification):
+    X, y = classification
+    path = PruningPath(training.fit(X, y))
+    assert path.alphas[0] == 0. and np.all(np.diff(path.alphas) > 0)
+    assert np.all(np.diff(path.n_leaves) < 0) and path.n_leaves[-1] == 1
+    assert np.all(np.diff(path.impurities) >= -1e-12)
+    root = path.arrays.root.id
+    for alpha, n_leaves in zip(path.alphas, path.n_leaves):
+        P = path.at(alpha)
+        assert sum(1 for n in P.root.nodes() if n.isempty()) == n_leaves
+        # between two alphas of the path, the pruned tree does not change
+        assert np.array_equal(P.predict(X, root), path.at(np.nextafter(alpha, np.inf)).predict(X, root))
+    # every tree of the path has the smallest cost of the path until the next alpha (a tie at the next alpha)
+    middles = np.append((path.alphas[:-1] + path.alphas[1:])/2, path.alphas[-1] + 1)
+    costs = path.impurities[None, :] + middles[:, None]*path.n_leaves[None, :]
+    assert np.all(costs.argmin(axis=1) == np.arange(len(path)))
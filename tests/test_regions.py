@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from regions import LeafRegions
+from tree import Tree_empty, Tree_filled
+
+
+def _regions():
+    T = Tree_filled(Tree_empty(), Tree_empty(), 0.5, "x")
+    T.l.value, T.r.value = "a", "b"
+    return LeafRegions(T)
+
+
+def test_counts_of_unsorted_classes():
+    R = _regions()
+    X = np.array([[0.2, 0], [0.3, 0], [0.7, 0], [0.8, 0], [0.9, 0]])
+    y = np.array(["b", "a", "b", "b", "c"])
+    counts = R.counts(X, y, classes=["c", "b", "a"])
+    left, right = R.lookup(X[[0, 2]])
+    assert counts[left].tolist() == [0, 1, 1]
+    assert counts[right].tolist() == [1, 2, 0]
+
+
+def test_counts_reject_unknown_classes():
+    R = _regions()
+    with pytest.raises(ValueError):
+        R.counts(np.array([[0.2, 0], [0.7, 0]]), np.array(["a", "d"]), classes=["b", "a"])
+
+
+def test_regions_of_a_scene_tree(scene_tree, points):
+    R = LeafRegions(scene_tree, [0, 0], [1, 1])
+    # the leaves from left to right, with their regions
+    assert R.ids.tolist() == [scene_tree.l.l.id, scene_tree.l.r.id, scene_tree.r.id]
+    assert R.lower.tolist() == [[0, 0], [0, 0.5], [0.3, 0]]
+    assert R.upper.tolist() == [[0.3, 0.5], [0.3, 1], [1, 1]]
+    assert np.allclose(R.centers, [[0.15, 0.25], [0.15, 0.75], [0.65, 0.5]])
+    assert np.allclose(R.sizes.prod(axis=1).sum(), 1)
+    # every point in the region of its leaf
+    region = R.lookup(points)
+    assert np.all((R.lower[region] <= points) & (points < R.upper[region]))
+    assert R.ids[region].tolist() == scene_tree.apply(points).tolist()
+    # the statistics of the regions
+    y = (points[:, 0] > 0.5).astype(int)
+    counts = R.counts(points, y)
+    assert counts.sum() == len(points) and counts.sum(axis=1).tolist() == R.counts(points).tolist()
+    expected = [100*np.mean(y[region == k] == R.values[k]) for k in range(len(R))]
+    assert np.allclose(R.percentages(points, y), expected)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from streaming import HoeffdingTree
+
+
+def test_one_row_first_batch(stream):
+    X, y = stream
+    for warmup in (0, 1000):
+        H = HoeffdingTree(classes=[0, 1], grace_period=100, warmup=warmup)
+        H.partial_fit(X[:1], y[:1])
+        for start in range(1, len(X), 1000):
+            H.partial_fit(X[start:start + 1000], y[start:start + 1000])
+        assert H.n_seen == len(X)
+        if warmup:
+            # the bins come from the warmup window, not from the first row
+            assert min(len(e) for e in H.edges) > 1
+            assert np.mean(H.predict(X) == y) > 0.95
+
+
+def test_constant_first_batch(stream):
+    X, y = stream
+    H = HoeffdingTree(classes=[0, 1], grace_period=50, warmup=0)
+    H.partial_fit(np.zeros((300, 3)), np.zeros(300, dtype=int))
+    H.partial_fit(X, y)
+    assert H.n_leaves == 1
+
+
+def test_given_edges(stream):
+    X, y = stream
+    edges = [np.linspace(0, 1, 33)[1:-1]]*3
+    H = HoeffdingTree(classes=[0, 1], grace_period=100, edges=edges)
+    H.partial_fit(X[:1], y[:1])
+    assert H.arrays is not None
+    for start in range(1, len(X), 1000):
+        H.partial_fit(X[start:start + 1000], y[start:start + 1000])
+    assert np.mean(H.predict(X) == y) > 0.95
+
+
+def test_splits_on_the_informative_feature(stream):
+    X, y = stream
+    H = HoeffdingTree(classes=[0, 1], grace_period=100)
+    for start in range(0, len(X), 1000):
+        H.partial_fit(X[start:start + 1000], y[start:start + 1000])
+    A = H.arrays
+    # the classes only depend on the first feature : the other two are never used
+    used = A.feature[:len(A)]
+    assert set(used[used >= 0].tolist()) == {0}
+    assert abs(A.threshold[A.root.id] - 0.5) < 0.05
+    assert A.regression is False
+    T = H.tree()
+    assert np.array_equal(T.predict(X), H.predict(X))
+    with pytest.raises(ValueError):
+        H.partial_fit(X[:10], np.full(10, 2))
+
+
+def test_not_started(stream):
+    X, y = stream
+    H = HoeffdingTree(classes=[0, 1], warmup=1000)
+    # before any mini-batch, then while the warmup window fills up
+    for start, stop in ((0, 0), (0, 500)):
+        if stop:
+            H.partial_fit(X[start:stop], y[start:stop])
+        assert H.arrays is None and H.n_leaves == 0
+        with pytest.raises(ValueError):
+            H.tree()
+        with pytest.raises(ValueError):
+            H.predict(X)
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+import training
+from tree import Tree_empty, Tree_filled, TreeModel
+
+
+def _arrays(T):
+    A = T.compile()
+    n = len(A)
+    return A.feature[:n].tolist(), A.threshold[:n].tolist(), A.n_samples[:n].tolist()
+
+
+def test_parallel_search_matches_sequential(big_classification):
+    X, y = big_classification
+    sequential = training.fit(X, y, max_depth=4)
+    parallel = training.fit(X, y, max_depth=4, n_jobs=2)
+    assert _arrays(parallel) == _arrays(sequential)
+
+
+def test_grafted_tree_has_unique_ids(points):
+    with TreeModel() as model:
+        scene = Tree_filled(Tree_empty(), Tree_empty(), 0.5, "x")
+        trained = training.fit(points, (points[:, 0] > 0.3).astype(int), max_depth=2)
+        T = Tree_filled(scene, trained, 0.8, "y")
+        ids = [node.id for node in T.nodes()]
+        assert len(set(ids)) == len(ids)
+        assert all(node.model is model for node in T.nodes())
+
+
+def test_regression_tree_takes_the_best_split(regression):
+    X, y = regression
+    T = training.fit(X, y, max_depth=1, criterion="variance")
+    # brute force : the squared error of every split between two consecutive values of every feature
+    best = np.inf
+    for f in range(X.shape[1]):
+        order = np.argsort(X[:, f])
+        for k in range(1, len(y)):
+            left, right = y[order[:k]], y[order[k:]]
+            best = min(best, np.sum((left - left.mean())**2) + np.sum((right - right.mean())**2))
+    predicted = T.predict(X)
+    assert np.sum((predicted - y)**2) == pytest.approx(best)
+    assert T.n_samples == len(y) and T.impurity == pytest.approx(np.var(y))
+    assert T.regression and not training.fit(X, y > 1, max_depth=1).regression
+
+
+def test_regression_leaves_are_the_means(regression):
+    X, y = regression
+    T = training.fit(X, y, criterion="variance", min_samples_leaf=5)
+    leaf = T.compile().apply(X)
+    for i in np.unique(leaf):
+        assert T.compile().value[i] == pytest.approx(y[leaf == i].mean())
+        assert np.sum(leaf == i) >= 5
+    # without limits, every sample gets its own leaf
+    assert np.allclose(training.fit(X, y, criterion="variance").predict(X), y)
+
+
+def test_hist_splitter_on_few_values(classification):
+    X, y = classification
+    # at most 21 values per feature : one bin per value, the edges being the thresholds of the exact search
+    X = np.round(X*20)/20
+    codes, edges = training.bin_features(X)
+    for f, e in enumerate(edges):
+        assert np.array_equal(codes[:, f], np.searchsorted(e, X[:, f], side="right"))
+    best = training.fit(X, y, max_depth=5)
+    hist = training.fit(X, y, max_depth=5, splitter="hist")
+    # the same splits, up to the ties between the thresholds of equal scores
+    (features, _, n_samples), (best_features, _, best_n_samples) = _arrays(hist), _arrays(best)
+    assert features == best_features and n_samples == best_n_samples
+    assert np.allclose(hist.compile().impurity[:len(n_samples)], best.compile().impurity[:len(n_samples)])
+    assert np.mean(hist.predict(X) == y) == np.mean(best.predict(X) == y)
+
+
+def test_hist_splitter_in_parallel(big_classification):
+    X, y = big_classification
+    sequential = training.fit(X, y, max_depth=4, splitter="hist")
+    parallel = training.fit(X, y, max_depth=4, splitter="hist", n_jobs=2)
+    assert _arrays(parallel) == _arrays(sequential)
+    # quantile bins : close to the exact search
+    best = training.fit(X, y, max_depth=4)
+    assert abs(np.mean(sequential.predict(X) == y) - np.mean(best.predict(X) == y)) < 0.01
+
+
+def test_classification_tree_takes_the_best_split(classification):
+    X, y = classification
+    T = training.fit(X, y, max_depth=4, min_samples_leaf=10)
+
+    def gini(labels):
+        p = np.bincount(labels, minlength=2)/len(labels)
+        return 1 - np.sum(p**2)
+
+    # brute force at the root : the weighted Gini index of every split of every feature
+    best = np.inf
+    for f in range(X.shape[1]):
+        order = np.argsort(X[:, f])
+        for k in range(10, len(y) - 9):
+            best = min(best, k*gini(y[order[:k]]) + (len(y) - k)*gini(y[order[k:]]))
+    A = T.compile()
+    n = len(A)
+    left, right = A.left[0], A.right[0]
+    assert A.n_samples[left]*A.impurity[left] + A.n_samples[right]*A.impurity[right] == pytest.approx(best)
+    # the statistics of every node are the ones of its samples
+    leaf = A.apply(X)
+    _, path, _ = A.decision_path(X)
+    for i in range(n):
+        samples = path[:, i].nonzero()[0]
+        assert A.n_samples[i] == len(samples) and A.impurity[i] == pytest.approx(gini(y[samples]))
+    assert np.all(np.bincount(leaf)[np.unique(leaf)] >= 10) and A.depth[:n].max() <= 4
+    assert T.feature_importances.sum() == pytest.approx(1) and T.feature_importances[:2].sum() > 0.8
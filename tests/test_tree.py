@@ -0,0 +1,184 @@
+import copy
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import training
+from layout import TidyLayout
+from tree import Tree, Tree_empty, Tree_filled, TreeModel
+
+
+def test_copy_and_pickle(scene_tree, points):
+    T, X = scene_tree, points
+    for C in (copy.deepcopy(T), pickle.loads(pickle.dumps(T))):
+        assert np.array_equal(C.predict(X), T.predict(X))
+        # the registry of the copy still works
+        C.model.register(Tree_empty())
+
+
+def test_merkle_hash_of_the_arrays(scene_tree):
+    T = scene_tree
+    T.l.r.value = None # missing value : NaN in the arrays
+    T.l.label = "b"
+    A = T.compile()
+    assert A.root.merkle_hash() == T.merkle_hash()
+    assert A.node(1).merkle_hash() == T.l.merkle_hash()
+    # feature indices, and the same tree with the axes of the scenes
+    U = Tree_filled(Tree_filled(Tree_empty(), Tree_empty(), 0.5, 1), Tree_empty(), 0.3, 0)
+    for i, leaf in enumerate((U.l.l, U.l.r, U.r)):
+        leaf.value = i
+    U.l.r.value = None
+    U.l.label = "b"
+    assert U.compile().root.merkle_hash() == U.merkle_hash() == T.merkle_hash()
+    # int thresholds, as in the scenes : the arrays hold them as floats
+    V = Tree_filled(Tree_filled(Tree_empty(), Tree_empty(), 3, "y"), Tree_empty(), 0, "x")
+    assert V.compile().root.merkle_hash() == V.merkle_hash()
+    assert V.to_arrays().node(1).merkle_hash() == V.l.merkle_hash()
+
+
+def test_merkle_hash_of_a_trained_tree(classification, points):
+    # feature indices, and the axes "x" and "y" of the trees trained on two features
+    for X, y in (classification, (points, points[:, 0] + points[:, 1] > 1)):
+        T = training.fit(X, y, max_depth=3)
+        assert T.compile().root.merkle_hash() == T.merkle_hash()
+
+
+def test_compiled_arrays_follow_the_statistics_and_labels(scene_tree, points):
+    T = scene_tree
+    T.predict(points)
+    for node, (n, impurity) in zip((T, T.l, T.r, T.l.l, T.l.r), ((4, .5), (2, .5), (2, 0.), (1, 0.), (1, 0.))):
+        node.n_samples, node.impurity = n, impurity
+    A = T.compile()
+    assert A.n_samples[:len(A)].tolist() == [4, 2, 1, 1, 2]
+    assert not np.isnan(A.impurity[:len(A)]).any()
+    T.l.l.label = "leaf"
+    assert T.compile().node(2).label == "leaf"
+    # the hash of the arrays sees the new label too
+    T.l.label = "b"
+    assert T.compile().root.merkle_hash() == T.merkle_hash()
+
+
+def test_lines_of_a_deep_chain_in_linear_time():
+    # a chain of 10000 parent nodes : a walk up to the root for every line would take tens of seconds
+    T = Tree_empty()
+    for i in range(10000):
+        T = Tree_filled(T, Tree_empty(), 0.5, "x" if i % 2 else "y")
+    A = T.compile()
+    start = time.perf_counter()
+    T.lines([[0, 0], [1, 1]])
+    assert time.perf_counter() - start < 2
+    # the arrays compiled before hold no line, the new ones hold all of them
+    assert T.compile() is not A and len(T.compile().node_lines) == 10000
+    # the lines of a subtree drop the arrays of its ancestors too
+    A = T.compile()
+    T.l.lines([[0, 0], [0.5, 1]])
+    assert T.compile() is not A and T.compile().node(1).line == [[0, 0.5], [0.5, 0.5]]
+
+
+def test_reset_inside_a_registry():
+    outer = TreeModel.current()
+    with TreeModel() as model:
+        T = Tree_empty()
+        Tree.reset()
+        U = Tree_empty()
+        assert U.model is TreeModel.current() is not model
+        # the nodes created before the reset keep their registry
+        assert T.model is model and model.all_nodes == [T]
+    assert TreeModel.current() is outer
+
+
+def test_trees_built_in_several_threads():
+    n_threads, depth = 4, 8
+    barrier = threading.Barrier(n_threads)
+    outer = TreeModel.current()
+    n_outer = len(outer.all_nodes)
+
+    def build(k):
+        # every thread starts a registry of its own, the threads then growing their trees together
+        Tree.reset()
+        barrier.wait(timeout=10)
+        level = [Tree_empty() for _ in range(2**depth)]
+        while len(level) > 1:
+            level = [Tree_filled(level[i], level[i + 1], k, "x") for i in range(0, len(level), 2)]
+        return level[0], TreeModel.current()
+
+    with ThreadPoolExecutor(n_threads) as pool:
+        built = list(pool.map(build, range(n_threads)))
+    seen = set()
+    for k, (T, model) in enumerate(built):
+        nodes = T.nodes()
+        # the registry of the thread holds its tree and nothing else, with ids 0, 1, 2... of its own
+        assert model is not outer and len(nodes) == 2**(depth + 1) - 1
+        assert {id(n) for n in model.all_nodes} == {id(n) for n in nodes}
+        assert sorted(n.id for n in nodes) == list(range(len(nodes)))
+        assert all(n.model is model for n in nodes) and model.roots() == [T]
+        assert all(n.s == k for n in T.returnLNR())
+        assert not seen & {id(n) for n in nodes}
+        seen |= {id(n) for n in nodes}
+    assert TreeModel.current() is outer and len(outer.all_nodes) == n_outer
+
+
+def test_trees_deeper_than_the_recursion_limit():
+    # a comb of 20000 parent nodes, every one being the left child of the next one :
+    # a recursion would overflow, and a walk up to the root for every node would take minutes
+    n = 20000
+    T = Tree_empty()
+    for i in range(n):
+        T = Tree_filled(T, Tree_empty(), i/n, "x" if i % 2 else "y")
+    leaf = T
+    while not leaf.isempty():
+        leaf = leaf.l
+
+    def timed(f):
+        start = time.perf_counter()
+        result = f()
+        assert time.perf_counter() - start < 5
+        return result
+
+    # every left child is xy_ratio/(1 + depth) to the left of its parent, 0.5 below it
+    assert timed(lambda: leaf.pos) == leaf.pos
+    assert leaf.depth == n
+    assert np.allclose(leaf.pos, (-sum(1/(1 + d) for d in range(n)), -n/2))
+    assert [node.s for node in timed(T.returnLNR)] == [i/n for i in range(n)]
+    timed(lambda: T.lines([[0, 0], [1, 1]]))
+    deepest = leaf.parent
+    # y<0, in the region x<1/n left by the x splits above it
+    assert np.allclose(deepest.line, [[0, 0], [1/n, 0]])
+    C = timed(T.Tdeepcopy)
+    assert C is not T and timed(C.merkle_hash) == timed(T.merkle_hash) and len(C.nodes()) == 2*n + 1
+    # the tidy layout of the comb : every left child half a unit to the left of its parent
+    T.layout = TidyLayout()
+    assert timed(lambda: leaf.pos) == (-n/2, -n/2)
+
+
+def test_lazy_layout(scene_tree):
+    T = scene_tree
+    # laid out on the first access, without any update_params()
+    assert T.l.l.pos == (-1.5, -1.) and T.r.pos == (1., -0.5)
+    assert not any(node._dirty for node in T.nodes())
+    # the rules and values do not move the nodes
+    T.l.s = 0.2
+    assert not T._dirty
+    # the scaling factors and the children do
+    T.xy_ratio = 2
+    assert T._dirty and T.l.l.pos == (-3., -1.)
+    T.r = Tree_filled(Tree_empty(), Tree_empty(), 0.5, "y")
+    T.r.define_parent(T)
+    assert T.r.r.pos == (3., -1.) and T.r.r.depth == 2 and T.r.xy_ratio == 2
+
+
+def test_layout_of_a_grafted_subtree(scene_tree):
+    T = scene_tree
+    # laid out as a part of T, then grafted on the right of a new root
+    assert T.l.l.pos == (-1.5, -1.)
+    U = Tree_filled(Tree_empty(), T.l, 0.1, "x")
+    assert U.r.pos == (1., -0.5) and U.r.l.pos == (0.5, -1.) and U.r.r.pos == (1.5, -1.)
+    assert U.r.l.depth == 2 and U.r.l._root is U
+    # a whole laid out tree grafted below another one
+    V = Tree_filled(Tree_filled(Tree_empty(), Tree_empty(), 0.5, "y"), Tree_empty(), 0.3, "x")
+    assert V.l.r.pos == (-0.5, -1.)
+    Tree_filled(V, Tree_empty(), 0.9, "x")
+    assert V.l.r.pos == (-1 - 1/2 + 1/3, -1.5) and V.l.r.depth == 3
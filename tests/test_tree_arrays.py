@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+import training
+from tree import Tree_empty, Tree_filled
+from tree_arrays import TreeArrays
+
+
+def _splits(T):
+    nodes, splits = [T], []
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, Tree_filled):
+            splits.append((node.div, node.s, node.label))
+            nodes += [node.r, node.l]
+    return splits
+
+
+def test_round_trip_keeps_feature_indices():
+    T = Tree_filled(Tree_filled(Tree_empty(), Tree_empty(), 0.5, 1), Tree_empty(), 0.3, 0)
+    A = TreeArrays.from_tree(T)
+    assert A.root.div == 0
+    assert _splits(A.to_tree()) == _splits(T) == [(0, 0.3, "X[0]<0.3"), (1, 0.5, "X[1]<0.5")]
+
+
+def test_round_trip_keeps_scene_axes():
+    T = Tree_filled(Tree_filled(Tree_empty(), Tree_empty(), 0.5, "y"), Tree_empty(), 0.3, "x")
+    T.l.label = "b"
+    A = TreeArrays.from_tree(T)
+    assert A.root.div == "x"
+    assert _splits(A.to_tree()) == _splits(T) == [("x", 0.3, "x<0.3"), ("y", 0.5, "b")]
+
+
+def test_decision_path_of_a_tree_and_of_its_arrays():
+    pytest.importorskip("scipy")
+    T = Tree_filled(Tree_filled(Tree_empty(), Tree_empty(), 0.5, "y"), Tree_empty(), 0.3, "x")
+    X = np.array([[0.1, 0.2], [0.1, 0.9], [0.8, 0.1]])
+    ids, paths, went_left = T.decision_path(X)
+    A_ids, A_paths, A_went_left = T.compile().decision_path(X)
+    assert np.array_equal(ids, A_ids) and np.array_equal(went_left, A_went_left)
+    assert (paths != A_paths).nnz == 0
+    # the rows visit the root, then the node "y" for the first two
+    assert paths.toarray().sum(axis=1).tolist() == [3, 3, 2]
+    assert went_left.tolist() == [True, True, False, True, False, False, False, False]
+
+
+def test_routing_needs_division_axes():
+    from dag import DecisionDAG
+    from tree_compiler import scorer_source
+
+    T = Tree_filled(Tree_filled(Tree_empty(), Tree_empty(), 0.5, ""), Tree_empty(), 0.3, "x")
+    T.l.l.value, T.l.r.value, T.r.value = 0, 1, 2
+    A = TreeArrays.from_tree(T)
+    X = np.zeros((2, 2))
+    for score in (A.apply, DecisionDAG(A).apply, lambda X: scorer_source(T)):
+        with pytest.raises(ValueError):
+            score(X)
+
+
+def _walk(T, x):
+    """
+    the leaf of one row, node by node like the scenes
+    """
+    while not T.isempty():
+        T = T.l if x["xy".index(T.div) if T.div in ("x", "y") else T.div] < T.s else T.r
+    return T
+
+
+def test_vectorized_apply_and_predict(scene_tree, points, classification):
+    T, X = scene_tree, points
+    X = np.vstack([X, [[0.3, 0.5], [0.29, 0.5]]]) # on the thresholds : the rows go right
+    assert T.apply(X).tolist() == [_walk(T, x).id for x in X]
+    assert T.predict(X).tolist() == [_walk(T, x).value for x in X]
+    assert T.predict(X[-1]).tolist() == [1]
+    # from a node of the tree, and from several roots at once
+    A = T.compile()
+    assert A.predict(X, root=1).tolist() == [_walk(T.l, x).value for x in X]
+    assert np.array_equal(A.predict(X, root=[0, 1]), np.stack([A.predict(X), A.predict(X, root=1)]))
+    X, y = classification
+    T = training.fit(X, y, max_depth=6)
+    assert T.predict(X).tolist() == [_walk(T, x).value for x in X]
+
+
+def test_bounds_hold_the_rows_of_every_node(classification, scene_tree):
+    X, y = classification
+    A = training.fit(X, y, max_depth=5).compile()
+    lo, hi = A.bounds()
+    assert lo.shape == (len(A), 4)
+    _, path, _ = A.decision_path(X)
+    rows, nodes = path.nonzero()
+    # the region of a node is lo <= x < hi, the rows going left when x < s
+    assert np.all((lo[nodes] <= X[rows]) & (X[rows] < hi[nodes]))
+    # the 2-D regions of a scene tree are the ones of lines()
+    T = scene_tree
+    T.lines([[0, 0], [1, 1]])
+    ids, lo, hi = T.bounds([0, 0], [1, 1])
+    split = dict(zip(ids.tolist(), zip(lo.tolist(), hi.tolist())))
+    assert split[T.l.l.id] == ([0, 0], [0.3, 0.5])
+    assert split[T.l.r.id] == ([0, 0.5], [0.3, 1])
+    assert T.l.line == [[0, 0.5], [0.3, 0.5]] and split[T.l.id] == ([0, 0], [0.3, 1])
+    # the views of the arrays compute the same lines, in the arrays
+    V = T.to_arrays()
+    V.node_lines.clear()
+    V.root.lines([[0, 0], [1, 1]])
+    assert V.node_lines == {0: T.line, 1: T.l.line} and V.root.l.line == T.l.line
+    with pytest.raises(ValueError):
+        A.bounds([0, 0], [1, 1])
+
+
+def test_views_read_and_write_the_arrays(scene_tree):
+    T = scene_tree
+    A = T.to_arrays()
+    view = A.root.l
+    assert isinstance(view, Tree_filled) and isinstance(view.r, Tree_empty)
+    assert (view.div, view.s, view.r.value, view.parent.id) == ("y", 0.5, 1, A.root.id)
+    view.s = 0.7
+    view.r.value = 5
+    assert A.threshold[view.id] == 0.7 and A.to_tree().l.r.value == 5
+    # a view is not a node of its own : it is grafted through a copy, and the refused node is not registered
+    leaf = Tree_empty()
+    n_nodes = len(leaf.model.all_nodes)
+    with pytest.raises(TypeError):
+        Tree_filled(view, leaf, 0.3, "x")
+    assert len(leaf.model.all_nodes) == n_nodes and leaf.parent is None
+    U = Tree_filled(A.to_tree(view.id), Tree_empty(), 0.3, "x")
+    assert U.l.s == 0.7 and U.l.parent is U
+
+
+def test_compiled_subtree_of_a_view(classification):
+    X, y = classification
+    A = training.fit(X, y, max_depth=5).to_arrays()
+    view = A.root.r
+    S = view.compile()
+    F = TreeArrays.from_tree(view, positions=False)
+    # the same subtree as the one copied node by node, with the indices of the views as ids
+    assert S.root.merkle_hash() == F.root.merkle_hash() == view.merkle_hash()
+    assert sorted(S.node_ids.tolist()) == sorted(F.node_ids.tolist())
+    assert S.n_features == F.n_features == 4 and S.regression is F.regression is False
+    assert S.depth[:len(S)].max() == F.depth[:len(F)].max()
+    assert np.array_equal(view.apply(X), S.node_ids[S.apply(X)])
+    assert np.array_equal(view.bounds()[0], S.node_ids)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import training
+from tree import Tree_empty, Tree_filled
+from tree_compiler import compile_scorer
+
+
+@pytest.mark.parametrize("mode", ["batch", "row"])
+def test_scorer_matches_predict(mode, classification, regression, tmp_path):
+    for X, y, criterion in (*classification, "gini"), (*regression, "variance"):
+        T = training.fit(X, y, max_depth=6, criterion=criterion)
+        for cache_dir in (None, tmp_path):
+            score = compile_scorer(T, mode, cache_dir)
+            predicted = score(X) if mode == "batch" else np.array([score(x) for x in X])
+            assert np.array_equal(predicted, T.predict(X))
+            assert predicted.dtype == T.predict(X).dtype
+
+
+@pytest.mark.parametrize("mode", ["batch", "row"])
+def test_scorer_keeps_the_type_of_the_values(mode, tmp_path):
+    X = np.array([[0.1, 0.], [0.9, 0.]])
+    for cache_dir in (None, tmp_path):
+        # the same structure, the merkle_hash() being the same for 1 and 1.0
+        for values in ((1, 2), (1., 2.), ("a", "b")):
+            T = Tree_filled(Tree_empty(), Tree_empty(), 0.5, "x")
+            T.l.value, T.r.value = values
+            score = compile_scorer(T, mode, cache_dir)
+            predicted = score(X) if mode == "batch" else np.array([score(x) for x in X])
+            assert predicted.tolist() == list(values)
+            assert predicted.dtype == T.predict(X).dtype
@@ -0,0 +1,73 @@
+import numpy as np
+
+from tree import Tree_empty, Tree_filled
+from tree_diff import edit_distance, relabel_cost
+
+
+def random_tree(rng, depth):
+    """
+    small random tree, its few rules and values making cheap relabelings likely
+    """
+    if depth == 0 or rng.random() < 0.3:
+        leaf = Tree_empty()
+        leaf.value = int(rng.integers(2))
+        return leaf
+    return Tree_filled(random_tree(rng, depth - 1), random_tree(rng, depth - 1),
+                       float(rng.choice([0.25, 0.5])), str(rng.choice(["x", "y"])))
+
+
+def subtree(t):
+    """
+    the nodes below t, t included (Tree.nodes() gives the whole tree)
+    """
+    return [t] if t.isempty() else [t] + subtree(t.l) + subtree(t.r)
+
+
+def brute_force_distance(T1, T2):
+    """
+    the edit distance from its recursive definition on ordered forests, removing their rightmost roots
+    """
+    memo = {}
+
+    def size(forest):
+        return sum(len(subtree(t)) for t in forest)
+
+    def children(t):
+        return () if t.isempty() else (t.l, t.r)
+
+    def distance(F, G):
+        if not F or not G:
+            return size(F) + size(G)
+        key = (tuple(map(id, F)), tuple(map(id, G)))
+        if key not in memo:
+            v, w = F[-1], G[-1]
+            memo[key] = min(distance(F[:-1] + children(v), G) + 1,
+                            distance(F, G[:-1] + children(w)) + 1,
+                            distance(children(v), children(w)) + distance(F[:-1], G[:-1]) + relabel_cost(v, w))
+        return memo[key]
+
+    return distance((T1,), (T2,))
+
+
+def test_zhang_shasha_against_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(60):
+        T1, T2 = random_tree(rng, 3), random_tree(rng, 3)
+        distance, mapping = edit_distance(T1, T2)
+        assert distance == brute_force_distance(T1, T2)
+        # the mapping costs the distance : relabelings, and deletions or insertions of the other nodes
+        n1, n2 = len(T1.nodes()), len(T2.nodes())
+        assert sum(relabel_cost(a, b) for a, b in mapping) + n1 + n2 - 2*len(mapping) == distance
+        # one to one, and keeping the ancestors
+        assert len({id(a) for a, _ in mapping}) == len({id(b) for _, b in mapping}) == len(mapping)
+        for a, b in mapping:
+            below_a, below_b = {id(t) for t in subtree(a)[1:]}, {id(t) for t in subtree(b)[1:]}
+            for c, d in mapping:
+                assert (id(c) in below_a) == (id(d) in below_b)
+
+
+def test_identical_trees_are_mapped_node_to_node():
+    T = random_tree(np.random.default_rng(1), 4)
+    distance, mapping = edit_distance(T, T)
+    assert distance == 0.
+    assert all(a is b for a, b in mapping) and len(mapping) == len(T.nodes())
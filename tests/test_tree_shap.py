@@ -0,0 +1,73 @@
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+
+import training
+from forest import Forest
+from tree_arrays import TREE_LEAF
+from tree_shap import shap_values
+
+
+def conditional_expectation(A, x, known):
+    """
+    prediction of the tree when only the features in known are given : the other splits average their
+    two children, weighted by their training samples (the "path dependent" expectation of TreeSHAP)
+    """
+    def expectation(i):
+        if A.left[i] == TREE_LEAF:
+            return A.value[i]
+        l, r = A.left[i], A.right[i]
+        if A.feature[i] in known:
+            return expectation(l if x[A.feature[i]] < A.threshold[i] else r)
+        return (A.n_samples[l]*expectation(l) + A.n_samples[r]*expectation(r))/A.n_samples[i]
+    return expectation(A.root.id)
+
+
+def brute_force_shap(A, x):
+    """
+    the Shapley values from their definition, over all the subsets of features
+    """
+    M = len(x)
+    phi = np.zeros(M)
+    for f in range(M):
+        others = [g for g in range(M) if g != f]
+        for k in range(M):
+            for S in combinations(others, k):
+                weight = factorial(k)*factorial(M - k - 1)/factorial(M)
+                phi[f] += weight*(conditional_expectation(A, x, {*S, f}) - conditional_expectation(A, x, set(S)))
+    return phi
+
+
+def test_shap_values_against_their_definition(regression):
+    X, y = regression
+    T = training.fit(X, y, criterion="variance", max_depth=4)
+    A = T.compile()
+    phi, expected = shap_values(T, X[:10])
+    assert np.isclose(expected, conditional_expectation(A, X[0], set()))
+    for x, row in zip(X[:10], phi):
+        assert np.allclose(row, brute_force_shap(A, x))
+
+
+def test_additivity(regression, classification):
+    X, y = regression
+    T = training.fit(X, y, criterion="variance", max_depth=6)
+    phi, expected = shap_values(T, X)
+    assert phi.shape == X.shape
+    assert np.allclose(expected + phi.sum(axis=1), T.predict(X))
+    F = Forest(n_trees=4, max_depth=4, criterion="variance", random_state=0).fit(X, y)
+    phi, expected = F.shap_values(X)
+    assert np.allclose(expected + phi.sum(axis=1), F.predict(X))
+    X, y = classification
+    F = Forest(n_trees=4, max_depth=4, random_state=0).fit(X, y)
+    phi, expected = F.shap_values(X)
+    assert phi.shape == (len(X), X.shape[1], 2)
+    assert np.allclose(expected + phi.sum(axis=1), F.predict_proba(X))
+
+
+def test_forest_explained_in_parallel(regression):
+    X, y = regression
+    F = Forest(n_trees=4, max_depth=4, criterion="variance", random_state=0).fit(X, y)
+    phi, expected = shap_values(F.nodes, X[:50], root=F.roots)
+    parallel, parallel_expected = shap_values(F.nodes, X[:50], root=F.roots, n_jobs=2)
+    assert np.allclose(phi, parallel) and np.isclose(expected, parallel_expected)
@@ -0,0 +1,733 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from tree import Tree, Tree_filled, Tree_empty
+from criteria import Criterion, Variance, get_criterion
+
+#   _____                _              _
+#  / ____|              | |            | |
+# | |     ___  _ __  ___| |_ __ _ _ __ | |_ ___
+# | |    / _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | |___| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \_____\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+
+# below this number of (sample, feature) pairs, a node is searched in the main process :
+# sending the work to the pool would cost more than the search itself
+PARALLEL_MIN_WORK = 200_000
+
+# arrays placed in shared memory by the main process, attached in every worker, see share()
+_shared = {}
+_shared_blocks = []
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def impurity(counts:np.ndarray, criterion="gini") -> np.ndarray:
+    """
+    impurity of nodes from their class counts, for any number of nodes at once
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        (..., n_classes) number of samples of each class in each node
+    criterion : str | Criterion
+        (default "gini", optional) the criterion or its name, see criteria.CRITERIA
+
+    Returns
+    -------
+    np.ndarray
+        (...) the impurity of each node, 0 for the empty nodes
+    """
+    return get_criterion(criterion).impurity(counts)
+
+def best_split(X:np.ndarray, stats:np.ndarray, sorted_idx:np.ndarray, features,
+               min_samples_leaf:int, criterion):
+    """
+    finds the best threshold of a node with one linear sweep per feature :
+    the samples being presorted, the class counts of every possible left child
+    are the cumulative sums of the samples' counts
+
+    Parameters
+    ----------
+    X : np.ndarray
+        (n_samples, n_features) training data
+    stats : np.ndarray
+        (n_samples, n_classes) one-hot class of each training sample
+    sorted_idx : np.ndarray
+        (len(features), n_node) indices of the node's samples, sorted along each of the features
+    features : iterable[int]
+        the features to try
+    min_samples_leaf : int
+        minimal number of samples in each child
+    criterion : str | Criterion
+        impurity criterion, see criteria.get_criterion()
+
+    Returns
+    -------
+    tuple[float, int, float]
+        (weighted impurity of the children, feature, threshold) of the best split,
+        None if no split is possible
+    """
+    criterion = get_criterion(criterion)
+    best = None
+    n = sorted_idx.shape[1]
+    for idx, f in zip(sorted_idx, features):
+        xs = X[idx, f]
+        left = np.cumsum(stats[idx], axis=0)[:-1] # left counts when cutting after each sample
+        right = left[-1] + stats[idx[-1]] - left
+        n_left = np.arange(1, n)
+        # a threshold can only be put between two different values
+        valid = (xs[:-1] < xs[1:]) & (n_left >= min_samples_leaf) & (n - n_left >= min_samples_leaf)
+        if not valid.any():
+            continue
+        children = criterion.split_score(left, right)
+        children[~valid] = np.inf
+        i = int(np.argmin(children))
+        if best is None or children[i] < best[0]:
+            threshold = (xs[i] + xs[i + 1])/2
+            if threshold <= xs[i]: # no float between the two values
+                threshold = xs[i + 1]
+            best = (float(children[i]), int(f), float(threshold))
+    return best
+
+def bin_features(X:np.ndarray, max_bins:int=256) -> tuple[np.ndarray, list]:
+    """
+    pre-bins the features for the histogram splitter : the values of each feature are replaced
+    by the index of their bin, the edges of the bins being the possible thresholds.
+    a feature with few distinct values gets one bin per value, the others get quantile bins
+
+    Parameters
+    ----------
+    X : np.ndarray
+        (n_samples, n_features) data
+    max_bins : int
+        (default 256, optional) maximal number of bins per feature, at most 256
+
+    Returns
+    -------
+    tuple[np.ndarray, list[np.ndarray]]
+        the (n_samples, n_features) uint8 bin indices, and the edges of each feature.
+        X[:, f] < edges[f][b] exactly when the bin index is at most b
+    """
+    if not 2 <= max_bins <= 256:
+        raise ValueError("max_bins must be between 2 and 256 to fit the bins in uint8")
+    X = np.asarray(X, dtype=np.float64)
+    edges = []
+    for f in range(X.shape[1]):
+        values = np.unique(X[:, f])
+        if len(values) <= max_bins:
+            # one bin per value, the edges being between two consecutive values
+            e = (values[:-1] + values[1:])/2
+            e = np.where(e <= values[:-1], values[1:], e)
+        else:
+            e = np.unique(np.quantile(X[:, f], np.linspace(0, 1, max_bins + 1)[1:-1]))
+        edges.append(e)
+    return apply_bins(X, edges), edges
+
+def apply_bins(X:np.ndarray, edges:list) -> np.ndarray:
+    """
+    bin indices of new data, with the edges computed by bin_features()
+
+    Parameters
+    ----------
+    X : np.ndarray
+        (n_samples, n_features) data
+    edges : list[np.ndarray]
+        the edges of the bins of each feature
+
+    Returns
+    -------
+    np.ndarray
+        the (n_samples, n_features) uint8 bin indices
+    """
+    X = np.asarray(X, dtype=np.float64)
+    codes = np.empty(X.shape, dtype=np.uint8)
+    for f, e in enumerate(edges):
+        codes[:, f] = np.searchsorted(e, X[:, f], side="right")
+    return codes
+
+def histogram(codes:np.ndarray, stats:np.ndarray, idx:np.ndarray, n_bins:int, features=None) -> np.ndarray:
+    """
+    sums the statistics of the samples of a node in the bins of every feature
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        (n_samples, n_features) bin indices, see bin_features()
+    stats : np.ndarray
+        (n_samples, n_stats) statistics of each sample (one-hot class)
+    idx : np.ndarray
+        indices of the node's samples
+    n_bins : int
+        number of bins per feature in the histogram
+    features : list[int]
+        (default None, optional) the features to count, all of them when None
+
+    Returns
+    -------
+    np.ndarray
+        (n_features, n_bins, n_stats) sums of the statistics per bin
+    """
+    node_codes = codes[idx] if features is None else codes[np.ix_(idx, features)]
+    n_features = node_codes.shape[1]
+    keys = (node_codes.astype(np.intp) + np.arange(n_features)*n_bins).ravel()
+    hist = np.empty((n_features*n_bins, stats.shape[1]))
+    for c in range(stats.shape[1]):
+        hist[:, c] = np.bincount(keys, weights=np.repeat(stats[idx, c], n_features),
+                                 minlength=n_features*n_bins)
+    return hist.reshape(n_features, n_bins, stats.shape[1])
+
+def best_split_hist(hist:np.ndarray, edges:list, features, min_samples_leaf:int, criterion):
+    """
+    finds the best threshold of a node from its histogram : the class counts of every possible
+    left child are the cumulative sums over the bins, for all the features at once
+
+    Parameters
+    ----------
+    hist : np.ndarray
+        (n_features, n_bins, n_classes) histogram of the node, see histogram()
+    edges : list[np.ndarray]
+        the edges of the bins of each feature, see bin_features()
+    features : iterable[int]
+        the features to try
+    min_samples_leaf : int
+        minimal number of samples in each child
+    criterion : str | Criterion
+        impurity criterion, see criteria.get_criterion()
+
+    Returns
+    -------
+    tuple[float, int, float, int]
+        (weighted impurity of the children, feature, threshold, bin) of the best split,
+        None if no split is possible
+    """
+    criterion = get_criterion(criterion)
+    features = np.asarray(list(features))
+    left = np.cumsum(hist[features], axis=1)[:, :-1] # left counts when cutting after each bin
+    total = hist[features[0]].sum(axis=0)
+    right = total - left
+    n_left = criterion.n_samples(left)
+    n = criterion.n_samples(total)
+    n_edges = np.array([len(edges[f]) for f in features])
+    valid = ((n_left >= min_samples_leaf) & (n - n_left >= min_samples_leaf)
+             & (np.arange(left.shape[1]) < n_edges[:, None]))
+    if not valid.any():
+        return None
+    children = criterion.split_score(left, right)
+    children[~valid] = np.inf
+    i, b = np.unravel_index(int(np.argmin(children)), children.shape)
+    f = int(features[i])
+    return float(children[i, b]), f, float(edges[f][b]), int(b)
+
+def share(arrays:dict) -> tuple[list, dict]:
+    """
+    copies arrays in shared memory blocks, once, so that the workers of a process pool
+    can read them without receiving a pickled copy with every task
+
+    Parameters
+    ----------
+    arrays : dict[str, np.ndarray]
+        the arrays to share, by name
+
+    Returns
+    -------
+    tuple[list[SharedMemory], dict]
+        the blocks, to give to release() when the pool is done,
+        and the description of the arrays to give to the initializer of the pool, see _attach()
+    """
+    blocks, spec = [], {}
+    for name, a in arrays.items():
+        a = np.ascontiguousarray(a)
+        block = shared_memory.SharedMemory(create=True, size=max(a.nbytes, 1))
+        np.ndarray(a.shape, dtype=a.dtype, buffer=block.buf)[...] = a
+        blocks.append(block)
+        spec[name] = (block.name, a.shape, a.dtype.str)
+    return blocks, spec
+
+def release(blocks:list):
+    """
+    frees the shared memory blocks created by share()
+    """
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            # still mapped by an array of the main process (see _views()), unmapped with it
+            pass
+        block.unlink()
+
+def _views(blocks:list, spec:dict) -> dict:
+    """
+    arrays of the main process on the blocks created by share() : what it writes there is seen by the workers.
+    they have to be dropped before release()
+    """
+    return {name: np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            for block, (name, (_, shape, dtype)) in zip(blocks, spec.items())}
+
+def n_workers(n_jobs:int) -> int:
+    """
+    number of processes to use, n_jobs=-1 meaning one per CPU
+    """
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+def _attach(spec:dict):
+    """
+    initializer of the workers : maps the arrays shared by share() in the _shared dict
+    """
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        # the block has to stay open as long as the array is used
+        _shared_blocks.append(block)
+        _shared[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+def _split_task(start:int, end:int, features:list, min_samples_leaf:int, criterion:Criterion):
+    """
+    best_split() of the node holding the samples start:end of the shared sorted_idx, on some of the features,
+    in a worker
+    """
+    sorted_idx = _shared["sorted_idx"][features, start:end]
+    return best_split(_shared["X"], _shared["stats"], sorted_idx, features, min_samples_leaf, criterion)
+
+def _histogram_task(idx:np.ndarray, n_bins:int, features:list) -> np.ndarray:
+    """
+    histogram() of some of the features, in a worker
+    """
+    return histogram(_shared["codes"], _shared["stats"], idx, n_bins, features)
+
+def _feature_chunks(features:np.ndarray, n_jobs:int) -> list:
+    """
+    splits the features in n_jobs contiguous groups of about the same size
+    """
+    return [c.tolist() for c in np.array_split(features, min(n_jobs, len(features))) if len(c)]
+
+def n_split_features(max_features, n_features:int) -> int:
+    """
+    number of features tried by every node
+
+    Parameters
+    ----------
+    max_features : int | float | str
+        a number of features, a fraction of the features, "sqrt", "log2",
+        or None for all of them
+    n_features : int
+        number of features of the data
+
+    Returns
+    -------
+    int
+        the number of features, between 1 and n_features
+    """
+    if max_features is None:
+        k = n_features
+    elif max_features == "sqrt":
+        k = int(np.sqrt(n_features))
+    elif max_features == "log2":
+        k = int(np.log2(n_features))
+    elif isinstance(max_features, str):
+        raise ValueError(f'unknown max_features "{max_features}" : can be only "sqrt", "log2" or a number')
+    elif isinstance(max_features, float):
+        k = int(max_features*n_features)
+    else:
+        k = int(max_features)
+    return min(max(k, 1), n_features)
+
+def _node_features(n_features:int, k:int, rng:np.random.Generator) -> np.ndarray:
+    """
+    the features tried by a node : all of them, or k of them drawn without replacement
+    """
+    if k >= n_features:
+        return np.arange(n_features)
+    return np.sort(rng.choice(n_features, k, replace=False))
+
+def fit(X, y, max_depth:int=None, min_samples_leaf:int=1, criterion="gini",
+        splitter:str="best", max_bins:int=256, max_features=None, random_state=None,
+        n_jobs:int=1, bins:tuple=None, pool:"WorkerPool"=None) -> Tree:
+    """
+    trains a classification or regression tree with the CART algorithm : every node takes the threshold
+    that minimizes the weighted impurity of its two children.
+    the samples go left when X[:, feature] < threshold, like Tree.predict()
+
+    with criterion="variance", the tree is a regression tree : the statistics of the samples are
+    (1, y, y²), so the cumulative sums over the sorted samples give the sums and sums of squares
+    of every left child, and the variance reduction of all the thresholds of a feature at once.
+    the leaves store the mean of their samples
+
+    with splitter="best", the features are sorted once, and the sorted order of the samples is kept
+    through the splits, so that the search of a node is O(n) per feature instead of sorting again.
+    with splitter="hist", the features are binned once (see bin_features()) and the thresholds are
+    searched in per-bin class counts, the histogram of the biggest child being the one of its parent
+    minus the one of its sibling : a lot faster on big data, the thresholds being the bin edges
+
+    with n_jobs > 1, the features of the big nodes are searched (or counted) in parallel by a pool
+    of processes. The training data is put in shared memory once, the tasks only carry the samples
+    of the node (their range in the shared sorted order for the "best" splitter), and the main process
+    keeps the best of the splits found by the workers
+
+    Parameters
+    ----------
+    X : np.ndarray
+        (n_samples, n_features) training data
+    y : np.ndarray
+        (n_samples,) classes of the samples, or numerical targets for the regression
+    max_depth : int
+        (default None, optional) maximal depth of the tree, no limit when None
+    min_samples_leaf : int
+        (default 1, optional) minimal number of samples in a leaf
+    criterion : str | Criterion
+        (default "gini", optional) "gini", "entropy", "misclassification", "variance" for the regression,
+        or a Criterion, see criteria.py
+    splitter : str
+        (default "best", optional) "best" for the exact presorted search, "hist" for the histograms
+    max_bins : int
+        (default 256, optional) number of bins per feature of the "hist" splitter, at most 256
+    max_features : int | float | str
+        (default None, optional) number of features drawn at random for each node, see n_split_features(),
+        all the features when None
+    random_state : int | np.random.Generator
+        (default None, optional) seed of the draws of max_features
+    n_jobs : int
+        (default 1, optional) number of processes searching the splits, -1 for one per CPU
+    bins : tuple[np.ndarray, list]
+        (default None, optional) the bin_features(X) of the "hist" splitter, when already computed :
+        the boosting trains all its trees on the same binned features
+    pool : WorkerPool
+        (default None, optional) pool whose workers already have the data of the splitter ("X", or the "codes"
+        of bins) : only the statistics of this tree are written in it, and n_jobs is the one of the pool.
+        the boosting trains all its trees with the same pool
+
+    Returns
+    -------
+    Tree
+        the root of the tree. Every node has its value (majority class or mean), n_samples and impurity.
+        With one or two features the axes are "x" and "y", as in the scenes, else the feature indices.
+        The root also has the feature_importances of the tree, see _build(), the n_features of X,
+        and whether it is a regression tree (regression, from the criterion)
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    if X.ndim != 2 or len(X) != len(y):
+        raise ValueError("X must be a (n_samples, n_features) array and y a (n_samples,) array")
+    if len(X) == 0:
+        raise ValueError("cannot train a tree without samples")
+    criterion = get_criterion(criterion)
+    if criterion.regression:
+        # centered targets : the sums of squares of the nodes stay small compared to their variance
+        offset = float(np.mean(y.astype(np.float64)))
+        stats = Variance.sample_stats(y.astype(np.float64) - offset)
+        classes = None
+    else:
+        classes, y_enc = np.unique(y, return_inverse=True)
+        stats = np.eye(len(classes))[y_enc]
+        offset = 0.
+
+    if splitter == "best":
+        # the samples sorted along every feature, partitioned in place by the splits, see _grow_sorted()
+        sorted_idx = np.ascontiguousarray(np.argsort(X, axis=0, kind="stable").T)
+        shared = {"X": X, "stats": stats, "sorted_idx": sorted_idx}
+    elif splitter == "hist":
+        codes, edges = bin_features(X, max_bins) if bins is None else bins
+        shared = {"codes": codes, "stats": stats}
+    else:
+        raise ValueError(f'unknown splitter "{splitter}" : can be only "best" or "hist"')
+
+    k = n_split_features(max_features, X.shape[1])
+    rng = np.random.default_rng(random_state)
+    own_pool = pool is None and min(n_workers(n_jobs), k) > 1
+    if own_pool:
+        pool = WorkerPool(shared, min(n_workers(n_jobs), k))
+    elif pool is not None:
+        pool.write({name: a for name, a in shared.items() if name not in ("X", "codes")})
+    n_jobs = 1 if pool is None else min(pool.n_jobs, k)
+    executor = None if pool is None else pool.executor
+    try:
+        if splitter == "best":
+            if pool is not None:
+                # the main process partitions the shared copy, the one read by the workers
+                sorted_idx = pool.arrays["sorted_idx"]
+            nodes = _grow_sorted(X, stats, sorted_idx, max_depth, min_samples_leaf, criterion, k, rng,
+                                 executor, n_jobs)
+        else:
+            nodes = _grow_hist(codes, edges, stats, max_depth, min_samples_leaf, criterion, k, rng,
+                               executor, n_jobs)
+    finally:
+        sorted_idx = None
+        if own_pool:
+            pool.close()
+    return _build(nodes, classes, X.shape[1], offset)
+
+def _new_node(counts:np.ndarray, n:int, criterion:Criterion) -> dict:
+    """
+    statistics of a node of the tree being grown
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        (n_stats,) sums of the statistics of the node, its class counts for the classification
+    n : int
+        number of samples of the node
+    criterion : Criterion
+        impurity criterion
+
+    Returns
+    -------
+    dict
+        the node, without split
+    """
+    return {"n": n, "counts": counts, "impurity": float(criterion.impurity(counts)), "split": None}
+
+def _can_split(node:dict, depth:int, max_depth:int, min_samples_leaf:int) -> bool:
+    """
+    whether or not the growth rules allow to split a node
+    """
+    return ((max_depth is None or depth < max_depth) and node["impurity"] > 0
+            and node["n"] >= 2*min_samples_leaf)
+
+def _grow_sorted(X:np.ndarray, stats:np.ndarray, sorted_idx:np.ndarray, max_depth:int, min_samples_leaf:int,
+                 criterion:Criterion, max_features:int, rng:np.random.Generator, pool=None,
+                 n_jobs:int=1) -> list:
+    """
+    grows a tree with the exact presorted search, see fit().
+    every node holds a range start:end of the columns of sorted_idx, its samples sorted along each feature :
+    a split partitions the range in place, the left samples first, keeping their order along every feature.
+    the pool, when given, has the X, stats and sorted_idx arrays attached, see _attach() :
+    sorted_idx is then the shared copy, only partitioned once the workers are done with the node
+
+    Returns
+    -------
+    list[dict]
+        the nodes in preorder, see _build()
+    """
+    n_features = X.shape[1]
+    nodes = []
+    # nodes created top-down, from a stack of (start, end, depth)
+    stack = [(0, len(X), 0)]
+    while stack:
+        start, end, depth = stack.pop()
+        node = _new_node(stats[sorted_idx[0, start:end]].sum(axis=0), end - start, criterion)
+        nodes.append(node)
+        if not _can_split(node, depth, max_depth, min_samples_leaf):
+            continue
+        features = _node_features(n_features, max_features, rng)
+        if pool is not None and len(features)*(end - start) >= PARALLEL_MIN_WORK:
+            # every worker reads the sorted samples of its own features in the shared sorted_idx
+            futures = [pool.submit(_split_task, start, end, c, min_samples_leaf, criterion)
+                       for c in _feature_chunks(features, n_jobs)]
+            found = [s for s in (fut.result() for fut in futures) if s is not None]
+            # ties go to the first feature, as in the sequential search
+            split = min(found, key=lambda s: s[0]) if found else None
+        else:
+            split = best_split(X, stats, sorted_idx[features, start:end], features, min_samples_leaf, criterion)
+        if split is None:
+            continue
+        _, f, threshold = split
+        node["split"] = (f, threshold)
+        # the order along every feature is kept by the boolean selection,
+        # only the samples of the node being compared : O(node size) and not O(n_samples) per split
+        samples = sorted_idx[:, start:end]
+        mask = X[samples, f] < threshold
+        n_left = int(mask[0].sum())
+        sorted_idx[:, start:end] = np.concatenate((samples[mask].reshape(n_features, n_left),
+                                                   samples[~mask].reshape(n_features, -1)), axis=1)
+        # the left child is pushed last : the nodes are created in preorder, see _build()
+        stack.append((start + n_left, end, depth + 1))
+        stack.append((start, start + n_left, depth + 1))
+    return nodes
+
+def _grow_hist(codes:np.ndarray, edges:list, stats:np.ndarray, max_depth:int,
+               min_samples_leaf:int, criterion:Criterion, max_features:int, rng:np.random.Generator,
+               pool=None, n_jobs:int=1) -> list:
+    """
+    grows a tree with the histogram search on binned features, see fit().
+    the pool, when given, has the codes and stats arrays attached, see _attach() :
+    the histograms of the big nodes are counted in parallel, one group of features per worker,
+    the search itself being a few vectorized operations on the histograms
+
+    Returns
+    -------
+    list[dict]
+        the nodes in preorder, see _build()
+    """
+    n_features = codes.shape[1]
+    n_bins = max(len(e) for e in edges) + 1
+    # the histograms count all the features, for the subtraction trick
+    chunks = _feature_chunks(np.arange(n_features), n_jobs)
+
+    def count(idx):
+        if pool is None or len(idx)*n_features < PARALLEL_MIN_WORK:
+            return histogram(codes, stats, idx, n_bins)
+        futures = [pool.submit(_histogram_task, idx, n_bins, c) for c in chunks]
+        return np.concatenate([fut.result() for fut in futures])
+
+    nodes = []
+    idx = np.arange(len(codes))
+    # nodes created top-down, from a stack of (samples, histogram, depth)
+    stack = [(idx, count(idx), 0)]
+    while stack:
+        idx, hist, depth = stack.pop()
+        node = _new_node(hist[0].sum(axis=0), len(idx), criterion)
+        nodes.append(node)
+        if not _can_split(node, depth, max_depth, min_samples_leaf):
+            continue
+        features = _node_features(n_features, max_features, rng)
+        split = best_split_hist(hist, edges, features, min_samples_leaf, criterion)
+        if split is None:
+            continue
+        _, f, threshold, b = split
+        node["split"] = (f, threshold)
+        goes_left = codes[idx, f] <= b
+        left, right = idx[goes_left], idx[~goes_left]
+        # only the smallest child is counted, the other one is the difference with the parent
+        if len(left) <= len(right):
+            left_hist = count(left)
+            right_hist = hist - left_hist
+        else:
+            right_hist = count(right)
+            left_hist = hist - right_hist
+        # the left child is pushed last : the nodes are created in preorder, see _build()
+        stack.append((right, right_hist, depth + 1))
+        stack.append((left, left_hist, depth + 1))
+    return nodes
+
+def _build(nodes:list, classes:np.ndarray, n_features:int, offset:float=0.) -> Tree:
+    """
+    creates the Tree_filled/Tree_empty objects of a trained tree, bottom-up.
+    the impurity decrease of every split, n*impurity minus the same for its two children, is added
+    to its feature on the way : normalized to sum to 1, they are the feature_importances of the root
+
+    Parameters
+    ----------
+    nodes : list[dict]
+        the nodes in preorder (node, left subtree, right subtree), with their statistics and split
+    classes : np.ndarray
+        the classes, in the order of the counts, None for a regression tree
+    n_features : int
+        number of features of the data
+    offset : float
+        (default 0., optional) mean removed from the targets of a regression tree
+
+    Returns
+    -------
+    Tree
+        the root of the tree, its nodes registered in the current TreeModel like any other
+    """
+    importances = np.zeros(n_features)
+    built = [None]*len(nodes)
+    subtree_end = [0]*len(nodes)
+    # reversed preorder : the children are built before their parent
+    for i in range(len(nodes) - 1, -1, -1):
+        node = nodes[i]
+        if node["split"] is None:
+            T = Tree_empty()
+            subtree_end[i] = i + 1
+        else:
+            f, threshold = node["split"]
+            left = i + 1
+            right = subtree_end[left]
+            subtree_end[i] = subtree_end[right]
+            div = "xy"[f] if n_features <= 2 else f
+            T = Tree_filled(built[left], built[right], threshold, div)
+            importances[f] += node["n"]*node["impurity"] - sum(nodes[c]["n"]*nodes[c]["impurity"]
+                                                               for c in (left, right))
+        counts = node["counts"]
+        if classes is None:
+            T.value = offset + counts[1]/counts[0]
+        else:
+            T.value = classes[int(np.argmax(counts))]
+        T.n_samples = node["n"]
+        T.impurity = node["impurity"]
+        built[i] = T
+    total = importances.sum()
+    built[0].feature_importances = importances/total if total > 0 else importances
+    built[0].n_features = n_features
+    built[0].regression = classes is None
+    return built[0]
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____\___/|_|___/___/\___||___/
+
+class WorkerPool:
+    """
+    pool of processes having some arrays in shared memory (see share()), kept for several trainings :
+    the arrays are written in place by the main process, the workers reading the new values
+    without the arrays being copied or sent again
+
+        with WorkerPool({"codes": codes, "stats": stats}, 4) as pool :
+            for ... :
+                T = fit(X, y, splitter="hist", bins=(codes, edges), pool=pool)
+
+    Attributes
+    ----------
+    executor : ProcessPoolExecutor
+        the processes, their _shared dict holding the arrays, see _attach()
+    arrays : dict[str, np.ndarray]
+        the shared arrays, as seen by the main process
+    n_jobs : int
+        number of processes
+    """
+
+    def __init__(self, arrays:dict, n_jobs:int):
+        """
+        Parameters
+        ----------
+        arrays : dict[str, np.ndarray]
+            the arrays to share, by name, their shapes and types being kept
+        n_jobs : int
+            number of processes
+        """
+        self.n_jobs = n_jobs
+        self._blocks, spec = share(arrays)
+        self.arrays = _views(self._blocks, spec)
+        self.executor = ProcessPoolExecutor(n_jobs, initializer=_attach, initargs=(spec,))
+
+    def write(self, arrays:dict):
+        """
+        replaces the values of some shared arrays, the workers having to be idle
+
+        Parameters
+        ----------
+        arrays : dict[str, np.ndarray]
+            the new values, by name, of the same shapes as the shared arrays
+        """
+        for name, a in arrays.items():
+            if self.arrays[name].shape != np.shape(a):
+                raise ValueError(f'the shared "{name}" array is {self.arrays[name].shape}, not {np.shape(a)}')
+            self.arrays[name][...] = a
+
+    def close(self):
+        """
+        stops the processes and frees the shared memory
+        """
+        self.executor.shutdown()
+        # the arrays of the main process are dropped first, see _views()
+        self.arrays = {}
+        release(self._blocks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,309 +1,907 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Fri Jun 24 11:26:25 2022
-
-@author: Crambes
-"""
-
-#  _____                            _       
-# |_   _|                          | |      
-#   | |  _ __ ___  _ __   ___  _ __| |_ ___ 
-#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
-#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
-# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
-#                 | |                       
-#                 |_|
-
-from abc import ABC
-
-#   _____ _                         
-#  / ____| |                        
-# | |    | | __ _ ___ ___  ___  ___ 
-# | |    | |/ _` / __/ __|/ _ \/ __|
-# | |____| | (_| \__ \__ \  __/\__ \
-#  \_____|_|\__,_|___/___/\___||___/
-
-class Tree(ABC) :
-    """
-    abstract class for tree structure
-
-    Class Attributes
-    ----------
-    n_tot : int
-        total nodes counter
-    all_nodes : list[Tree]
-        list of all the created nodes ordered by ids
-    ROOT : Tree
-        the tree's root
-
-    Attributes
-    ----------
-    id : int
-        node id
-    depth : int
-        node depth (0 for the root, 1 for its children, 2 for the grandchildren...)
-    pos : list
-        [x,y] the position of the node in the graphic representation
-    parent : Tree
-        the reference to the parent node, except for the ROOT that has None parent
-    scale : (float,float)
-        (scale_x, scale_y) multiplicative ratio to adjust the position of the nodes
-    xy_ratio : float
-        ratio that will widen the distance between two children of the same node if bigger
-    """
-    n_tot = 0
-    all_nodes = []
-    ROOT = None
-
-    def __init__(self):
-        self.id = Tree.n_tot
-        Tree.n_tot += 1
-        self.depth = 0
-        self.pos = (0,0)
-        self.parent = None
-        # display and scaling attributes
-        self.scale = (1,1)
-        self.xy_ratio = 1
-        # adding node to the static list of nodes
-        self.all_nodes.append(self)
-
-    def define_parent(self, parent:Tree):
-        """
-        assigns parent to the node
-
-        Parameters
-        ----------
-        parent : Tree
-            parent node
-        """
-        self.parent = parent
-
-    def get_pos(self):
-        """
-        position getter, using the scaling factors
-
-        Returns
-        -------
-        (float, float)
-            node position
-        """
-        return (self.pos[0]*self.scale[0], self.pos[1]*self.scale[1])
-
-    @staticmethod
-    def update_params(self, depth:int=0):
-        """
-        update position, depth and tree ROOT
-        the parent parameter is given to its children, and not defined by children
-
-        Parameters
-        ----------
-        depth : int
-            (default 0, optional) parent's depth
-        """
-        ...
-
-    @staticmethod
-    def isempty(self):
-        """
-        where or not the node is empty
-
-        Returns
-        -------
-        bool
-        """
-        ...
-
-    @staticmethod
-    def __str__(self):
-        ...
-
-    @classmethod
-    def reset(cls):
-        """
-        empty the class attributes for the creation of a new Tree
-        """
-        cls.n_tot = 0
-        cls.all_nodes = []
-        cls.ROOT = None
-
-    
-class Tree_empty(Tree):
-    """
-    subclass of the leaf nodes, cannot be a parent node.
-    """
-    def __init__(self):
-        super().__init__()
-        self.label=""
-    
-    def isempty(self):
-        return True
-    
-    def Tdeepcopy(self):
-        return Tree_empty()
-    
-    def returnLNR(self):
-        return []
-
-    def update_params(self, depth:int=0):
-        self.depth = depth
-        if self.depth == 0 :
-            Tree.ROOT = self
-    
-    def lines(self, region:list):
-        pass
-
-    def __str__(self):
-        """
-        to string function
-
-        Returns
-        -------
-        str
-            "EmptyNode : depth, id"
-        """
-        return f"EmptyNode : depth={self.depth}, id={self.id}"
-    
-class Tree_filled(Tree):
-    """
-    subclass of parent node
-    
-    Attributs
-    ----------
-    l : Tree
-        left child node
-    r : Tree
-        right child node
-    s : float
-        node's value for the bifurcation rule
-    div : string
-        ("x" or "y") axis where the division occurs
-    label : str
-        node's label
-    line : list
-        [[x0,y0],[x1,y1]] separation line associated with the node
-    """
-    
-    def __init__(self,
-                 left:Tree,
-                 right:Tree,
-                 sep:float,
-                 div="",
-                 scale=(1,1),
-                 xy_ratio=1):
-        super().__init__()
-        # if separation is vertical,
-        self.l = left # this is the bottom
-        self.r = right # and this is the top
-        # adding parent parameter for the two children
-        self.l.define_parent(self)
-        self.r.define_parent(self)
-
-        # generating the elements for the separation plot and the node's label
-        self.s = sep
-        self.div = div
-        self.label = div + "<" + str(sep)
-        self.line = []
-
-        # scaling and display parameters
-        self.scale=scale
-        self.xy_ratio=xy_ratio
-        self.update_params()
-
-    def __str__(self):
-        """
-        to string function
-
-        Returns
-        -------
-        str
-            "FilledNode : depth, id, label, left, right"
-        """
-        return f"FilledNode : depth={self.depth}, id={self.id}, label={self.label}, left={self.l.id}, right={self.r.id}"
-    
-    def isempty(self):
-        return False
-    
-    def isleaf(self):
-        """
-        whether or not the node has empty children
-
-        Returns
-        -------
-        bool
-        """
-        return (self.l.isempty() and self.r.isempty())
-
-    
-    def Tdeepcopy(self):
-        """
-        returns a deep copy of the current node and its children, no aliasing
-        """
-        return Tree_filled(self.l.Tdeepcopy(), self.r.Tdeepcopy(), self.s, self.div)
-
-    def update_params(self, depth:int=0):
-        """
-        update tree parameters
-
-        Parameters
-        ----------
-        depth : int
-            (default:0, optionnal) parent's node depth
-        """
-        # update depth
-        self.depth = depth
-        # update ROOT
-        if self.depth == 0 :
-            Tree.ROOT = self
-        # update children positions
-        self.l.pos = (self.pos[0] - self.xy_ratio/(1+self.depth), self.pos[1] - 0.5)
-        self.r.pos = (self.pos[0] + self.xy_ratio/(1+self.depth), self.pos[1] - 0.5)
-        # transitive relation of the scaling factors
-        self.l.xy_ratio = self.xy_ratio
-        self.r.xy_ratio = self.xy_ratio
-        self.l.scale = self.scale
-        self.r.scale = self.scale
-        # recursion on the children
-        self.l.update_params(depth + 1)
-        self.r.update_params(depth + 1)
-    
-    def lines(self, region:list[list]):
-        """
-        compute the separation line associated to the node
-
-        Parameters
-        ----------
-        region : list[list]
-            region to decompose by the current node
-            [[x1,y1],[x2,y2]] are the corner describing a region of the plan
-        """
-        
-        if self.isleaf():
-            # if it is a leaf, we cut on the axis
-
-            if self.div == "x":
-                self.line = [[self.s, region[0][1]], [self.s ,region[1][1]]]
-            elif self.div == "y" :
-                self.line = [[region[0][0], self.s], [region[1][0], self.s]]
-        
-        else :
-            # if it is not a leaf, we cut and we compute the two new regions
-            if self.div=="x" :
-                #on calcule les deux nouvelles régions créées
-                rightRegion= [[self.s,region[0][1]],[region[1][0],region[1][1]]]
-                leftRegion = [[region[0][0],region[0][1]],[self.s,region[1][1]]]
-                l = [[self.s, region[0][1]], [self.s ,region[1][1]]]
-                
-                # we add the line to the list and we do a recursion on the child nodes
-                self.line = l
-                self.l.lines(leftRegion)
-                self.r.lines(rightRegion)
-
-            # same thing
-            elif self.div=="y" :
-                botRegion = [[region[0][0],region[0][1]],[region[1][0],self.s]]
-                topRegion = [[region[0][0],self.s],[region[1][0],region[1][1]]]
-                l = [[region[0][0], self.s], [region[1][0], self.s]]
-
-                self.line = l
-                self.l.lines(botRegion)
-                self.r.lines(topRegion)
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Jun 24 11:26:25 2022
+
+@author: Crambes
+"""
+
+#  _____                            _       
+# |_   _|                          | |      
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___ 
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |                       
+#                 |_|
+
+from abc import ABC
+import functools
+import hashlib
+import threading
+
+#   _____                _              _
+#  / ____|              | |            | |
+# | |     ___  _ __  ___| |_ __ _ _ __ | |_ ___
+# | |    / _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | |___| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \_____\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+
+# correspondence between the "div" strings of the Tree_filled nodes and the feature indices of the data
+AXES = {"x": 0, "y": 1}
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def default_label(div, sep:float) -> str:
+    """
+    label given to a Tree_filled node that was not renamed
+
+    Parameters
+    ----------
+    div : str or int
+        ("x" or "y") axis where the division occurs, or index of the feature
+    sep : float
+        node's value for the bifurcation rule
+
+    Returns
+    -------
+    str
+        "div<sep", or "X[div]<sep" for a feature index
+    """
+    if isinstance(div, str):
+        return div + "<" + str(sep)
+    return f"X[{div}]<{sep}"
+
+def memoize_subtree(function):
+    """
+    decorator caching the results of function(T, *args) by structural hash of T (see Tree.merkle_hash()) :
+    the work done for a subtree is reused for every identical subtree, in the same tree or in another one.
+    the function must only depend on the structure of T, not on the identity of its nodes (ids, positions...),
+    and its other arguments must be hashable
+
+    Parameters
+    ----------
+    function : function
+        the function to memoize, taking a Tree as first argument
+
+    Returns
+    -------
+    function
+        the memoized function, its cache being the dict in its "cache" attribute
+    """
+    cache = {}
+    @functools.wraps(function)
+    def memoized(T, *args):
+        key = (T.merkle_hash(), args)
+        if key not in cache:
+            cache[key] = function(T, *args)
+        return cache[key]
+    memoized.cache = cache
+    return memoized
+
+def _plain(value):
+    """
+    python version of a value, so that equal values are written the same way in the hashes :
+    numpy scalars become python ones, numbers floats (1 == 1.0), and unknown values (None or NaN) None
+    """
+    value = value.item() if hasattr(value, "item") else value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = float(value)
+        return None if value != value else value
+    return value
+
+def _axis(div):
+    """
+    feature index of a "div", "x" and "y" being the features 0 and 1 : the views of the arrays name them
+    only for the trees of the scenes
+    """
+    return AXES.get(div, div) if isinstance(div, str) else int(div)
+
+def _laid_out(state:dict, pos:tuple, depth:int, root, xy_ratio:float, scale:tuple) -> bool:
+    """
+    whether the node of the __dict__ state is clean and already laid out at pos, below root
+    """
+    return (not state["_dirty"] and state["_root"] is root and state["_pos"] == pos and state["_depth"] == depth
+            and state["scale"] == scale and state["xy_ratio"] == xy_ratio and state["layout"] is None)
+
+def _is_default_label(label:str, div, sep) -> bool:
+    """
+    whether or not a label is the default_label() of a node, the threshold being written as given,
+    as a float or as an int when it is whole ("x<0" and "x<0.0" : the arrays store the thresholds as floats)
+    """
+    spellings = {float(sep)}
+    if float(sep).is_integer():
+        spellings.add(int(sep))
+    return any(label == default_label(div, s) for s in spellings)
+
+#   _____ _                         
+#  / ____| |                        
+# | |    | | __ _ ___ ___  ___  ___ 
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class TreeModel :
+    """
+    registry owning the nodes created while it is active.
+    every thread has its own default registry, so trees can be built concurrently,
+    and a registry can be activated explicitly with the "with" statement :
+
+        with TreeModel() as model :
+            T = Tree_filled(Tree_empty(), Tree_empty(), 0, "x")
+
+    a registry may hold several trees (a forest), see roots()
+
+    Attributes
+    ----------
+    n_tot : int
+        total nodes counter
+    all_nodes : list[Tree]
+        list of all the nodes created in the registry ordered by ids
+    ROOT : Tree
+        root of the last laid out tree
+    """
+    _local = threading.local()
+
+    def __init__(self):
+        self.n_tot = 0
+        self.all_nodes = []
+        self.ROOT = None
+        self._lock = threading.Lock()
+
+    def register(self, node:"Tree") -> int:
+        """
+        adds a node to the registry
+
+        Parameters
+        ----------
+        node : Tree
+            the new node
+
+        Returns
+        -------
+        int
+            the id given to the node
+        """
+        with self._lock:
+            id = self.n_tot
+            self.n_tot += 1
+            self.all_nodes.append(node)
+        return id
+
+    def __getstate__(self):
+        # the lock cannot be copied or pickled : the copy gets its own, see __setstate__()
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def roots(self) -> list:
+        """
+        roots of the trees held by the registry
+
+        Returns
+        -------
+        list[Tree]
+            the nodes without parent, ordered by ids
+        """
+        return [n for n in self.all_nodes if n.parent is None]
+
+    @classmethod
+    def _stack(cls) -> list:
+        """
+        stack of the registries activated in the current thread, the default one at the bottom
+        """
+        if not hasattr(cls._local, "stack"):
+            cls._local.stack = [cls()]
+        return cls._local.stack
+
+    @classmethod
+    def current(cls) -> "TreeModel":
+        """
+        registry in which the nodes created by the current thread are stored
+
+        Returns
+        -------
+        TreeModel
+        """
+        return cls._stack()[-1]
+
+    @classmethod
+    def reset(cls):
+        """
+        replaces the current registry of the thread by an empty one
+        """
+        cls._stack()[-1] = cls()
+
+    def __enter__(self):
+        self._stack().append(self)
+        return self
+
+    def __exit__(self, *exc):
+        # the top of the stack, which reset() may have replaced since __enter__()
+        self._stack().pop()
+
+
+class Tree(ABC) :
+    """
+    abstract class for tree structure
+
+    Attributes
+    ----------
+    model : TreeModel
+        the registry owning the node
+    id : int
+        node id, unique in its registry
+    depth : int
+        node depth (0 for the root, 1 for its children, 2 for the grandchildren...)
+    pos : list
+        [x,y] the position of the node in the graphic representation
+    parent : Tree
+        the reference to the parent node, except for the ROOT that has None parent
+    scale : (float,float)
+        (scale_x, scale_y) multiplicative ratio to adjust the position of the nodes
+    xy_ratio : float
+        ratio that will widen the distance between two children of the same node if bigger
+    layout : Layout
+        layout engine computing the positions (see layout.py), None for the classic update_params
+    value : object
+        value predicted for the data reaching the node, None if unknown
+    n_samples : int
+        number of training samples that reached the node, 0 if the tree was not trained
+    impurity : float
+        impurity of the training samples that reached the node, None if the tree was not trained
+    """
+
+    # whether or not the node can become the child of a new node (not the views of a TreeArrays)
+    _graftable = True
+    # attributes on which the layout of the subtree depends
+    _LAYOUT_ATTRIBUTES = {"l", "r", "parent", "scale", "xy_ratio", "layout"}
+    # attributes copied in the compiled arrays : the routing of the data, and the statistics and labels
+    # read through compile() (pruning, importances, regions, TreeSHAP...)
+    # the lines are copied too, but they are left out of the set : they are only written by lines(),
+    # which drops the arrays of the whole tree itself instead of once per node
+    _COMPILED_ATTRIBUTES = {"l", "r", "parent", "s", "div", "value", "label",
+                            "n_samples", "impurity", "n_features", "regression"}
+    # attributes on which the structural hash of the subtree depends
+    _HASH_ATTRIBUTES = {"l", "r", "s", "div", "label", "value"}
+
+    def __init__(self):
+        # a new node has no parent and nothing cached, the __setattr__ hook would have nothing to drop :
+        # the attributes are written in the node's __dict__, which keeps the construction cheap
+        state = self.__dict__
+        # cache of the arrays used to route data, see compile()
+        state["_compiled"] = None
+        # cache of the structural hash, see merkle_hash()
+        state["_hash"] = None
+        # layout flags : the positions are computed lazily, see _update_layout()
+        state["_dirty"] = True
+        state["_root"] = None
+        state["parent"] = None
+        # adding node to the registry of the thread
+        state["model"] = TreeModel.current()
+        state["id"] = self.model.register(self)
+        state["_depth"] = 0
+        state["_pos"] = (0,0)
+        # display and scaling attributes
+        state["scale"] = (1,1)
+        state["xy_ratio"] = 1
+        state["layout"] = None
+        state["value"] = None
+        # training statistics
+        state["n_samples"] = 0
+        state["impurity"] = None
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in Tree._LAYOUT_ATTRIBUTES:
+            self.mark_dirty()
+            if name == "parent" and self._root is not None:
+                self.forget_root()
+        if name in Tree._COMPILED_ATTRIBUTES:
+            self.mark_modified()
+        if name in Tree._HASH_ATTRIBUTES:
+            self.mark_rehash()
+
+    def mark_modified(self):
+        """
+        drops the compiled arrays of the node and of its ancestors, the data they copied having changed
+        """
+        node = self
+        while node is not None:
+            node._compiled = None
+            node = node.parent
+
+    def mark_rehash(self):
+        """
+        drops the structural hash of the node and of its ancestors.
+        a hashed node only has hashed descendants, so the walk stops at the first node without hash
+        """
+        node = self
+        while node is not None and node._hash is not None:
+            node._hash = None
+            node = node.parent
+
+    def merkle_hash(self) -> str:
+        """
+        structural hash of the subtree below this node, computed from the split axis, threshold and label
+        of the node and from the hashes of its children (the value and label for a leaf) :
+        two subtrees have the same hash when they are identical, whatever their ids and positions.
+        the axis is hashed as a feature index and the default labels are not hashed, so that a tree and
+        the views of its arrays (see compile()) have the same hashes.
+        the hashes are kept in the nodes, so that after a modification only the hashes of the
+        modified node and of its ancestors are computed again.
+        they do not depend on the python process, and can be stored (see memoize_subtree())
+
+        Returns
+        -------
+        str
+            the hexadecimal hash
+        """
+        # (node, right, left) preorder of the nodes without hash, reversed : children first
+        order = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._hash is not None:
+                continue
+            order.append(node)
+            if not node.isempty():
+                stack.append(node.l)
+                stack.append(node.r)
+        hashes = {}
+        for node in reversed(order):
+            if node.isempty():
+                content = repr(("leaf", node.label, _plain(node.value)))
+            else:
+                children = [hashes.get(id(c)) or c._hash for c in (node.l, node.r)]
+                label = None if _is_default_label(node.label, node.div, node.s) else node.label
+                content = repr(("node", _axis(node.div), float(node.s), label, *children))
+            h = hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+            node._hash = h
+            hashes[id(node)] = h
+        return hashes.get(id(self)) or self._hash
+
+    def mark_dirty(self):
+        """
+        flags the node's subtree as needing a new layout.
+        the flag goes up to the root, so that a clean node never has a dirty descendant
+        """
+        node = self
+        while node is not None and not node._dirty:
+            node._dirty = True
+            node = node.parent
+
+    def forget_root(self):
+        """
+        drops the root kept by the laid out nodes of the subtree, the node having a new parent :
+        the cached root of a node is then always its real root.
+        the descendants of a laid out node are laid out too, so the walk stops at the nodes without root
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            state = node.__dict__
+            if state["_root"] is None:
+                continue
+            state["_root"] = None
+            state["_dirty"] = True
+            if not node.isempty():
+                stack.append(node.l)
+                stack.append(node.r)
+
+    def _update_layout(self):
+        """
+        lays out the node's tree if the node's position may be outdated.
+        only the dirty subtrees are visited, see update_params(only_dirty=True)
+        """
+        root = self._root
+        if root is not None and root.parent is None and not root._dirty:
+            return
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        if root._dirty or self._root is not root:
+            root.update_params(only_dirty=True)
+
+    @property
+    def depth(self) -> int:
+        self._update_layout()
+        return self._depth
+
+    @depth.setter
+    def depth(self, value:int):
+        self._depth = value
+
+    @property
+    def pos(self) -> tuple:
+        self._update_layout()
+        return self._pos
+
+    @pos.setter
+    def pos(self, value:tuple):
+        self._pos = value
+        self.mark_dirty()
+
+    @property
+    def all_nodes(self) -> list:
+        """
+        all the nodes of the node's registry, which may contain other trees.
+        use nodes() to get the nodes of this tree only
+
+        Returns
+        -------
+        list[Tree]
+        """
+        return self.model.all_nodes
+
+    def define_parent(self, parent:"Tree"):
+        """
+        assigns parent to the node
+
+        Parameters
+        ----------
+        parent : Tree
+            parent node
+        """
+        self.parent = parent
+
+    def get_pos(self):
+        """
+        position getter, using the scaling factors
+
+        Returns
+        -------
+        (float, float)
+            node position
+        """
+        return (self.pos[0]*self.scale[0], self.pos[1]*self.scale[1])
+
+    def nodes(self) -> list:
+        """
+        nodes of the tree the node belongs to, found by walking from its root
+        instead of scanning the registry
+
+        Returns
+        -------
+        list[Tree]
+            the nodes of the tree ordered by ids
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        nodes = []
+        stack = [root]
+        while stack:
+            n = stack.pop()
+            nodes.append(n)
+            if not n.isempty():
+                stack.append(n.r)
+                stack.append(n.l)
+        nodes.sort(key=lambda n: n.id)
+        return nodes
+
+    def to_arrays(self):
+        """
+        struct-of-arrays copy of the tree below this node, for big trees.
+        the nodes of the copy are available as Tree_filled/Tree_empty views
+
+        Returns
+        -------
+        TreeArrays
+            the arrays describing the tree, this node being the node 0
+        """
+        from tree_arrays import TreeArrays
+        return TreeArrays.from_tree(self)
+
+    def compile(self):
+        """
+        struct-of-arrays version of the tree below this node, used to route data.
+        it is kept until the tree is modified
+
+        Returns
+        -------
+        TreeArrays
+            the arrays describing the tree, this node being the node 0
+        """
+        if self._compiled is None:
+            from tree_arrays import TreeArrays
+            self._compiled = TreeArrays.from_tree(self, positions=False)
+        return self._compiled
+
+    def apply(self, X):
+        """
+        finds the leaf reached by every row of X, the rows going left when X[:, feature] < s.
+        all the rows go down the tree together, one level at a time
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data, the feature of a node being 0 for "x" and 1 for "y"
+
+        Returns
+        -------
+        np.ndarray[int]
+            the id of the leaf reached by every row
+        """
+        A = self.compile()
+        return A.node_ids[A.apply(X)]
+
+    def predict(self, X):
+        """
+        value of the leaf reached by every row of X, see apply()
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        np.ndarray
+            the value predicted for every row
+        """
+        A = self.compile()
+        return A.value[A.apply(X)]
+
+    def decision_path(self, X):
+        """
+        nodes visited by every row of X, and the comparisons made on the way, see TreeArrays.decision_path().
+        it needs scipy
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+
+        Returns
+        -------
+        tuple[np.ndarray, scipy.sparse.csr_matrix, np.ndarray[bool]]
+            the ids of the nodes (the columns of the matrix), the (n_samples, n_nodes) matrix of the visited nodes,
+            and whether every visited node sent the row to the left
+        """
+        return self.compile().decision_path(X)
+
+    def bounds(self, lower=None, upper=None):
+        """
+        k-dimensional version of lines() : the hyper-rectangle of every node of the tree below this one,
+        computed top-down with one vectorized step per level, see TreeArrays.bounds()
+
+        Parameters
+        ----------
+        lower : np.ndarray
+            (default None, optional) (n_features,) lower corner of the region of this node, -inf when None
+        upper : np.ndarray
+            (default None, optional) (n_features,) upper corner of the region of this node, +inf when None
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, np.ndarray]
+            the ids of the nodes, and the (n_nodes, n_features) lower and upper corners of their regions
+        """
+        A = self.compile()
+        lo, hi = A.bounds(lower, upper)
+        return A.node_ids, lo, hi
+
+    @staticmethod
+    def update_params(self, depth:int=0, only_dirty:bool=False, root=None):
+        """
+        update position, depth and tree ROOT
+        the parent parameter is given to its children, and not defined by children
+
+        Parameters
+        ----------
+        depth : int
+            (default 0, optional) parent's depth
+        only_dirty : bool
+            (default False, optional) skip the subtrees that are clean and whose position did not change
+        root : Tree
+            (default None, optional) root of the tree, the node itself when None
+        """
+        ...
+
+    @staticmethod
+    def isempty(self):
+        """
+        where or not the node is empty
+
+        Returns
+        -------
+        bool
+        """
+        ...
+
+    @staticmethod
+    def __str__(self):
+        ...
+
+    @classmethod
+    def reset(cls):
+        """
+        starts a new registry for the creation of a new Tree in the current thread
+        """
+        TreeModel.reset()
+
+    
+class Tree_empty(Tree):
+    """
+    subclass of the leaf nodes, cannot be a parent node.
+    """
+    def __init__(self):
+        super().__init__()
+        self.__dict__["label"] = ""
+    
+    def isempty(self):
+        return True
+    
+    def Tdeepcopy(self):
+        copy = Tree_empty()
+        copy.value = self.value
+        copy.n_samples = self.n_samples
+        copy.impurity = self.impurity
+        copy._hash = self._hash
+        return copy
+    
+    def returnLNR(self):
+        return []
+
+    def update_params(self, depth:int=0, only_dirty:bool=False, root=None):
+        state = self.__dict__
+        state["_depth"] = depth
+        state["_root"] = self if root is None else root
+        state["_dirty"] = False
+        if depth == 0 :
+            self.model.ROOT = self
+    
+    def lines(self, region:list):
+        pass
+
+    def __str__(self):
+        """
+        to string function
+
+        Returns
+        -------
+        str
+            "EmptyNode : depth, id"
+        """
+        return f"EmptyNode : depth={self.depth}, id={self.id}"
+    
+class Tree_filled(Tree):
+    """
+    subclass of parent node
+    
+    Attributs
+    ----------
+    l : Tree
+        left child node
+    r : Tree
+        right child node
+    s : float
+        node's value for the bifurcation rule
+    div : string or int
+        ("x" or "y") axis where the division occurs, or index of the feature for data with more dimensions
+    label : str
+        node's label
+    line : list
+        [[x0,y0],[x1,y1]] separation line associated with the node
+    """
+    
+    def __init__(self,
+                 left:Tree,
+                 right:Tree,
+                 sep:float,
+                 div="",
+                 scale=(1,1),
+                 xy_ratio=1,
+                 layout=None):
+        # checked before the node is registered, so that no half-built node is left in the registry
+        if not (left._graftable and right._graftable):
+            raise TypeError("the views of a TreeArrays cannot be grafted in another tree, call to_tree() first")
+        super().__init__()
+        # the new node is written in its __dict__ like in Tree.__init__, its children go through the hook
+        state = self.__dict__
+        # if separation is vertical,
+        state["l"] = left # this is the bottom
+        state["r"] = right # and this is the top
+        # adding parent parameter for the two children
+        self.l.define_parent(self)
+        self.r.define_parent(self)
+
+        # generating the elements for the separation plot and the node's label
+        state["s"] = sep
+        state["div"] = div
+        state["label"] = default_label(div, sep)
+        state["line"] = []
+
+        # scaling and display parameters
+        # the layout is only computed when a position is needed
+        state["scale"] = scale
+        state["xy_ratio"] = xy_ratio
+        state["layout"] = layout
+
+    def __str__(self):
+        """
+        to string function
+
+        Returns
+        -------
+        str
+            "FilledNode : depth, id, label, left, right"
+        """
+        return f"FilledNode : depth={self.depth}, id={self.id}, label={self.label}, left={self.l.id}, right={self.r.id}"
+    
+    def isempty(self):
+        return False
+    
+    def isleaf(self):
+        """
+        whether or not the node has empty children
+
+        Returns
+        -------
+        bool
+        """
+        return (self.l.isempty() and self.r.isempty())
+
+    
+    def Tdeepcopy(self):
+        """
+        returns a deep copy of the current node and its children, no aliasing
+        """
+        # the nodes in reversed (node, right, left) order are in (left, right, node) order :
+        # every copy is made after the copies of its children, in the order of the recursive version
+        order = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            if not node.isempty():
+                stack.append(node.l)
+                stack.append(node.r)
+        copies = {}
+        for node in reversed(order):
+            if node.isempty():
+                copy = Tree_empty()
+            else:
+                copy = Tree_filled(copies[id(node.l)], copies[id(node.r)], node.s, node.div,
+                                   scale=node.scale, xy_ratio=node.xy_ratio, layout=node.layout)
+            # the copy has no parent yet and no cache to drop : its attributes are written in its __dict__
+            state = copy.__dict__
+            state["label"] = node.label
+            state["value"] = node.value
+            state["n_samples"] = node.n_samples
+            state["impurity"] = node.impurity
+            # an identical copy has the same structural hash
+            state["_hash"] = node._hash
+            copies[id(node)] = copy
+        return copies[id(self)]
+
+    def returnLNR(self):
+        """
+        returns the parent nodes of the tree in left-node-right order
+
+        Returns
+        -------
+        list[Tree_filled]
+        """
+        LNR = []
+        stack = []
+        node = self
+        while stack or not node.isempty():
+            # going down to the leftmost parent node, then visiting it before its right subtree
+            while not node.isempty():
+                stack.append(node)
+                node = node.l
+            node = stack.pop()
+            LNR.append(node)
+            node = node.r
+        return LNR
+
+    def update_params(self, depth:int=0, only_dirty:bool=False, root=None):
+        """
+        update tree parameters
+
+        Parameters
+        ----------
+        depth : int
+            (default:0, optionnal) parent's node depth
+        only_dirty : bool
+            (default:False, optionnal) skip the children that are clean and already at the right place
+        root : Tree
+            (default:None, optionnal) root of the tree, the node itself when None
+        """
+        # the positions are computed by the layout engine if the tree has one
+        if self.layout is not None :
+            self.layout.apply(self, depth, root)
+            return
+        # update depth and ROOT
+        if root is None :
+            root = self
+        state = self.__dict__
+        state["_depth"] = depth
+        state["_root"] = root
+        state["_dirty"] = False
+        if depth == 0 :
+            self.model.ROOT = self
+        # the scaling factors are transitive : every node below takes the ones of this node
+        xy_ratio, scale = self.xy_ratio, self.scale
+        # level by level instead of a recursion, so that very deep trees can be laid out.
+        # the attributes are written in the nodes' __dict__ : the flags are maintained here,
+        # and going through the __setattr__ hook would multiply the cost per node
+        level = [state]
+        while level:
+            depth += 1
+            shift = xy_ratio/depth
+            below = []
+            for state in level:
+                if "l" not in state:
+                    # a leaf
+                    continue
+                x, y = state["_pos"]
+                y -= 0.5
+                left, right = state["l"].__dict__, state["r"].__dict__
+                left_pos, right_pos = (x - shift, y), (x + shift, y)
+                # the clean children already at their place keep their subtree as it is
+                if not only_dirty or not _laid_out(left, left_pos, depth, root, xy_ratio, scale):
+                    below.append(left)
+                if not only_dirty or not _laid_out(right, right_pos, depth, root, xy_ratio, scale):
+                    below.append(right)
+                # update children positions
+                left["_pos"], right["_pos"] = left_pos, right_pos
+                left["_depth"] = right["_depth"] = depth
+                left["_root"] = right["_root"] = root
+                left["_dirty"] = right["_dirty"] = False
+                left["xy_ratio"] = right["xy_ratio"] = xy_ratio
+                left["scale"] = right["scale"] = scale
+                left["layout"] = right["layout"] = None
+            level = below
+    
+    def lines(self, region:list[list]):
+        """
+        compute the separation line associated to the node, and to all of its children
+
+        Parameters
+        ----------
+        region : list[list]
+            region to decompose by the current node
+            [[x1,y1],[x2,y2]] are the corner describing a region of the plan
+        """
+        # explicit stack of the nodes to cut, with the region they decompose
+        # the compiled arrays copy the lines : the ones of the ancestors are dropped once here,
+        # instead of a mark_modified() per node that would walk up to the root every time,
+        # and the ones kept in the parent nodes of the subtree are dropped on the way (the leaves have no line).
+        # the attributes are read and written in the nodes' __dict__, like update_params does
+        self.mark_modified()
+        # the regions are kept as the corners x0, y0, x1, y1 on the stack, and not as lists of lists
+        (x0, y0), (x1, y1) = region
+        stack = [(self.__dict__, x0, y0, x1, y1)]
+        while stack:
+            state, x0, y0, x1, y1 = stack.pop()
+            if state["_compiled"] is not None:
+                state["_compiled"] = None
+            s = state["s"]
+            right, left = state["r"].__dict__, state["l"].__dict__
+
+            if state["div"] == "x":
+                # the line cuts the region on the x axis, and the two new regions are computed
+                state["line"] = [[s, y0], [s, y1]]
+                if "l" in right:
+                    stack.append((right, s, y0, x1, y1))
+                if "l" in left:
+                    stack.append((left, x0, y0, s, y1))
+
+            # same thing
+            elif state["div"] == "y":
+                state["line"] = [[x0, s], [x1, s]]
+                if "l" in right:
+                    stack.append((right, x0, s, x1, y1)) # top region
+                if "l" in left:
+                    stack.append((left, x0, y0, x1, s)) # bottom region
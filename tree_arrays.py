@@ -0,0 +1,1083 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+import numpy as np
+
+from tree import Tree, Tree_filled, Tree_empty, AXES, default_label
+
+#   _____                _              _
+#  / ____|              | |            | |
+# | |     ___  _ __  ___| |_ __ _ _ __ | |_ ___
+# | |    / _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | |___| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \_____\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+
+TREE_LEAF = -1 # child index of the leaves, and feature index of the leaves
+TREE_UNDEFINED = -2 # feature index of a node without any division axis
+
+# "div" strings of the Tree_filled nodes from the feature indices, see tree.AXES and TreeArrays.named_axes
+AXES_NAMES = {0: "x", 1: "y", TREE_UNDEFINED: ""}
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def feature_index(div) -> int:
+    """
+    index of the feature used by a node
+
+    Parameters
+    ----------
+    div : str or int
+        ("x" or "y") axis where the division occurs, or index of the feature
+
+    Returns
+    -------
+    int
+        the index of the feature, TREE_UNDEFINED for a node without division axis
+    """
+    if isinstance(div, str):
+        return AXES.get(div, TREE_UNDEFINED)
+    return int(div)
+
+def check_divisions(feature:np.ndarray):
+    """
+    raises a ValueError if one of the parent nodes has no division axis, the data could not go through it
+
+    Parameters
+    ----------
+    feature : np.ndarray[int]
+        feature index of the parent nodes, see feature_index()
+    """
+    if np.any(np.asarray(feature) == TREE_UNDEFINED):
+        raise ValueError("a node without division axis cannot route data")
+
+def is_regression(model, regression:bool=None) -> bool:
+    """
+    whether a model predicts numerical values or classes, from its training rather than from the type
+    of its values (a classifier of the classes 0.0 and 1.0 predicts floats)
+
+    Parameters
+    ----------
+    model : Tree | TreeArrays | Forest | GradientBoosting | HoeffdingTree
+        the model : the forests, the boosting and the streaming trees have classes (None for a regression),
+        the trees of training.fit() have their regression flag
+    regression : bool
+        (default None, optional) the answer when already known, taken from the model when None
+
+    Returns
+    -------
+    bool
+        True for a regression model, False for a classifier
+    """
+    if regression is not None:
+        return bool(regression)
+    if hasattr(model, "classes"):
+        return model.classes is None
+    A = model.compile() if isinstance(model, Tree) else model
+    if getattr(A, "regression", None) is None:
+        raise ValueError("the tree was not trained by training.fit(), give whether it is a regression in regression")
+    return bool(A.regression)
+
+def route(X:np.ndarray, left:np.ndarray, right:np.ndarray, feature:np.ndarray, threshold:np.ndarray,
+          node:np.ndarray, rows:np.ndarray=None) -> np.ndarray:
+    """
+    level-synchronous traversal of the TreeArrays and of the DecisionDAG : at each step, all the rows
+    still in a parent node go down one level at once, going left when X[row, feature] < threshold
+
+    Parameters
+    ----------
+    X : np.ndarray
+        (n_samples, n_features) data
+    left : np.ndarray[int]
+        left child of each node, TREE_LEAF for the leaves
+    right : np.ndarray[int]
+        right child of each node
+    feature : np.ndarray[int]
+        feature used by each node
+    threshold : np.ndarray[float64]
+        threshold of each node
+    node : np.ndarray[int]
+        node where every (node, row) pair starts, moved down in place
+    rows : np.ndarray[int]
+        (default None, optional) row of X of every pair, the pair i being the row i when None
+
+    Returns
+    -------
+    np.ndarray[int]
+        node, the leaf reached by every pair
+    """
+    check_divisions(feature[left != TREE_LEAF])
+    if rows is None:
+        rows = np.arange(len(node))
+    active = np.arange(len(node))
+    while len(active):
+        current = node[active]
+        inner = left[current] != TREE_LEAF
+        active, current = active[inner], current[inner]
+        go_left = X[rows[active], feature[current]] < threshold[current]
+        node[active] = np.where(go_left, left[current], right[current])
+    return node
+
+#   _____ _
+#  / ____| |
+# | |    | | __ _ ___ ___  ___  ___
+# | |    | |/ _` / __/ __|/ _ \/ __|
+# | |____| | (_| \__ \__ \  __/\__ \
+#  \_____|_|\__,_|___/___/\___||___/
+
+class TreeArrays:
+    """
+    struct-of-arrays storage of a tree : every node is an index in parallel NumPy arrays
+    instead of a python object. The nodes can still be used as Tree_filled/Tree_empty
+    through thin views (see node())
+
+    Attributes
+    ----------
+    left : np.ndarray[int32]
+        index of the left child of each node, TREE_LEAF for the leaves
+    right : np.ndarray[int32]
+        index of the right child of each node, TREE_LEAF for the leaves
+    parent : np.ndarray[int32]
+        index of the parent of each node, TREE_LEAF for the root
+    depth : np.ndarray[int32]
+        depth of each node
+    feature : np.ndarray[int32]
+        index of the division axis (0 for "x", 1 for "y"), TREE_LEAF for the leaves
+    threshold : np.ndarray[float64]
+        value of the bifurcation rule of each node
+    value : np.ndarray
+        value predicted for the data reaching each node, NaN if unknown
+    n_samples : np.ndarray[int64]
+        number of training samples that reached each node, 0 if unknown
+    impurity : np.ndarray[float64]
+        impurity of the training samples that reached each node, NaN if unknown
+    x : np.ndarray[float64]
+        x position of each node in the graphic representation
+    y : np.ndarray[float64]
+        y position of each node in the graphic representation
+    n_nodes : int
+        number of nodes stored
+    scale : (float,float)
+        (scale_x, scale_y) multiplicative ratio to adjust the position of the nodes
+    xy_ratio : float
+        ratio that will widen the distance between two children of the same node if bigger
+    node_ids : np.ndarray[int]
+        ids of the Tree nodes the arrays were made from, the indices themselves otherwise
+    labels : dict[int, str]
+        labels differing from the default "div<sep" label, by node index
+    layout : Layout
+        layout engine computing the positions (see layout.py), None for the classic rule
+    named_axes : bool
+        whether or not the features 0 and 1 are the axes "x" and "y" of the scenes (see AXES_NAMES),
+        the "div" of the nodes being the feature indices otherwise. True for the arrays of the trees using them
+    n_features : int
+        number of features of the training data (see training.fit()), None when unknown
+    regression : bool
+        whether the tree was trained for a regression or for classes (see training.fit()), None when unknown
+    """
+
+    def __init__(self, capacity:int=16, scale=(1,1), xy_ratio=1):
+        capacity = max(int(capacity), 1)
+        self.left = np.full(capacity, TREE_LEAF, dtype=np.int32)
+        self.right = np.full(capacity, TREE_LEAF, dtype=np.int32)
+        self.parent = np.full(capacity, TREE_LEAF, dtype=np.int32)
+        self.depth = np.zeros(capacity, dtype=np.int32)
+        self.feature = np.full(capacity, TREE_LEAF, dtype=np.int32)
+        self.threshold = np.zeros(capacity, dtype=np.float64)
+        self.value = np.full(capacity, np.nan, dtype=np.float64)
+        self.n_samples = np.zeros(capacity, dtype=np.int64)
+        self.impurity = np.full(capacity, np.nan, dtype=np.float64)
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.n_nodes = 0
+        self._node_ids = None
+        # display and scaling attributes, shared by every node as in update_params
+        self.scale = scale
+        self.xy_ratio = xy_ratio
+        self.layout = None
+        self.named_axes = False
+        self.n_features = None
+        self.regression = None
+        self.labels = {}
+        self.node_lines = {}
+        # views are only created for the nodes that are actually accessed
+        self._views = {}
+
+    def __len__(self):
+        return self.n_nodes
+
+    @property
+    def nbytes(self) -> int:
+        """
+        memory used by the node arrays
+
+        Returns
+        -------
+        int
+            number of bytes used by the arrays of the used nodes
+        """
+        arrays = (self.left, self.right, self.parent, self.depth,
+                  self.feature, self.threshold, self.value, self.n_samples, self.impurity,
+                  self.x, self.y)
+        return sum(a.itemsize for a in arrays) * self.n_nodes
+
+    @property
+    def node_ids(self) -> np.ndarray:
+        if self._node_ids is None:
+            return np.arange(self.n_nodes)
+        return self._node_ids
+
+    @property
+    def root(self) -> Tree:
+        """
+        view of the root node, the last created node without parent
+
+        Returns
+        -------
+        Tree
+            the root node
+        """
+        roots = np.flatnonzero(self.parent[:self.n_nodes] == TREE_LEAF)
+        if len(roots) == 0:
+            raise ValueError("the tree is empty")
+        return self.node(int(roots[-1]))
+
+    def _grow(self, n:int):
+        """
+        makes room for at least n more nodes, doubling the capacity to keep the insertions amortized
+
+        Parameters
+        ----------
+        n : int
+            number of nodes to add
+        """
+        needed = self.n_nodes + n
+        capacity = len(self.left)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, fill in (("left", TREE_LEAF), ("right", TREE_LEAF), ("parent", TREE_LEAF),
+                           ("depth", 0), ("feature", TREE_LEAF), ("threshold", 0),
+                           ("n_samples", 0), ("impurity", np.nan), ("x", 0), ("y", 0)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:self.n_nodes] = old[:self.n_nodes]
+            setattr(self, name, new)
+        # the values may be of any type, see from_tree()
+        self.value = np.resize(self.value, capacity)
+        self.value[self.n_nodes:] = self._no_value()
+
+    def _no_value(self):
+        """
+        value of the nodes without value : NaN, None, or 0 for the value arrays of other types
+        """
+        kind = self.value.dtype.kind
+        if kind == "f":
+            return np.nan
+        if kind == "O":
+            return None
+        return np.zeros(1, dtype=self.value.dtype)[0]
+
+    def add_leaf(self, value=np.nan) -> int:
+        """
+        adds a leaf node, the array equivalent of Tree_empty()
+
+        Parameters
+        ----------
+        value : object
+            (default NaN, optional) value predicted by the leaf
+
+        Returns
+        -------
+        int
+            index of the new node
+        """
+        self._grow(1)
+        i = self.n_nodes
+        self.n_nodes += 1
+        self.value[i] = value
+        return i
+
+    def add_split(self, left:int, right:int, sep:float, div="") -> int:
+        """
+        adds a parent node above two existing nodes, the array equivalent of Tree_filled(left, right, sep, div)
+        the layout is not updated, call update_params() once the tree is built
+
+        Parameters
+        ----------
+        left : int
+            index of the left child node
+        right : int
+            index of the right child node
+        sep : float
+            node's value for the bifurcation rule
+        div : str or int
+            ("x" or "y") axis where the division occurs, or index of the feature
+
+        Returns
+        -------
+        int
+            index of the new node
+        """
+        self._grow(1)
+        i = self.n_nodes
+        self.n_nodes += 1
+        self.left[i] = left
+        self.right[i] = right
+        self.parent[left] = i
+        self.parent[right] = i
+        self.feature[i] = feature_index(div)
+        self.named_axes |= div in AXES
+        self.threshold[i] = sep
+        self.value[i] = self._no_value()
+        return i
+
+    def split_leaf(self, i:int, sep:float, div="") -> tuple[int, int]:
+        """
+        turns a leaf into a parent node with two new leaves, the array equivalent of replacing
+        a Tree_empty by a Tree_filled : the trees grown leaf by leaf (see streaming.py) use it
+
+        Parameters
+        ----------
+        i : int
+            index of the leaf
+        sep : float
+            node's value for the bifurcation rule
+        div : str or int
+            ("x" or "y") axis where the division occurs, or index of the feature
+
+        Returns
+        -------
+        tuple[int, int]
+            indices of the new left and right leaves
+        """
+        if self.left[i] != TREE_LEAF:
+            raise ValueError(f"the node {i} is not a leaf")
+        left = self.add_leaf(self._no_value())
+        right = self.add_leaf(self._no_value())
+        for child in (left, right):
+            self.parent[child] = i
+            self.depth[child] = self.depth[i] + 1
+        self.left[i] = left
+        self.right[i] = right
+        self.feature[i] = feature_index(div)
+        self.named_axes |= div in AXES
+        self.threshold[i] = sep
+        return left, right
+
+    def isleaf(self, i:int) -> bool:
+        """
+        whether or not the node is a leaf (an empty node)
+
+        Parameters
+        ----------
+        i : int
+            index of the node
+
+        Returns
+        -------
+        bool
+        """
+        return self.left[i] == TREE_LEAF
+
+    def div(self, i:int):
+        """
+        "div" of a node as in Tree_filled : its feature index, "x" or "y" for the features 0 and 1
+        of the arrays using the axes of the scenes (see named_axes)
+
+        Parameters
+        ----------
+        i : int
+            index of the node
+
+        Returns
+        -------
+        str or int
+        """
+        f = int(self.feature[i])
+        if self.named_axes or f == TREE_UNDEFINED:
+            return AXES_NAMES.get(f, f)
+        return f
+
+    def update_params(self, root=None):
+        """
+        update depth and positions of the nodes below some nodes, level by level.
+        same rule as Tree_filled.update_params, but computed for a whole level at once.
+        the nodes at the top keep their position and depth, their subtrees being laid out below them
+
+        Parameters
+        ----------
+        root : int | np.ndarray[int]
+            (default None, optional) index of the node(s) whose subtree is laid out,
+            all the roots (the trees of a forest, see concatenate()) when None
+        """
+        n = self.n_nodes
+        if root is None:
+            roots = np.flatnonzero(self.parent[:n] == TREE_LEAF)
+        else:
+            roots = np.atleast_1d(np.asarray(root, dtype=np.intp))
+        if self.layout is not None:
+            left, right = self.left[:n].tolist(), self.right[:n].tolist()
+            for r in roots:
+                x, depths = self.layout.positions(left, right, int(r), self.xy_ratio)
+                nodes = self._subtree(r)
+                x, depths = np.asarray(x)[nodes], np.asarray(depths)[nodes]
+                self.y[nodes] = self.y[r] - self.layout.level_height*depths
+                self.x[nodes] = self.x[r] + x
+                self.depth[nodes] = self.depth[r] + depths
+            return
+        level = roots
+        while len(level):
+            level = level[self.left[level] != TREE_LEAF]
+            l, r = self.left[level], self.right[level]
+            depth = self.depth[level]
+            dx = self.xy_ratio / (1 + depth)
+            self.x[l] = self.x[level] - dx
+            self.x[r] = self.x[level] + dx
+            self.y[l] = self.y[level] - 0.5
+            self.y[r] = self.y[level] - 0.5
+            self.depth[l] = depth + 1
+            self.depth[r] = depth + 1
+            level = np.concatenate((l, r))
+
+    def _subtree(self, root:int) -> np.ndarray:
+        """
+        index of the nodes below a node (itself included), level by level
+        """
+        levels = [np.array([root], dtype=np.intp)]
+        level = levels[0]
+        while len(level):
+            level = level[self.left[level] != TREE_LEAF]
+            level = np.concatenate((self.left[level], self.right[level]))
+            levels.append(level)
+        return np.concatenate(levels)
+
+    def apply(self, X, root=None) -> np.ndarray:
+        """
+        finds the leaf reached by every row of X, the rows going left when X[:, feature] < threshold.
+        the traversal is level-synchronous : at each step, all the rows still in a parent node
+        go down one level at once. With several roots (the trees of a forest stored in the same arrays,
+        see concatenate()), all the (tree, row) pairs go down together
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+        root : int | np.ndarray[int]
+            (default None, optional) index of the node where the rows start, the root when None,
+            or the indices of several roots
+
+        Returns
+        -------
+        np.ndarray[int]
+            index of the leaf reached by every row, (n_roots, n_samples) with several roots
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n = self.n_nodes
+        if root is None:
+            root = self.root.id
+        roots = np.asarray(root, dtype=np.intp)
+        # one (node, row) pair per root and row
+        node = np.repeat(roots.ravel(), len(X))
+        rows = np.tile(np.arange(len(X)), roots.size)
+        node = route(X, self.left[:n], self.right[:n], self.feature[:n], self.threshold[:n], node, rows)
+        return node.reshape(roots.shape + (len(X),))
+
+    def predict(self, X, root=None) -> np.ndarray:
+        """
+        value of the leaf reached by every row of X, see apply()
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+        root : int | np.ndarray[int]
+            (default None, optional) index of the node where the rows start, the root when None,
+            or the indices of several roots
+
+        Returns
+        -------
+        np.ndarray
+            the value predicted for every row, (n_roots, n_samples) with several roots
+        """
+        return self.value[self.apply(X, root)]
+
+    def decision_path(self, X, root:int=None):
+        """
+        nodes visited by every row of X on its way to its leaf, like the walk of scene7_8 for a whole batch.
+        the rows go down together, one level at a time as in apply(), each level adding one
+        (row, node, comparison) triple per row still in a parent node
+
+        Parameters
+        ----------
+        X : np.ndarray
+            (n_samples, n_features) data
+        root : int
+            (default None, optional) index of the node where the rows start, the root when None
+
+        Returns
+        -------
+        tuple[np.ndarray, scipy.sparse.csr_matrix, np.ndarray[bool]]
+            the ids of the nodes (node_ids, the columns of the matrix),
+            the (n_samples, n_nodes) matrix whose row i holds a 1 in the column of every node visited by the row i,
+            from the root to the leaf, and for every stored entry (aligned with the matrix's indices)
+            whether X[i, feature] < threshold at that node, the row going left (False for the leaves)
+        """
+        from scipy.sparse import csr_matrix
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n = self.n_nodes
+        check_divisions(self.feature[:n][self.left[:n] != TREE_LEAF])
+        if root is None:
+            root = self.root.id
+        rows = np.arange(len(X))
+        node = np.full(len(X), root, dtype=np.intp)
+        visited_rows, visited_nodes, went_left = [], [], []
+        while len(rows):
+            inner = self.left[node] != TREE_LEAF
+            go_left = np.zeros(len(rows), dtype=bool)
+            go_left[inner] = X[rows[inner], self.feature[node[inner]]] < self.threshold[node[inner]]
+            visited_rows.append(rows)
+            visited_nodes.append(node)
+            went_left.append(go_left)
+            rows, node = rows[inner], np.where(go_left, self.left[node], self.right[node])[inner]
+        visited_rows = np.concatenate(visited_rows)
+        # the entries of every row, from the root to the leaf : the levels keep their order in a stable sort
+        order = np.argsort(visited_rows, kind="stable")
+        indptr = np.zeros(len(X) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(visited_rows, minlength=len(X)), out=indptr[1:])
+        paths = csr_matrix((np.ones(len(order), dtype=np.int8), np.concatenate(visited_nodes)[order], indptr),
+                           shape=(len(X), n))
+        return self.node_ids, paths, np.concatenate(went_left)[order]
+
+    def bounds(self, lower=None, upper=None, root:int=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        hyper-rectangle of every node : a node of feature f and threshold s gives its region
+        to its children, cut at s along f (the left child below, the right child above).
+        it is the k-dimensional version of Tree_filled.lines(), computed top-down, one level at a time,
+        the nodes of a level being all processed with the same few NumPy operations
+
+        Parameters
+        ----------
+        lower : np.ndarray
+            (default None, optional) (n_features,) lower corner of the region of the root, -inf when None
+        upper : np.ndarray
+            (default None, optional) (n_features,) upper corner of the region of the root, +inf when None
+        root : int
+            (default None, optional) index of the node at the top of the regions, the root when None
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            the (n_nodes, n_features) lower and upper corners of the region of every node,
+            NaN for the nodes that are not below the root
+        """
+        n = self.n_nodes
+        if lower is None and upper is None:
+            n_features = int(self.feature[:n].max(initial=-1)) + 1
+            lower, upper = np.full(n_features, -np.inf), np.full(n_features, np.inf)
+        elif lower is None:
+            lower = np.full(len(upper), -np.inf)
+        elif upper is None:
+            upper = np.full(len(lower), np.inf)
+        lower, upper = np.asarray(lower, dtype=np.float64), np.asarray(upper, dtype=np.float64)
+        if lower.shape != upper.shape or lower.ndim != 1:
+            raise ValueError("lower and upper must be two (n_features,) corners")
+        if np.any(self.feature[:n] >= len(lower)):
+            raise ValueError(f"the tree has features beyond the {len(lower)} dimensions of the region")
+        if root is None:
+            root = self.root.id
+
+        lo = np.full((n, len(lower)), np.nan)
+        hi = np.full((n, len(lower)), np.nan)
+        lo[root], hi[root] = lower, upper
+        level = np.array([root])
+        while len(level):
+            parents = level[self.left[level] != TREE_LEAF]
+            left, right = self.left[parents], self.right[parents]
+            for child in (left, right):
+                lo[child] = lo[parents]
+                hi[child] = hi[parents]
+            # the nodes without division axis give their whole region to their children
+            cut = self.feature[parents] >= 0
+            f, s, parents = self.feature[parents][cut], self.threshold[parents][cut], parents[cut]
+            hi[left[cut], f] = np.minimum(hi[parents, f], s)
+            lo[right[cut], f] = np.maximum(lo[parents, f], s)
+            level = np.concatenate([left, right])
+        return lo, hi
+
+    def node(self, i:int) -> Tree:
+        """
+        thin view of a node, usable where a Tree_filled or a Tree_empty is expected
+
+        Parameters
+        ----------
+        i : int
+            index of the node
+
+        Returns
+        -------
+        Tree
+            Tree_filled_view or Tree_empty_view of the node
+        """
+        i = int(i)
+        if not 0 <= i < self.n_nodes:
+            raise IndexError(f"node {i} does not exist")
+        view = self._views.get(i)
+        if view is None:
+            view = Tree_empty_view(self, i) if self.isleaf(i) else Tree_filled_view(self, i)
+            self._views[i] = view
+        return view
+
+    @classmethod
+    def from_tree(cls, T:Tree, positions:bool=True) -> "TreeArrays":
+        """
+        converts a tree made of Tree_filled and Tree_empty objects into arrays,
+        keeping the positions, depths, labels and values already computed
+
+        Parameters
+        ----------
+        T : Tree
+            root of the tree (or subtree) to convert
+        positions : bool
+            (default True, optional) whether or not to copy the layout, False for the arrays only used to route data
+
+        Returns
+        -------
+        TreeArrays
+            the arrays describing T, T being the node 0
+        """
+        A = cls(scale=T.scale, xy_ratio=T.xy_ratio)
+        A.layout = T.layout
+        A.n_features = getattr(T, "n_features", None)
+        A.regression = getattr(T, "regression", None)
+        ids, values = [], []
+        # preorder traversal with an explicit stack, the parent index being known before the child
+        stack = [(T, TREE_LEAF, None)]
+        while stack:
+            node, parent, side = stack.pop()
+            i = A.add_leaf()
+            ids.append(node.id)
+            values.append(node.value)
+            A.n_samples[i] = node.n_samples
+            if node.impurity is not None:
+                A.impurity[i] = node.impurity
+            A.parent[i] = parent
+            if side is not None:
+                (A.left if side == "l" else A.right)[parent] = i
+            if positions:
+                A.depth[i] = node.depth
+                A.x[i], A.y[i] = node.pos
+            elif parent != TREE_LEAF:
+                A.depth[i] = A.depth[parent] + 1
+            if node.isempty():
+                if node.label:
+                    A.labels[i] = node.label
+                continue
+            A.feature[i] = feature_index(node.div)
+            A.named_axes |= node.div in AXES
+            A.threshold[i] = node.s
+            if node.label != default_label(node.div, float(node.s)):
+                A.labels[i] = node.label
+            if node.line:
+                A.node_lines[i] = node.line
+            stack.append((node.r, i, "r"))
+            stack.append((node.l, i, "l"))
+        A._node_ids = np.array(ids)
+        # the values keep their own type (numbers, class names...), the nodes without value
+        # being given the "no value" of that type
+        known = [v for v in values if v is not None]
+        value = np.array(known) if known else np.array([], dtype=np.float64)
+        if value.dtype.kind not in "fiubUS":
+            value = value.astype(object)
+        elif any(v is None and A.left[i] == TREE_LEAF for i, v in enumerate(values)):
+            # a leaf without value : the "no value" of the integers and strings would be a value (0 or "")
+            value = value.astype(np.float64 if value.dtype.kind in "iub" else object)
+        A.value = np.zeros(len(A.left), dtype=value.dtype)
+        A.value[:] = A._no_value()
+        A.value[[i for i, v in enumerate(values) if v is not None]] = value
+        return A
+
+    @classmethod
+    def concatenate(cls, parts:list) -> tuple["TreeArrays", np.ndarray]:
+        """
+        stores several trees in the same arrays, one after the other, e.g. the trees of a forest.
+        the positions are kept, each tree keeping its own coordinates
+
+        Parameters
+        ----------
+        parts : list[TreeArrays]
+            the arrays of the trees, each with a single root
+
+        Returns
+        -------
+        tuple[TreeArrays, np.ndarray[int]]
+            the arrays of all the trees, and the index of the root of each tree in them
+        """
+        if not parts:
+            raise ValueError("there is no tree to concatenate")
+        offsets = np.cumsum([0] + [len(A) for A in parts])
+        C = cls(offsets[-1], scale=parts[0].scale, xy_ratio=parts[0].xy_ratio)
+        C.layout = parts[0].layout
+        C.named_axes = parts[0].named_axes
+        C.n_features = parts[0].n_features
+        C.regression = parts[0].regression
+        C.n_nodes = int(offsets[-1])
+        for name in ("left", "right", "parent", "depth", "feature", "threshold",
+                     "n_samples", "impurity", "x", "y"):
+            getattr(C, name)[:] = np.concatenate([getattr(A, name)[:len(A)] for A in parts])
+        C.value = np.concatenate([A.value[:len(A)] for A in parts])
+        roots = np.empty(len(parts), dtype=np.intp)
+        for k, (A, o) in enumerate(zip(parts, offsets)):
+            # the links of each tree are shifted to its place, TREE_LEAF staying TREE_LEAF
+            part = slice(o, o + len(A))
+            for links in (C.left, C.right, C.parent):
+                links[part] = np.where(links[part] == TREE_LEAF, TREE_LEAF, links[part] + o)
+            roots[k] = o + A.root.id
+            C.labels.update({i + o: label for i, label in A.labels.items()})
+            C.node_lines.update({i + o: line for i, line in A.node_lines.items()})
+        return C, roots
+
+    def subtree(self, root:int) -> "TreeArrays":
+        """
+        copy of the nodes below a node, that node being the node 0 of the copy.
+        the nodes are gathered level by level (see _subtree()) and every array is copied at once,
+        without going through the views
+
+        Parameters
+        ----------
+        root : int
+            index of the node at the top of the copy
+
+        Returns
+        -------
+        TreeArrays
+            the arrays of the subtree, whose node_ids are the indices of the nodes in these arrays
+        """
+        index = self._subtree(int(root))
+        n = len(index)
+        S = type(self)(n, scale=self.scale, xy_ratio=self.xy_ratio)
+        S.layout = self.layout
+        S.named_axes = self.named_axes
+        S.n_features = self.n_features
+        S.regression = self.regression
+        S.n_nodes = n
+        # new index of every node of the subtree
+        new = np.full(self.n_nodes, TREE_LEAF, dtype=np.int32)
+        new[index] = np.arange(n)
+        for name in ("feature", "threshold", "n_samples", "impurity", "x", "y"):
+            getattr(S, name)[:] = getattr(self, name)[index]
+        # the links are renumbered, TREE_LEAF staying TREE_LEAF
+        for name in ("left", "right", "parent"):
+            links = getattr(self, name)[index]
+            getattr(S, name)[:] = np.where(links == TREE_LEAF, TREE_LEAF, new[links])
+        S.parent[0] = TREE_LEAF
+        # the depths below the new root, one level at a time
+        level, depth = np.array([0]), 0
+        while len(level):
+            S.depth[level] = depth
+            level = level[S.left[level] != TREE_LEAF]
+            level, depth = np.concatenate((S.left[level], S.right[level])), depth + 1
+        S.value = self.value[index]
+        S._node_ids = index
+        S.labels = {int(new[i]): label for i, label in self.labels.items() if new[i] != TREE_LEAF}
+        S.node_lines = {int(new[i]): line for i, line in self.node_lines.items() if new[i] != TREE_LEAF}
+        return S
+
+    def to_tree(self, root:int=None) -> Tree:
+        """
+        converts the arrays back into Tree_filled and Tree_empty objects, the reverse of from_tree().
+        the nodes are registered in the current TreeModel, the layout being computed lazily as usual
+
+        Parameters
+        ----------
+        root : int
+            (default None, optional) index of the node at the top of the tree to convert, the root when None
+
+        Returns
+        -------
+        Tree
+            the root of the new tree
+        """
+        if root is None:
+            root = self.root.id
+        # preorder with an explicit stack, then the nodes are built in reverse : children first
+        order = []
+        stack = [int(root)]
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            if self.left[i] != TREE_LEAF:
+                stack.append(int(self.right[i]))
+                stack.append(int(self.left[i]))
+        built = {}
+        for i in reversed(order):
+            if self.left[i] == TREE_LEAF:
+                T = Tree_empty()
+            else:
+                T = Tree_filled(built[int(self.left[i])], built[int(self.right[i])],
+                                float(self.threshold[i]), self.div(i),
+                                scale=self.scale, xy_ratio=self.xy_ratio, layout=self.layout)
+                T.line = self.node_lines.get(i, [])
+            if i in self.labels:
+                T.label = self.labels[i]
+            value = self.value[i]
+            T.value = None if value is None or (isinstance(value, float) and np.isnan(value)) else value
+            T.n_samples = int(self.n_samples[i])
+            T.impurity = None if np.isnan(self.impurity[i]) else float(self.impurity[i])
+            built[i] = T
+        return built[int(root)]
+
+
+class Tree_empty_view(Tree_empty):
+    """
+    view of a leaf node stored in a TreeArrays, behaving like a Tree_empty.
+    it is not registered in a TreeModel : the nodes of its tree are the ones of its TreeArrays
+    it cannot be the child of a new node either, the copy given by to_tree() can
+    """
+    def __init__(self, arrays:TreeArrays, index:int):
+        # Tree.__init__ is deliberately not called, all the data lives in the arrays
+        self.arrays = arrays
+        self.index = index
+
+    @property
+    def id(self):
+        return self.index
+
+    @property
+    def all_nodes(self):
+        return [self.arrays.node(i) for i in range(self.arrays.n_nodes)]
+
+    @property
+    def depth(self):
+        return int(self.arrays.depth[self.index])
+
+    @depth.setter
+    def depth(self, value):
+        self.arrays.depth[self.index] = value
+
+    @property
+    def pos(self):
+        return (float(self.arrays.x[self.index]), float(self.arrays.y[self.index]))
+
+    @pos.setter
+    def pos(self, value):
+        self.arrays.x[self.index], self.arrays.y[self.index] = value
+
+    @property
+    def parent(self):
+        p = self.arrays.parent[self.index]
+        return None if p == TREE_LEAF else self.arrays.node(p)
+
+    @parent.setter
+    def parent(self, value):
+        # the parents are the arrays' own : another tree cannot take the node as a child
+        raise TypeError("the views of a TreeArrays cannot be grafted in another tree, call to_tree() first")
+
+    _graftable = False
+
+    @property
+    def n_features(self):
+        return self.arrays.n_features
+
+    @property
+    def regression(self):
+        return self.arrays.regression
+
+    @property
+    def scale(self):
+        return self.arrays.scale
+
+    @scale.setter
+    def scale(self, value):
+        self.arrays.scale = value
+
+    @property
+    def xy_ratio(self):
+        return self.arrays.xy_ratio
+
+    @xy_ratio.setter
+    def xy_ratio(self, value):
+        self.arrays.xy_ratio = value
+
+    @property
+    def label(self):
+        return self.arrays.labels.get(self.index, "")
+
+    @label.setter
+    def label(self, value):
+        self.arrays.labels[self.index] = value
+
+    @property
+    def layout(self):
+        return self.arrays.layout
+
+    @layout.setter
+    def layout(self, value):
+        self.arrays.layout = value
+
+    @property
+    def value(self):
+        return self.arrays.value[self.index]
+
+    @value.setter
+    def value(self, value):
+        self.arrays.value[self.index] = value
+
+    @property
+    def n_samples(self):
+        return int(self.arrays.n_samples[self.index])
+
+    @n_samples.setter
+    def n_samples(self, value):
+        self.arrays.n_samples[self.index] = value
+
+    @property
+    def impurity(self):
+        impurity = float(self.arrays.impurity[self.index])
+        return None if np.isnan(impurity) else impurity
+
+    @impurity.setter
+    def impurity(self, value):
+        self.arrays.impurity[self.index] = np.nan if value is None else value
+
+    def mark_dirty(self):
+        # the layout of the arrays is only updated explicitly
+        pass
+
+    def mark_modified(self):
+        # the arrays are the routing structure itself
+        pass
+
+    @property
+    def _hash(self):
+        # nothing is kept in the views : the hashes are computed from the arrays every time
+        return None
+
+    @_hash.setter
+    def _hash(self, value):
+        pass
+
+    def mark_rehash(self):
+        pass
+
+    def compile(self):
+        # the subtree of the view, copied from the arrays with a few NumPy operations per level
+        return self.arrays.subtree(self.index)
+
+    def apply(self, X):
+        return self.arrays.apply(X, self.index)
+
+    def predict(self, X):
+        return self.arrays.predict(X, self.index)
+
+    def update_params(self, depth:int=0, only_dirty:bool=False, root=None):
+        # the subtree of the view is laid out below it
+        self.arrays.update_params(self.index)
+
+
+class Tree_filled_view(Tree_filled):
+    """
+    view of a parent node stored in a TreeArrays, behaving like a Tree_filled.
+    it is not registered in a TreeModel : the nodes of its tree are the ones of its TreeArrays
+    it cannot be the child of a new node either, the copy given by to_tree() can
+    """
+    def __init__(self, arrays:TreeArrays, index:int):
+        # Tree.__init__ is deliberately not called, all the data lives in the arrays
+        self.arrays = arrays
+        self.index = index
+
+    # the attributes shared with the leaves
+    id = Tree_empty_view.id
+    all_nodes = Tree_empty_view.all_nodes
+    depth = Tree_empty_view.depth
+    pos = Tree_empty_view.pos
+    parent = Tree_empty_view.parent
+    _graftable = Tree_empty_view._graftable
+    n_features = Tree_empty_view.n_features
+    regression = Tree_empty_view.regression
+    scale = Tree_empty_view.scale
+    xy_ratio = Tree_empty_view.xy_ratio
+    layout = Tree_empty_view.layout
+    value = Tree_empty_view.value
+    n_samples = Tree_empty_view.n_samples
+    impurity = Tree_empty_view.impurity
+    mark_dirty = Tree_empty_view.mark_dirty
+    mark_modified = Tree_empty_view.mark_modified
+    _hash = Tree_empty_view._hash
+    mark_rehash = Tree_empty_view.mark_rehash
+    update_params = Tree_empty_view.update_params
+    compile = Tree_empty_view.compile
+    apply = Tree_empty_view.apply
+    predict = Tree_empty_view.predict
+
+    @property
+    def l(self):
+        return self.arrays.node(self.arrays.left[self.index])
+
+    @property
+    def r(self):
+        return self.arrays.node(self.arrays.right[self.index])
+
+    @property
+    def s(self):
+        return float(self.arrays.threshold[self.index])
+
+    @s.setter
+    def s(self, value):
+        self.arrays.threshold[self.index] = value
+
+    @property
+    def div(self):
+        return self.arrays.div(self.index)
+
+    @property
+    def label(self):
+        return self.arrays.labels.get(self.index, default_label(self.div, self.s))
+
+    @label.setter
+    def label(self, value):
+        self.arrays.labels[self.index] = value
+
+    @property
+    def line(self):
+        return self.arrays.node_lines.get(self.index, [])
+
+    @line.setter
+    def line(self, value):
+        self.arrays.node_lines[self.index] = value
+
+    def lines(self, region:list[list]):
+        # the lines are written in the arrays' node_lines, the views having no attributes of their own
+        A = self.arrays
+        stack = [(self.index, region)]
+        while stack:
+            i, region = stack.pop()
+            if A.left[i] == TREE_LEAF:
+                continue
+            s, div = float(A.threshold[i]), A.div(i)
+            (x0, y0), (x1, y1) = region
+            if div == "x":
+                A.node_lines[i] = [[s, y0], [s, y1]]
+                leftRegion, rightRegion = [[x0, y0], [s, y1]], [[s, y0], [x1, y1]]
+            elif div == "y":
+                A.node_lines[i] = [[x0, s], [x1, s]]
+                leftRegion, rightRegion = [[x0, y0], [x1, s]], [[x0, s], [x1, y1]]
+            else:
+                continue
+            stack.append((int(A.right[i]), rightRegion))
+            stack.append((int(A.left[i]), leftRegion))
@@ -0,0 +1,215 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+import importlib.util
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from tree import Tree, memoize_subtree
+from tree_arrays import TreeArrays, feature_index, check_divisions
+
+#   _____                _              _
+#  / ____|              | |            | |
+# | |     ___  _ __  ___| |_ __ _ _ __ | |_ ___
+# | |    / _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | |___| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \_____\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+
+# the nested if/else of the "row" scorers is limited by the 100 indentation levels of the python parser
+MAX_ROW_DEPTH = 90
+# the loaded scorers, by path of their file
+_loaded = {}
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def _literal(value) -> str:
+    """
+    python code of a threshold or of a value predicted by a leaf
+    """
+    value = value.item() if hasattr(value, "item") else value
+    if isinstance(value, float) and not math.isfinite(value):
+        return f"float('{value}')"
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return repr(value)
+    raise TypeError(f"the value {value!r} of a leaf cannot be written in the code of a scorer")
+
+def _value_dtype(T:Tree) -> np.dtype:
+    """
+    type of the values predicted by a tree, the one of its arrays (see TreeArrays.from_tree()) :
+    the merkle_hash() does not tell 1 from 1.0, so the type is also part of the keys of the generated code
+    """
+    A = T.arrays if hasattr(T, "arrays") else T.compile()
+    return A.value.dtype
+
+def _leaf_literal(value, dtype:np.dtype) -> str:
+    """
+    python code of the value of a leaf, converted to the type of the values of the tree like in its arrays
+    """
+    if value is None and dtype.kind == "f":
+        value = math.nan
+    elif value is not None and dtype.kind in "fiub":
+        value = dtype.type(value)
+    return _literal(value)
+
+def _preorder(T:Tree) -> tuple[list, list]:
+    """
+    the nodes below T in preorder, with their depth from T, whether they are a right child,
+    and the positions of their children in the list (the views of TreeArrays are not kept
+    from one access to another, so the nodes are never compared by identity)
+    """
+    order, children = [], []
+    stack = [(T, 0, False, None)]
+    while stack:
+        node, depth, right, parent = stack.pop()
+        if parent is not None:
+            children[parent][right] = len(order)
+        order.append((node, depth, right))
+        children.append([None, None])
+        if not node.isempty():
+            check_divisions(feature_index(node.div))
+            stack.append((node.r, depth + 1, True, len(order) - 1))
+            stack.append((node.l, depth + 1, False, len(order) - 1))
+    return order, children
+
+def scorer_source(T:Tree, mode:str="batch") -> str:
+    """
+    python code of a function computing the predictions of a tree, the rows going left when x[feature] < s.
+    the code only depends on the structure of the tree and on the type of its values, and is memoized
+    by its hash (see tree.memoize_subtree()) and this type
+
+        "batch" : score(X) for a (n_samples, n_features) array, every node splitting the indices of the rows
+        it receives with one vectorized comparison, the leaves writing their value for all their rows at once
+        "row" : score_row(x) for a single row, nested if/else without any numpy call
+
+    Parameters
+    ----------
+    T : Tree
+        root of the tree
+    mode : str
+        (default "batch", optional) "batch" or "row"
+
+    Returns
+    -------
+    str
+        the code of a module defining the function, also given by its SCORER variable
+    """
+    return _source(T, mode, _value_dtype(T).str)
+
+@memoize_subtree
+def _source(T:Tree, mode:str, dtype:str) -> str:
+    """
+    scorer_source() of a tree whose values are of the type dtype (see np.dtype.str)
+    """
+    dtype = np.dtype(dtype)
+    order, children = _preorder(T)
+    lines = ["# generated by tree_compiler.py, do not edit", f"# tree {T.merkle_hash()} of {dtype.name} values", ""]
+    if mode == "batch":
+        lines += ["import numpy as np", "",
+                  "def score(X):",
+                  "    X = np.asarray(X)",
+                  "    if X.ndim == 1:",
+                  "        X = X.reshape(1, -1)",
+                  f"    out = np.empty(len(X), dtype=np.dtype({dtype.str!r}))",
+                  "    rows_0 = np.arange(len(X))"]
+        for k, (node, _, _) in enumerate(order):
+            if node.isempty():
+                lines.append(f"    out[rows_{k}] = {_leaf_literal(node.value, dtype)}")
+            else:
+                l, r = children[k]
+                lines += [f"    go_left = X[rows_{k}, {feature_index(node.div)}] < {_literal(float(node.s))}",
+                          f"    rows_{l} = rows_{k}[go_left]",
+                          f"    rows_{r} = rows_{k}[~go_left]"]
+        lines += ["    return out", "", "SCORER = score", ""]
+    elif mode == "row":
+        depth = max(d for _, d, _ in order)
+        if depth > MAX_ROW_DEPTH:
+            raise ValueError(f"the tree is too deep ({depth}) for the nested if/else of a row scorer "
+                             f"(at most {MAX_ROW_DEPTH}), use the batch mode")
+        lines.append("def score_row(x):")
+        # the preorder gives the code in order, an "else:" being written before each right child
+        for node, depth, right in order:
+            indent = "    "*(depth + 1)
+            if right:
+                lines.append("    "*depth + "else:")
+            if node.isempty():
+                lines.append(f"{indent}return {_leaf_literal(node.value, dtype)}")
+            else:
+                lines.append(f"{indent}if x[{feature_index(node.div)}] < {_literal(float(node.s))}:")
+        lines += ["", "SCORER = score_row", ""]
+    else:
+        raise ValueError(f'unknown mode "{mode}", expected "batch" or "row"')
+    return "\n".join(lines)
+
+def load_scorer(path:str):
+    """
+    scoring function of a module generated by compile_scorer(), imported once per process.
+    python keeps the compiled bytecode of the module next to it, in __pycache__
+
+    Parameters
+    ----------
+    path : str
+        path of the generated module
+
+    Returns
+    -------
+    function
+        the scoring function
+    """
+    path = os.path.abspath(path)
+    if path not in _loaded:
+        name = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded[path] = module.SCORER
+    return _loaded[path]
+
+def compile_scorer(T, mode:str="batch", cache_dir:str=None):
+    """
+    turns a tree into a generated scoring function (see scorer_source()), instead of walking its nodes.
+    with a cache directory, the code is written there once, in a module named after the hash of the tree,
+    and the next calls (in this process or another one) import it
+
+    Parameters
+    ----------
+    T : Tree | TreeArrays
+        the tree
+    mode : str
+        (default "batch", optional) "batch" for score(X) on (n_samples, n_features) arrays, "row" for score_row(x)
+    cache_dir : str
+        (default None, optional) directory of the generated modules, nothing is written when None
+
+    Returns
+    -------
+    function
+        the scoring function
+    """
+    if isinstance(T, TreeArrays):
+        T = T.root
+    if cache_dir is None:
+        namespace = {}
+        exec(compile(scorer_source(T, mode), f"<scorer {T.merkle_hash()}>", "exec"), namespace)
+        return namespace["SCORER"]
+    path = os.path.join(cache_dir, f"scorer_{T.merkle_hash()}_{_value_dtype(T).name}_{mode}.py")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        # written aside then renamed : another process never imports a partial file
+        fd, temporary = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+        with os.fdopen(fd, "w") as f:
+            f.write(scorer_source(T, mode))
+        os.replace(temporary, path)
+    return load_scorer(path)
@@ -0,0 +1,241 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+from tree import Tree, default_label
+from tree_arrays import feature_index
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def relabel_cost(a:Tree, b:Tree) -> float:
+    """
+    default cost of turning the node a into the node b : free for two leaves of the same value
+    or two parent nodes of the same rule (feature and threshold, "x" being the feature 0 and "y" the
+    feature 1) and custom label, 1 otherwise (a leaf becoming a parent node included,
+    change_tree() knowing how to morph one into the other)
+
+    Parameters
+    ----------
+    a : Tree
+        node of the first tree
+    b : Tree
+        node of the second tree
+
+    Returns
+    -------
+    float
+        the cost, 0 or 1
+    """
+    if a.isempty() != b.isempty():
+        return 1.
+    if a.isempty():
+        return 0. if a.label == b.label and _same(a.value, b.value) else 1.
+    return 0. if _rule(a) == _rule(b) else 1.
+
+def _rule(t:Tree) -> tuple:
+    """
+    what is drawn of a parent node : its rule, and its label when it is not the default one
+    """
+    label = t.label if t.label != default_label(t.div, t.s) else None
+    return feature_index(t.div), t.s, label
+
+def _same(u, v) -> bool:
+    """
+    equality of two node values, whatever their types
+    """
+    try:
+        return bool(u == v)
+    except (TypeError, ValueError):
+        return u is v
+
+def element_order(T:Tree) -> list:
+    """
+    the nodes of a tree in the order of elements_in_order() in the scenes : top left to bottom right.
+    in the Group of elements_in_order(), the k-th node of this list is at index 2k, the line from its
+    parent at index 2k-1 (the root, first, has no line)
+
+    Parameters
+    ----------
+    T : Tree
+        any node of the tree
+
+    Returns
+    -------
+    list[Tree]
+        the nodes of the tree
+    """
+    return sorted(T.nodes(), key=lambda t: (t.depth, t.get_pos()[0]))
+
+def _postorder(T:Tree) -> tuple[list, list]:
+    """
+    nodes of a tree in postorder, with the index of the leftmost leaf of each one
+    """
+    nodes, leftmost = [], []
+    # explicit stack of (node, children done)
+    stack = [(T, False)]
+    first_leaf = {} # leftmost leaf by id of node, filled as the nodes are visited
+    while stack:
+        node, done = stack.pop()
+        if node.isempty():
+            first_leaf[id(node)] = len(nodes)
+            nodes.append(node)
+            leftmost.append(len(nodes) - 1)
+        elif done:
+            first_leaf[id(node)] = first_leaf[id(node.l)]
+            nodes.append(node)
+            leftmost.append(first_leaf[id(node)])
+        else:
+            stack.append((node, True))
+            stack.append((node.r, False))
+            stack.append((node.l, False))
+    return nodes, leftmost
+
+def _keyroots(leftmost:list) -> list:
+    """
+    the keyroots of Zhang and Shasha : the highest node of every leftmost leaf, in increasing order
+    """
+    highest = {}
+    for i, l in enumerate(leftmost):
+        highest[l] = i # the postorder visits the ancestors after their descendants
+    return sorted(highest.values())
+
+def edit_distance(T1:Tree, T2:Tree, cost=relabel_cost) -> tuple[float, list]:
+    """
+    ordered tree edit distance of Zhang and Shasha, with the optimal mapping between the nodes :
+    the cheapest sequence of node deletions (cost 1), insertions (cost 1) and relabelings (cost())
+    turning T1 into T2. Two identical trees are mapped node to node without running the algorithm
+
+    Parameters
+    ----------
+    T1 : Tree
+        root of the first tree
+    T2 : Tree
+        root of the second tree
+    cost : function
+        (default relabel_cost, optional) cost of turning a node of T1 into a node of T2
+
+    Returns
+    -------
+    tuple[float, list[tuple[Tree, Tree]]]
+        the distance, and the pairs of mapped nodes (the nodes out of the mapping being deleted or inserted)
+    """
+    nodes1, lm1 = _postorder(T1)
+    nodes2, lm2 = _postorder(T2)
+    n1, n2 = len(nodes1), len(nodes2)
+
+    # fast path : same shape and free relabelings, the identity being optimal
+    if lm1 == lm2 and all(cost(a, b) == 0 for a, b in zip(nodes1, nodes2)):
+        return 0., list(zip(nodes1, nodes2))
+
+    # plain lists : the cells are read one by one, faster than numpy scalars
+    relabel = [[cost(a, b) for b in nodes2] for a in nodes1]
+    treedist = [[0.]*n2 for _ in range(n1)]
+
+    def forest_distance(i, j):
+        # distances between the forests of the postorder prefixes of the subtrees of i and j
+        li, lj = lm1[i], lm2[j]
+        rows, cols = i - li + 2, j - lj + 2
+        fd = [[float(x + y) if x == 0 or y == 0 else 0. for y in range(cols)] for x in range(rows)]
+        for x in range(1, rows):
+            a = li + x - 1
+            row, previous = fd[x], fd[x - 1]
+            relabel_a, treedist_a, tree_a = relabel[a], treedist[a], lm1[a] == li
+            for y in range(1, cols):
+                b = lj + y - 1
+                if tree_a and lm2[b] == lj:
+                    # two trees : the roots are deleted, inserted or relabeled
+                    row[y] = min(previous[y] + 1, row[y - 1] + 1, previous[y - 1] + relabel_a[b])
+                    treedist_a[b] = row[y]
+                else:
+                    # two forests : the last trees are deleted, inserted or matched as a whole
+                    row[y] = min(previous[y] + 1, row[y - 1] + 1,
+                                 fd[lm1[a] - li][lm2[b] - lj] + treedist_a[b])
+        return fd
+
+    for i in _keyroots(lm1):
+        for j in _keyroots(lm2):
+            forest_distance(i, j)
+
+    # backtracking, the pairs of subtrees matched as a whole being backtracked in their own table
+    mapping = []
+    pending = [(n1 - 1, n2 - 1)]
+    while pending:
+        i, j = pending.pop()
+        li, lj = lm1[i], lm2[j]
+        fd = forest_distance(i, j)
+        x, y = i - li + 1, j - lj + 1
+        while x > 0 or y > 0:
+            a, b = li + x - 1, lj + y - 1
+            if x > 0 and fd[x][y] == fd[x - 1][y] + 1:
+                x -= 1 # a deleted
+            elif y > 0 and fd[x][y] == fd[x][y - 1] + 1:
+                y -= 1 # b inserted
+            elif lm1[a] == li and lm2[b] == lj:
+                mapping.append((nodes1[a], nodes2[b]))
+                x, y = x - 1, y - 1
+            else:
+                pending.append((a, b))
+                x, y = lm1[a] - li, lm2[b] - lj
+    return float(treedist[n1 - 1][n2 - 1]), mapping
+
+def element_mapping(T1:Tree, T2:Tree, cost=relabel_cost) -> list:
+    """
+    the optimal mapping of edit_distance() in terms of elements_in_order() indices :
+    the mapped nodes, and the lines of the mapped nodes whose parents are mapped together
+
+    Parameters
+    ----------
+    T1 : Tree
+        root of the first tree
+    T2 : Tree
+        root of the second tree
+    cost : function
+        (default relabel_cost, optional) cost of turning a node of T1 into a node of T2
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        pairs (index in the Group of T1, index in the Group of T2) of elements that can be morphed
+    """
+    _, mapping = edit_distance(T1, T2, cost)
+    # index of every node in the Group of elements_in_order()
+    index1 = {id(n): 2*k for k, n in enumerate(element_order(T1))}
+    index2 = {id(n): 2*k for k, n in enumerate(element_order(T2))}
+    partner = {id(a): b for a, b in mapping}
+    pairs = []
+    for a, b in mapping:
+        pairs.append((index1[id(a)], index2[id(b)]))
+        if a.parent is not None and b.parent is not None and partner.get(id(a.parent)) is b.parent:
+            pairs.append((index1[id(a)] - 1, index2[id(b)] - 1))
+    return sorted(pairs)
+
+def identical_elements(T1:Tree, T2:Tree, cost=relabel_cost) -> list:
+    """
+    the "identical" list of change_tree() in scene15 : the indices of the elements mapped
+    by element_mapping() to the element of the same index in the other tree
+
+    Parameters
+    ----------
+    T1 : Tree
+        root of the first tree
+    T2 : Tree
+        root of the second tree
+    cost : function
+        (default relabel_cost, optional) cost of turning a node of T1 into a node of T2
+
+    Returns
+    -------
+    list[int]
+        the indices, in increasing order
+    """
+    return [i for i, j in element_mapping(T1, T2, cost) if i == j]
@@ -0,0 +1,227 @@
+#  _____                            _
+# |_   _|                          | |
+#   | |  _ __ ___  _ __   ___  _ __| |_ ___
+#   | | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+#  _| |_| | | | | | |_) | (_) | |  | |_\__ \
+# |_____|_| |_| |_| .__/ \___/|_|   \__|___/
+#                 | |
+#                 |_|
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import training
+from tree import Tree
+from tree_arrays import TREE_LEAF, TREE_UNDEFINED, check_divisions
+
+#   _____                _              _
+#  / ____|              | |            | |
+# | |     ___  _ __  ___| |_ __ _ _ __ | |_ ___
+# | |    / _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | |___| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \_____\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+
+# number of rows explained together : the paths hold (depth, rows) arrays for every level of the tree
+SHAP_BATCH = 4096
+
+#  ______                _   _
+# |  ____|              | | (_)
+# | |__ _   _ _ __   ___| |_ _  ___  _ __  ___
+# |  __| | | | '_ \ / __| __| |/ _ \| '_ \/ __|
+# | |  | |_| | | | | (__| |_| | (_) | | | \__ \
+# |_|   \__,_|_| |_|\___|\__|_|\___/|_| |_|___/
+
+def _extend(d, z, o, w, pz, po, pi):
+    """
+    adds a feature to a path : its share of the training samples pz and, for every row, whether the row
+    follows the path po. w holds the weights of the subsets of every size, one column per row
+    """
+    l = len(d)
+    d = np.append(d, pi)
+    z = np.append(z, pz)
+    o = np.vstack([o, po[None]])
+    if l == 0:
+        return d, z, o, np.ones((1, len(po)))
+    old = np.vstack([w, np.zeros((1, w.shape[1]))])
+    shifted = np.vstack([np.zeros((1, w.shape[1])), w])
+    size = np.arange(l + 1)[:, None]
+    return d, z, o, (pz*old*(l - size) + po*shifted*size)/(l + 1)
+
+def _unwind(d, z, o, w, i):
+    """
+    removes the feature i from a path, the reverse of _extend()
+    """
+    l = len(d) - 1
+    one, zero = o[i], z[i]
+    follows = one != 0
+    safe_one = np.where(follows, one, 1.)
+    w = w.copy()
+    n = w[l].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for j in range(l - 1, -1, -1):
+            t = w[j].copy()
+            w_follow = n*(l + 1)/((j + 1)*safe_one)
+            n = np.where(follows, t - w_follow*zero*(l - j)/(l + 1), n)
+            w_other = t*(l + 1)/(zero*(l - j)) if zero != 0 else np.zeros_like(t)
+            w[j] = np.where(follows, w_follow, w_other)
+    keep = np.arange(len(d)) != i
+    return d[keep], z[keep], o[keep], w[:l]
+
+def _unwound_sums(z, o, w):
+    """
+    sum of the weights of the path without each of its features 1..l (the feature 0 being the root),
+    all at once : (l, n_rows)
+    """
+    l = len(z) - 1
+    one, zero = o[1:], z[1:, None] # the removed feature of every row of the result
+    follows = one != 0
+    safe_one = np.where(follows, one, 1.)
+    safe_zero = np.where(zero != 0, zero, 1.)
+    total = np.zeros_like(one)
+    n = np.broadcast_to(w[l], one.shape)
+    for j in range(l - 1, -1, -1):
+        t = n*(l + 1)/((j + 1)*safe_one)
+        total += np.where(follows, t, np.where(zero != 0, w[j]/safe_zero*(l + 1)/(l - j), 0.))
+        n = w[j] - t*zero*(l - j)/(l + 1)
+    return total
+
+def _tree_shap(left, right, feature, threshold, cover, values, root, X, phi):
+    """
+    exact path-dependent TreeSHAP (Lundberg et al., algorithm 2) of one tree, added to phi.
+    the tree is walked once with an explicit stack, every path being followed by all the rows at the same time :
+    the features of the path and their shares of the training samples are the same for all the rows,
+    only whether the row follows the path differs
+    """
+    n = len(X)
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros((0, n)), np.zeros((0, n)))
+    # node, path of its parent, and what the node adds to the path
+    stack = [(root, empty, 1., np.ones(n), TREE_UNDEFINED)]
+    while stack:
+        j, (d, z, o, w), pz, po, pi = stack.pop()
+        d, z, o, w = _extend(d, z, o, w, pz, po, pi)
+        if left[j] == TREE_LEAF:
+            if len(d) > 1:
+                contribution = _unwound_sums(z, o, w)*(o[1:] - z[1:, None]) # (l, n_rows)
+                for k in range(1, len(d)):
+                    phi[:, d[k]] += contribution[k - 1][:, None]*values[j]
+            continue
+        f = feature[j]
+        zero, one = 1., np.ones(n)
+        seen = np.flatnonzero(d[1:] == f)
+        if len(seen):
+            # a feature met again : its previous share is removed, then given to the children
+            k = seen[0] + 1
+            zero, one = z[k], o[k]
+            d, z, o, w = _unwind(d, z, o, w, k)
+        go_left = X[:, f] < threshold[j]
+        for child, follows in ((right[j], ~go_left), (left[j], go_left)):
+            share = cover[child]/cover[j] if cover[j] > 0 else 0.
+            stack.append((child, (d, z, o, w), zero*share, one*follows, f))
+
+def _expected(left, right, cover, values, root) -> np.ndarray:
+    """
+    mean prediction of a tree over its training samples : the values of the leaves weighted by their samples
+    """
+    expected = np.zeros(values.shape[1])
+    stack = [root]
+    while stack:
+        j = stack.pop()
+        if left[j] == TREE_LEAF:
+            expected += values[j]*cover[j]/cover[root]
+        else:
+            stack.append(right[j])
+            stack.append(left[j])
+    return expected
+
+def _check(A, roots):
+    """
+    the nodes of the trees to explain need routing features and training samples
+    """
+    n = len(A)
+    check_divisions(A.feature[:n][A.left[:n] != TREE_LEAF])
+    if np.any(A.n_samples[roots] <= 0):
+        raise ValueError("the nodes need their n_samples (see training.fit()) to weight the paths")
+
+def _explain(left, right, feature, threshold, cover, values, roots, X, n_features) -> tuple:
+    """
+    sum of the SHAP values and of the expected values of some trees, the rows being explained by batches
+    """
+    phi = np.zeros((len(X), n_features, values.shape[1]))
+    for start in range(0, len(X), SHAP_BATCH):
+        for root in roots:
+            _tree_shap(left, right, feature, threshold, cover, values, int(root),
+                       X[start:start + SHAP_BATCH], phi[start:start + SHAP_BATCH])
+    expected = sum(_expected(left, right, cover, values, int(root)) for root in roots)
+    return phi, expected
+
+def _explain_task(roots:np.ndarray, n_features:int) -> tuple:
+    """
+    _explain() of some trees in a worker, on the arrays shared by shap_values(), see training.share()
+    """
+    s = training._shared
+    return _explain(s["left"], s["right"], s["feature"], s["threshold"], s["cover"], s["values"],
+                    roots, s["X"], n_features)
+
+def shap_values(T, X, values=None, root=None, n_jobs:int=1) -> tuple[np.ndarray, np.ndarray]:
+    """
+    exact SHAP values of the predictions of a tree (or the mean of several trees) with the TreeSHAP algorithm :
+    the part of every feature in the difference between the prediction of a row and the mean prediction,
+    the missing features being averaged over the training samples stored in n_samples.
+    it costs O(rows*leaves*depth^2) instead of the O(2^features) of the definition.
+    several trees (a forest in one TreeArrays, see TreeArrays.concatenate()) are explained in a pool of processes,
+    the arrays being put in shared memory once
+
+    Parameters
+    ----------
+    T : Tree | TreeArrays
+        the tree(s), their nodes having their n_samples (see training.fit())
+    X : np.ndarray
+        (n_samples, n_features) the rows to explain
+    values : np.ndarray
+        (default None, optional) numerical output of every node, (n_nodes,) or (n_nodes, n_outputs),
+        the values of the nodes when None (for a classification tree, the indicator of a class for example)
+    root : int | np.ndarray[int]
+        (default None, optional) index of the root of the tree, or of the roots of the trees to average
+    n_jobs : int
+        (default 1, optional) number of processes for several trees, -1 for one per CPU
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        the (n_samples, n_features) SHAP values, (n_samples, n_features, n_outputs) for 2-d values,
+        and the expected value, the prediction of every row being expected + phi.sum(axis=1)
+    """
+    A = T.compile() if isinstance(T, Tree) else T
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    n = len(A)
+    roots = np.atleast_1d(np.asarray(A.root.id if root is None else root, dtype=np.intp))
+    _check(A, roots)
+    if values is None:
+        if A.value.dtype.kind not in "fiub":
+            raise ValueError("the values of the nodes are not numerical, give the output to explain in values")
+        values = A.value[:n]
+    values = np.asarray(values, dtype=np.float64)
+    single = values.ndim == 1
+    values = values.reshape(n, -1)
+    arrays = {"left": A.left[:n], "right": A.right[:n], "feature": A.feature[:n], "threshold": A.threshold[:n],
+              "cover": A.n_samples[:n].astype(np.float64), "values": values}
+
+    n_jobs = min(training.n_workers(n_jobs), len(roots))
+    if n_jobs > 1:
+        blocks, spec = training.share({**arrays, "X": X})
+        try:
+            with ProcessPoolExecutor(n_jobs, initializer=training._attach, initargs=(spec,)) as pool:
+                parts = list(pool.map(_explain_task, np.array_split(roots, n_jobs), [X.shape[1]]*n_jobs))
+        finally:
+            training.release(blocks)
+        phi = sum(p for p, _ in parts)
+        expected = sum(e for _, e in parts)
+    else:
+        phi, expected = _explain(**arrays, roots=roots, X=X, n_features=X.shape[1])
+    phi, expected = phi/len(roots), expected/len(roots)
+    if single:
+        return phi[..., 0], expected[0]
+    return phi, expected